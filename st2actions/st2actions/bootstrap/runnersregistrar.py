@@ -22,6 +22,8 @@ from st2common.constants.runners import LOCAL_RUNNER_DEFAULT_ACTION_TIMEOUT
 from st2common.constants.runners import FABRIC_RUNNER_DEFAULT_ACTION_TIMEOUT
 from st2common.constants.runners import FABRIC_RUNNER_DEFAULT_REMOTE_DIR
 from st2common.constants.runners import PYTHON_RUNNER_DEFAULT_ACTION_TIMEOUT
+from st2common.constants.runners import PARAMIKO_RUNNER_DEFAULT_ACTION_TIMEOUT
+from st2common.constants.runners import PARAMIKO_RUNNER_DEFAULT_CONCURRENCY
 
 __all__ = [
     'register_runner_types',
@@ -179,6 +181,76 @@ RUNNER_TYPES = [
         },
         'runner_module': 'st2actions.runners.fabricrunner'
     },
+    {
+        'name': 'run-remote-paramiko',
+        'description': 'A remote execution runner that executes commands over SSH on '
+                       'multiple hosts concurrently.',
+        'enabled': True,
+        'runner_parameters': {
+            'hosts': {
+                'description': 'A comma delimited string of a list of hosts '
+                               'where the remote command will be executed.',
+                'type': 'string',
+                'required': True
+            },
+            'username': {
+                'description': ('Username used to log-in. If not provided, '
+                                'default username from config is used.'),
+                'type': 'string',
+                'required': False
+            },
+            'password': {
+                'description': ('Password used to log in. If not provided, '
+                                'private key from the config file is used.'),
+                'type': 'string',
+                'required': False
+            },
+            'private_key': {
+                'description': ('Private key used to log in. If not provided, '
+                                'private key from the config file is used.'),
+                'type': 'string',
+                'required': False
+            },
+            'cmd': {
+                'description': 'Arbitrary Linux command to be executed on the '
+                               'remote host(s).',
+                'type': 'string'
+            },
+            'cwd': {
+                'description': 'Working directory where the command will be executed in',
+                'type': 'string'
+            },
+            'env': {
+                'description': ('Environment variables which will be available to the command'
+                                '(e.g. key1=val1,key2=val2)'),
+                'type': 'object'
+            },
+            'parallel': {
+                'description': 'Default to parallel execution.',
+                'type': 'boolean',
+                'default': True,
+                'immutable': True
+            },
+            'concurrency': {
+                'description': 'Maximum number of hosts the command is executed on at the '
+                               'same time when running in parallel.',
+                'type': 'integer',
+                'default': PARAMIKO_RUNNER_DEFAULT_CONCURRENCY
+            },
+            'sudo': {
+                'description': 'The remote command will be executed with sudo.',
+                'type': 'boolean',
+                'default': False
+            },
+            'timeout': {
+                'description': ('Action timeout in seconds. Action will get killed if it '
+                                'doesn\'t finish in timeout seconds.'),
+                'type': 'integer',
+                'default': PARAMIKO_RUNNER_DEFAULT_ACTION_TIMEOUT
+            }
+        },
+        'runner_module': 'st2actions.runners.paramikorunner'
+    },
     {
         'name': 'run-remote-script',
         'description': 'A remote execution runner that executes actions '
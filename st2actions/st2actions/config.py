@@ -56,13 +56,32 @@ mistral_opts = [
     cfg.StrOpt('v2_base_url', default='http://localhost:8989/v2',
                help='Mistral v2 API server root endpoint.'),
     cfg.IntOpt('max_attempts', default=180),
-    cfg.IntOpt('retry_wait', default=5)
+    cfg.IntOpt('retry_wait', default=5),
+    cfg.FloatOpt('query_interval', default=1,
+                 help='Initial interval (in seconds) between the queries for workflow results.'),
+    cfg.FloatOpt('max_query_interval', default=20,
+                 help='Upper limit for the interval between the queries for a workflow.'),
+    cfg.FloatOpt('query_backoff_factor', default=1.5,
+                 help='Factor the query interval for a workflow is multiplied by each time '
+                      'the workflow is still running.'),
+    cfg.IntOpt('query_thread_pool_size', default=10,
+               help='Maximum number of workflow result queries which run at the same time.'),
+    cfg.BoolOpt('query_batch', default=False,
+                help='Retrieve the executions which changed since the last poll using a single '
+                     'list call filtered by updated_at and only query the details of those. '
+                     'Requires Mistral API which supports filtering executions by updated_at.')
 ]
 CONF.register_opts(mistral_opts, group='mistral')
 
 resultstracker_opts = [
     cfg.StrOpt('logging', default='conf/logging.resultstracker.conf',
-               help='Location of the logging configuration file.')
+               help='Location of the logging configuration file.'),
+    cfg.IntOpt('shard_count', default=1,
+               help='Number of results tracker instances the tracked executions are split '
+                    'between.'),
+    cfg.IntOpt('shard_index', default=0,
+               help='Index (starting with 0) of the shard this results tracker instance '
+                    'tracks executions for.')
 ]
 CONF.register_opts(resultstracker_opts, group='resultstracker')
 
@@ -24,9 +24,8 @@ from st2common.constants.action import (LIVEACTION_STATUS_SUCCEEDED,
                                         LIVEACTION_STATUS_FAILED)
 from st2common.models.db.action import ActionExecutionStateDB
 from st2common.persistence.action import ActionExecutionState
-from st2common.services import access, executions
+from st2common.services import access, execution_state
 from st2common.util.action_db import (get_action_by_ref, get_runnertype_by_name)
-from st2common.util.action_db import (update_liveaction_status, get_liveaction_by_id)
 
 from st2actions.container.service import RunnerContainerService
 from st2actions.runners import get_runner, AsyncActionRunner
@@ -71,9 +70,6 @@ class RunnerContainer(object):
         return liveaction_db.result
 
     def _do_run(self, runner, runnertype_db, action_db, liveaction_db):
-        # Finalized parameters are resolved and then rendered.
-        runner_params, action_params = param_utils.get_finalized_params(
-            runnertype_db.runner_parameters, action_db.parameters, liveaction_db.parameters)
         resolved_entry_point = self._get_entry_point_abs_path(action_db.pack,
                                                               action_db.entry_point)
         runner.container_service = RunnerContainerService()
@@ -81,7 +77,6 @@ class RunnerContainer(object):
         runner.action_name = action_db.name
         runner.liveaction_id = str(liveaction_db.id)
         runner.entry_point = resolved_entry_point
-        runner.runner_parameters = runner_params
         runner.context = getattr(liveaction_db, 'context', dict())
         runner.callback = getattr(liveaction_db, 'callback', dict())
         runner.libs_dir_path = self._get_action_libs_abs_path(action_db.pack,
@@ -118,9 +113,8 @@ class RunnerContainer(object):
             context = None
         finally:
             # Always clean-up the auth_token
-            updated_liveaction_db = self._update_live_action_db(liveaction_db.id, status,
+            updated_liveaction_db = self._update_live_action_db(liveaction_db, status,
                                                                 result, context)
-            executions.update_execution(updated_liveaction_db)
             LOG.debug('Updated liveaction after run: %s', updated_liveaction_db)
             try:
                 self._delete_auth_token(runner.auth_token)
@@ -133,18 +127,17 @@ class RunnerContainer(object):
 
         return updated_liveaction_db
 
-    def _update_live_action_db(self, liveaction_id, status, result, context):
-        liveaction_db = get_liveaction_by_id(liveaction_id)
+    def _update_live_action_db(self, liveaction_db, status, result, context):
         if status in DONE_STATES:
             end_timestamp = isotime.add_utc_tz(datetime.datetime.utcnow())
         else:
             end_timestamp = None
 
-        liveaction_db = update_liveaction_status(status=status,
-                                                 result=result,
-                                                 context=context,
-                                                 end_timestamp=end_timestamp,
-                                                 liveaction_db=liveaction_db)
+        liveaction_db, _ = execution_state.update_status(liveaction_db,
+                                                         status=status,
+                                                         result=result,
+                                                         context=context,
+                                                         end_timestamp=end_timestamp)
         return liveaction_db
 
     def _get_entry_point_abs_path(self, pack, entry_point):
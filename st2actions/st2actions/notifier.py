@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
+
 import eventlet
 from kombu import Connection
 from kombu.mixins import ConsumerMixin
@@ -22,7 +24,7 @@ from st2common import log as logging
 from st2common.constants.action import LIVEACTION_STATUS_SUCCEEDED, LIVEACTION_STATUS_FAILED
 from st2common.constants.triggers import INTERNAL_TRIGGER_TYPES
 from st2common.models.system.common import ResourceReference
-from st2common.transport import liveaction, publishers
+from st2common.transport import liveaction, publishers, serialization
 from st2common.transport.reactor import TriggerDispatcher
 from st2common.util.greenpooldispatch import BufferedDispatcher
 
@@ -48,7 +50,7 @@ class LiveActionUpdateQueueConsumer(ConsumerMixin):
 
     def get_consumers(self, Consumer, channel):
         consumer = Consumer(queues=[ACTIONUPDATE_WORK_Q],
-                            accept=['pickle'],
+                            accept=serialization.ACCEPT_CONTENT,
                             callbacks=[self.process_task])
         # use prefetch_count=1 for fair dispatch. This way workers that finish an item get the next
         # task and the work does not get queued behind any single large item.
@@ -132,16 +134,17 @@ class Notifier(object):
             payload['end_timestamp'] = str(liveaction.end_timestamp)
             payload['action_ref'] = liveaction.action
 
-            failed_channels = []
+            payloads = []
             for channel in notify_subsection.channels:
-                try:
-                    payload['channel'] = channel
-                    self._trigger_dispatcher.dispatch(self._notify_trigger, payload=payload)
-                except:
-                    failed_channels.append(channel)
-
-            if len(failed_channels) > 0:
-                raise Exception('Failed notifications to channels: %s' % ', '.join(failed_channels))
+                channel_payload = copy.copy(payload)
+                channel_payload['channel'] = channel
+                payloads.append(channel_payload)
+
+            try:
+                self._trigger_dispatcher.dispatch_batch(self._notify_trigger, payloads=payloads)
+            except:
+                raise Exception('Failed notifications to channels: %s' %
+                                ', '.join(notify_subsection.channels))
 
     def _post_generic_trigger(self, liveaction):
         if not ACTION_SENSOR_ENABLED:
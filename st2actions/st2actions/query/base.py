@@ -14,8 +14,11 @@
 # limitations under the License.
 
 import abc
+import heapq
+import itertools
+
 import eventlet
-import Queue
+from eventlet.event import Event
 import six
 import time
 
@@ -25,7 +28,7 @@ from st2common import log as logging
 from st2common.constants.action import (LIVEACTION_STATUS_FAILED,
                                         LIVEACTION_STATUS_SUCCEEDED)
 from st2common.persistence.action import (LiveAction, ActionExecutionState)
-from st2common.services import executions
+from st2common.services import execution_state
 from st2common.util.action_db import (get_action_by_ref, get_runnertype_by_name)
 
 LOG = logging.getLogger(__name__)
@@ -34,14 +37,52 @@ DONE_STATES = [LIVEACTION_STATUS_FAILED, LIVEACTION_STATUS_SUCCEEDED]
 
 @six.add_metaclass(abc.ABCMeta)
 class Querier(object):
+    """
+    Base class for the queriers which poll external services for the results of the actions.
+
+    Pending queries are kept in a heap ordered by the time the next query is due so the querier
+    sleeps exactly until the next query needs to be made. Every time a query reports that the
+    action is still running, the interval for that action grows by backoff_factor up to
+    max_query_interval so long running workflows are polled less often.
+    """
+
     def __init__(self, threads_pool_size=10, query_interval=1, empty_q_sleep_time=5,
-                 no_workers_sleep_time=1, container_service=None):
+                 no_workers_sleep_time=1, container_service=None, max_query_interval=None,
+                 backoff_factor=1):
+        """
+        :param threads_pool_size: Maximum number of queries which run at the same time.
+        :type threads_pool_size: ``int``
+
+        :param query_interval: Initial interval (in seconds) between queries for an action.
+        :type query_interval: ``float``
+
+        :param empty_q_sleep_time: How long to wait for new queries when there are none.
+        :type empty_q_sleep_time: ``float``
+
+        :param no_workers_sleep_time: How long to wait when all the query threads are busy.
+        :type no_workers_sleep_time: ``float``
+
+        :param max_query_interval: Upper limit for the interval between queries for an action.
+                                   Defaults to query_interval (no backoff).
+        :type max_query_interval: ``float``
+
+        :param backoff_factor: Factor the interval for an action is multiplied by after each
+                               query which reports that the action is still running.
+        :type backoff_factor: ``float``
+        """
         self._query_threads_pool_size = threads_pool_size
-        self._query_contexts = Queue.Queue()
+        # Heap of (due time, sequence number, query context)
+        self._query_contexts = []
+        # query context id -> current interval between queries
+        self._query_intervals = {}
+        self._sequence = itertools.count()
+        self._wakeup_event = Event()
         self._thread_pool = eventlet.GreenPool(self._query_threads_pool_size)
         self._empty_q_sleep_time = empty_q_sleep_time
         self._no_workers_sleep_time = no_workers_sleep_time
         self._query_interval = query_interval
+        self._max_query_interval = max(max_query_interval or query_interval, query_interval)
+        self._backoff_factor = max(backoff_factor, 1)
         if not container_service:
             container_service = RunnerContainerService()
         self.container_service = container_service
@@ -50,32 +91,70 @@ class Querier(object):
     def start(self):
         self._started = True
         while True:
-            while self._query_contexts.empty():
-                eventlet.greenthread.sleep(self._empty_q_sleep_time)
             while self._thread_pool.free() <= 0:
                 eventlet.greenthread.sleep(self._no_workers_sleep_time)
+            self._wait_for_due_queries()
             self._fire_queries()
 
     def add_queries(self, query_contexts=None):
         if query_contexts is None:
             query_contexts = []
         LOG.debug('Adding queries to querier: %s' % query_contexts)
+        now = time.time()
         for query_context in query_contexts:
-            self._query_contexts.put((time.time(), query_context))
+            self._query_intervals[query_context.id] = self._query_interval
+            self._schedule_query(query_context, due_time=now)
 
     def is_started(self):
         return self._started
 
-    def _fire_queries(self):
-        if self._thread_pool.free() <= 0:
+    def get_pending_queries_count(self):
+        return len(self._query_contexts)
+
+    def _schedule_query(self, query_context, due_time):
+        wake_up = not self._query_contexts or due_time < self._query_contexts[0][0]
+        heapq.heappush(self._query_contexts, (due_time, next(self._sequence), query_context))
+
+        # New query is due before the one the querier is currently sleeping for
+        if wake_up and not self._wakeup_event.ready():
+            self._wakeup_event.send()
+
+    def _reschedule_query(self, query_context):
+        interval = self._query_intervals.get(query_context.id, self._query_interval)
+        self._schedule_query(query_context, due_time=time.time() + interval)
+        self._query_intervals[query_context.id] = min(interval * self._backoff_factor,
+                                                      self._max_query_interval)
+
+    def _forget_query(self, query_context):
+        self._query_intervals.pop(query_context.id, None)
+
+    def _wait_for_due_queries(self):
+        """
+        Sleep until the earliest query is due or until a query which is due earlier is added.
+        """
+        if self._query_contexts:
+            timeout = self._query_contexts[0][0] - time.time()
+        else:
+            timeout = self._empty_q_sleep_time
+
+        if timeout <= 0:
             return
-        while not self._query_contexts.empty() and self._thread_pool.free() > 0:
-            (last_query_time, query_context) = self._query_contexts.get_nowait()
-            if time.time() - last_query_time < self._query_interval:
-                self._query_contexts.put((last_query_time, query_context))
-                continue
-            else:
-                self._thread_pool.spawn(self._query_and_save_results, query_context)
+
+        if self._wakeup_event.ready():
+            self._wakeup_event = Event()
+
+        try:
+            with eventlet.Timeout(timeout):
+                self._wakeup_event.wait()
+        except eventlet.Timeout:
+            pass
+
+    def _fire_queries(self):
+        now = time.time()
+        while (self._query_contexts and self._query_contexts[0][0] <= now and
+               self._thread_pool.free() > 0):
+            (_, _, query_context) = heapq.heappop(self._query_contexts)
+            self._thread_pool.spawn(self._query_and_save_results, query_context)
 
     def _query_and_save_results(self, query_context):
         execution_id = query_context.execution_id
@@ -86,6 +165,7 @@ class Querier(object):
             (status, results) = self.query(execution_id, actual_query_context)
         except:
             LOG.exception('Failed querying results for liveaction_id %s.', execution_id)
+            self._forget_query(query_context)
             self._delete_state_object(query_context)
             LOG.debug('Remove state object %s.', query_context)
             return
@@ -98,10 +178,12 @@ class Querier(object):
         except Exception:
             LOG.exception('Failed updating action results for liveaction_id %s',
                           execution_id)
+            self._forget_query(query_context)
             self._delete_state_object(query_context)
             return
 
         if done:
+            self._forget_query(query_context)
             action_db = get_action_by_ref(liveaction_db.action)
             if not action_db:
                 LOG.exception('Unable to invoke post run. Action %s '
@@ -112,18 +194,15 @@ class Querier(object):
             self._delete_state_object(query_context)
             return
 
-        self._query_contexts.put((time.time(), query_context))
+        self._reschedule_query(query_context)
 
     def _update_action_results(self, execution_id, status, results):
         liveaction_db = LiveAction.get_by_id(execution_id)
         if not liveaction_db:
             raise Exception('No DB model for liveaction_id: %s' % execution_id)
-        liveaction_db.result = results
-        liveaction_db.status = status
         # update liveaction, update actionexecution and then publish update.
-        updated_liveaction = LiveAction.add_or_update(liveaction_db, publish=False)
-        executions.update_execution(updated_liveaction)
-        LiveAction.publish_update(updated_liveaction)
+        updated_liveaction, _ = execution_state.update_status(liveaction_db, status=status,
+                                                              result=results)
         return updated_liveaction
 
     def _invoke_post_run(self, actionexec_db, action_db):
@@ -169,7 +248,7 @@ class Querier(object):
 
     def print_stats(self):
         LOG.info('\t --- Name: %s, pending queuries: %d', self.__class__.__name__,
-                 self._query_contexts.qsize())
+                 self.get_pending_queries_count())
 
 
 class QueryContext(object):
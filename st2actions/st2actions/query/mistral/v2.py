@@ -1,6 +1,8 @@
+import time
 import traceback
 import uuid
 
+from eventlet.semaphore import Semaphore
 from oslo.config import cfg
 import requests
 
@@ -17,14 +19,39 @@ DONE_STATES = {'ERROR': LIVEACTION_STATUS_FAILED, 'SUCCESS': LIVEACTION_STATUS_S
 
 
 def get_query_instance():
-    return MistralResultsQuerier(str(uuid.uuid4()))
+    return get_instance()
 
 
 class MistralResultsQuerier(Querier):
+    """
+    Querier which retrieves workflow results from the Mistral v2 API.
+
+    In the batched mode, the executions which were updated since the last poll are retrieved
+    using a single list call which is shared by all the queries made within the query interval.
+    Execution and task details are only retrieved for the workflows which changed.
+    """
+
     def __init__(self, id, *args, **kwargs):
+        self._batch_mode = kwargs.pop('batch_mode', False)
         super(MistralResultsQuerier, self).__init__(*args, **kwargs)
         self._base_url = get_url_without_trailing_slash(cfg.CONF.mistral.v2_base_url)
 
+        # Shared session so the connections to Mistral are kept alive and reused
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=self._query_threads_pool_size)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+        # mistral execution id -> (updated_at, status, result) as of the last full query
+        self._results = {}
+        # mistral execution id -> updated_at as reported by the latest execution listings
+        self._updated_at = {}
+        # Most recent updated_at seen in the execution listings, used to only list executions
+        # which changed since
+        self._updated_at_marker = None
+        self._last_listing_time = 0
+        self._listing_lock = Semaphore()
+
     def query(self, execution_id, query_context):
         """
         Queries mistral for workflow results using v2 APIs.
@@ -40,6 +67,9 @@ class MistralResultsQuerier(Querier):
             raise Exception('Mistral execution id invalid in query_context %s.' %
                             str(query_context))
 
+        if self._batch_mode:
+            return self._query_batched(execution_id, exec_id, query_context)
+
         try:
             status, output = self._get_workflow_result(exec_id)
             if output and 'tasks' in output:
@@ -70,6 +100,98 @@ class MistralResultsQuerier(Querier):
 
         return (status, result)
 
+    def _query_batched(self, execution_id, exec_id, query_context):
+        try:
+            self._refresh_updated_executions()
+        except requests.exceptions.ConnectionError:
+            msg = 'Unable to connect to mistral.'
+            trace = traceback.format_exc(10)
+            LOG.exception(msg)
+            return (LIVEACTION_STATUS_RUNNING, {'error': msg, 'traceback': trace})
+
+        cached = self._results.get(exec_id, None)
+
+        if cached and self._updated_at.get(exec_id, None) == cached[0]:
+            LOG.debug('Mistral execution %s didn\'t change since the last query.', exec_id)
+            return (cached[1], cached[2])
+
+        try:
+            execution = self._get_execution(exec_id)
+            status, output = self._get_workflow_status_and_output(exec_id, execution)
+            result = output or {}
+            result['tasks'] = self._get_workflow_tasks(exec_id)
+        except requests.exceptions.ConnectionError:
+            msg = 'Unable to connect to mistral.'
+            trace = traceback.format_exc(10)
+            LOG.exception(msg)
+            return (LIVEACTION_STATUS_RUNNING, {'error': msg, 'traceback': trace})
+        except:
+            LOG.exception('Exception trying to get workflow status and output for '
+                          'query context: %s. Will skip query.', query_context)
+            self._forget_execution(exec_id)
+            raise
+
+        # Note: Marker is only advanced by the listings. Other executions could have been updated
+        # since the last listing and before this execution was updated.
+        updated_at = execution.get('updated_at', None)
+
+        if status == LIVEACTION_STATUS_RUNNING:
+            self._results[exec_id] = (updated_at, status, result)
+            self._updated_at[exec_id] = updated_at
+        else:
+            self._forget_execution(exec_id)
+
+        return (status, result)
+
+    def _refresh_updated_executions(self):
+        """
+        List the executions which were updated since the last listing. Listing happens at most
+        once per query interval, concurrent queries wait for the listing in progress.
+        """
+        with self._listing_lock:
+            if not self._results:
+                return
+
+            if time.time() - self._last_listing_time < self._query_interval:
+                return
+
+            params = {}
+            if self._updated_at_marker:
+                params['updated_at'] = 'gte:%s' % (self._updated_at_marker)
+
+            resp = self._session.get(self._get_executions_url(), params=params)
+            self._last_listing_time = time.time()
+
+            if resp.status_code != 200:
+                # Without the listing it's unknown which executions changed so all the queries
+                # in this interval retrieve the executions. Marker is not advanced so the next
+                # listing covers this interval as well.
+                LOG.warning('Failed to list mistral executions (status code %s): %s',
+                            resp.status_code, resp.text)
+                self._updated_at.clear()
+                return
+
+            executions = resp.json().get('executions', [])
+
+            for execution in executions:
+                updated_at = execution.get('updated_at', None)
+                self._update_marker(updated_at)
+
+                # Only keep track of the executions this querier is interested in
+                if execution.get('id', None) in self._results:
+                    self._updated_at[execution['id']] = updated_at
+
+    def _update_marker(self, updated_at):
+        if updated_at and (not self._updated_at_marker or updated_at > self._updated_at_marker):
+            self._updated_at_marker = updated_at
+
+    def _forget_execution(self, exec_id):
+        self._results.pop(exec_id, None)
+        self._updated_at.pop(exec_id, None)
+
+    def _get_executions_url(self):
+        return self._base_url + '/executions'
+
     def _get_execution_tasks_url(self, exec_id):
         return self._base_url + '/executions/' + exec_id + '/tasks'
 
@@ -84,10 +206,15 @@ class MistralResultsQuerier(Querier):
         :type exec_id: ``str``
         :rtype: (``str``, ``dict``)
         """
+        execution = self._get_execution(exec_id)
+        return self._get_workflow_status_and_output(exec_id, execution)
+
+    def _get_execution(self, exec_id):
         url = self._get_execution_url(exec_id)
-        resp = requests.get(url)
-        execution = resp.json()
+        resp = self._session.get(url)
+        return resp.json()
 
+    def _get_workflow_status_and_output(self, exec_id, execution):
         workflow_state = execution.get('state', None)
 
         if not workflow_state:
@@ -108,7 +235,7 @@ class MistralResultsQuerier(Querier):
         :rtype: ``list``
         """
         url = self._get_execution_tasks_url(exec_id)
-        resp = requests.get(url)
+        resp = self._session.get(url)
         result = resp.json()
         tasks = result.get('tasks', [])
 
@@ -144,4 +271,9 @@ class MistralResultsQuerier(Querier):
 
 
 def get_instance():
-    return MistralResultsQuerier(str(uuid.uuid4()))
+    return MistralResultsQuerier(str(uuid.uuid4()),
+                                 threads_pool_size=cfg.CONF.mistral.query_thread_pool_size,
+                                 query_interval=cfg.CONF.mistral.query_interval,
+                                 max_query_interval=cfg.CONF.mistral.max_query_interval,
+                                 backoff_factor=cfg.CONF.mistral.query_backoff_factor,
+                                 batch_mode=cfg.CONF.mistral.query_batch)
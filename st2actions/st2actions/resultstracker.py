@@ -14,6 +14,7 @@
 # limitations under the License.
 
 from collections import defaultdict
+import hashlib
 
 import eventlet
 import importlib
@@ -25,7 +26,9 @@ import six
 from st2actions.query.base import QueryContext
 from st2common import log as logging
 from st2common.persistence.action import ActionExecutionState
-from st2common.transport import actionexecutionstate, publishers
+from st2common.services.action_metadata_watcher import (setup_metadata_cache,
+                                                        teardown_metadata_cache)
+from st2common.transport import actionexecutionstate, publishers, serialization
 from st2common.util.greenpooldispatch import BufferedDispatcher
 
 LOG = logging.getLogger(__name__)
@@ -34,18 +37,56 @@ ACTIONSTATE_WORK_Q = actionexecutionstate.get_queue('st2.resultstracker.work',
                                                     routing_key=publishers.CREATE_RK)
 
 
+def get_shard(execution_id, shard_count):
+    """
+    Return index of the shard which owns the provided execution. The hash is stable across
+    processes so all the tracker instances agree on the owner.
+
+    Note: This is a plain hash modulo and not consistent hashing, changing the number of shards
+    reassigns most of the executions. That is fine since all the instances are restarted with
+    the new shard count and each instance loads the pending executions of its shard from the
+    database on start.
+
+    :param execution_id: Id of the execution.
+    :type execution_id: ``str``
+
+    :param shard_count: Total number of shards.
+    :type shard_count: ``int``
+
+    :rtype: ``int``
+    """
+    if shard_count <= 1:
+        return 0
+
+    digest = hashlib.md5(str(execution_id).encode('utf-8')).hexdigest()
+    return int(digest, 16) % shard_count
+
+
+def get_work_queue(shard_index=0, shard_count=1):
+    """
+    Return the queue new action execution states are consumed from. When the tracking is
+    sharded, every shard gets its own copy of all the states and only keeps the ones it owns.
+    """
+    if shard_count <= 1:
+        return ACTIONSTATE_WORK_Q
+
+    return actionexecutionstate.get_queue('st2.resultstracker.work.%s' % (shard_index),
+                                          routing_key=publishers.CREATE_RK)
+
+
 class ActionStateQueueConsumer(ConsumerMixin):
-    def __init__(self, connection, tracker):
+    def __init__(self, connection, tracker, queue=ACTIONSTATE_WORK_Q):
         self.connection = connection
         self._dispatcher = BufferedDispatcher()
         self._tracker = tracker
+        self._queue = queue
 
     def shutdown(self):
         self._dispatcher.shutdown()
 
     def get_consumers(self, Consumer, channel):
-        consumer = Consumer(queues=[ACTIONSTATE_WORK_Q],
-                            accept=['pickle'],
+        consumer = Consumer(queues=[self._queue],
+                            accept=serialization.ACCEPT_CONTENT,
                             callbacks=[self.process_task])
         # use prefetch_count=1 for fair dispatch. This way workers that finish an item get the next
         # task and the work does not get queued behind any single large item.
@@ -69,6 +110,11 @@ class ActionStateQueueConsumer(ConsumerMixin):
             LOG.exception('Add query_context failed. Message body : %s', body)
 
     def _add_to_querier(self, body):
+        if not self._tracker.owns(body.execution_id):
+            LOG.debug('Skipping state of execution %s owned by a different shard.',
+                      body.execution_id)
+            return
+
         querier = self._tracker.get_querier(body.query_module)
         context = QueryContext.from_model(body)
         querier.add_queries(query_contexts=[context])
@@ -76,14 +122,32 @@ class ActionStateQueueConsumer(ConsumerMixin):
 
 
 class ResultsTracker(object):
-    def __init__(self, q_connection=None):
-        self._queue_consumer = ActionStateQueueConsumer(q_connection, self)
+    def __init__(self, q_connection=None, shard_index=0, shard_count=1):
+        """
+        :param shard_index: Index of the shard this tracker polls results for.
+        :type shard_index: ``int``
+
+        :param shard_count: Total number of tracker shards. Action execution states are split
+                            between the shards by execution id.
+        :type shard_count: ``int``
+        """
+        if shard_count < 1 or not (0 <= shard_index < shard_count):
+            raise ValueError('Invalid shard index %s for %s shard(s).' %
+                             (shard_index, shard_count))
+
+        self._shard_index = shard_index
+        self._shard_count = shard_count
+        self._queue_consumer = ActionStateQueueConsumer(
+            q_connection, self, queue=get_work_queue(shard_index, shard_count))
         self._consumer_thread = None
         self._queriers = {}
         self._query_threads = []
         self._failed_imports = set()
+        self._metadata_cache_watcher = None
 
     def start(self):
+        self._metadata_cache_watcher = setup_metadata_cache()
+        self._setup_queues()
         self._bootstrap()
         self._consumer_thread = eventlet.spawn(self._queue_consumer.run)
         self._consumer_thread.wait()
@@ -94,18 +158,68 @@ class ResultsTracker(object):
         LOG.info('Tracker shutting down. Stats from queriers:')
         self._print_stats()
         self._queue_consumer.shutdown()
+        teardown_metadata_cache(self._metadata_cache_watcher)
 
     def _print_stats(self):
         for name, querier in six.iteritems(self._queriers):
             if querier:
                 querier.print_stats()
 
+    def _setup_queues(self):
+        """
+        Declare the work queue before the pending states are loaded from the database so no
+        state created in between is missed.
+
+        When the tracking is sharded, the queue of the unsharded tracker is unbound so it doesn't
+        keep accumulating states nobody consumes. States already in that queue are also in the
+        database and are picked up by the bootstrap, so the queue can be deleted.
+        """
+        connection = self._queue_consumer.connection
+        if not connection:
+            return
+
+        channel = connection.channel()
+        try:
+            get_work_queue(self._shard_index, self._shard_count)(channel).declare()
+        finally:
+            channel.close()
+
+        if self._shard_count <= 1:
+            return
+
+        # Separate channel since the broker closes the channel if the queue doesn't exist
+        channel = connection.channel()
+        try:
+            legacy_queue = ACTIONSTATE_WORK_Q(channel)
+            legacy_queue.unbind_from(exchange=legacy_queue.exchange,
+                                     routing_key=legacy_queue.routing_key)
+            LOG.info('Unbound queue %s of the unsharded results tracker.', legacy_queue.name)
+        except Exception:
+            LOG.debug('Failed to unbind queue %s of the unsharded results tracker.',
+                      ACTIONSTATE_WORK_Q.name, exc_info=True)
+        finally:
+            try:
+                channel.close()
+            except Exception:
+                pass
+
+    def owns(self, execution_id):
+        """
+        Return True if results of the provided execution are tracked by this tracker's shard.
+
+        :rtype: ``bool``
+        """
+        return get_shard(execution_id, self._shard_count) == self._shard_index
+
     def _bootstrap(self):
         all_states = ActionExecutionState.get_all()
         LOG.info('Found %d pending states in db.' % len(all_states))
 
         query_contexts_dict = defaultdict(list)
         for state_db in all_states:
+            if not self.owns(state_db.execution_id):
+                continue
+
             try:
                 context = QueryContext.from_model(state_db)
             except:
@@ -143,5 +257,7 @@ class ResultsTracker(object):
 
 def get_tracker():
     with Connection(cfg.CONF.messaging.url) as conn:
-        tracker = ResultsTracker(q_connection=conn)
+        tracker = ResultsTracker(q_connection=conn,
+                                 shard_index=cfg.CONF.resultstracker.shard_index,
+                                 shard_count=cfg.CONF.resultstracker.shard_count)
         return tracker
@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import json
 import eventlet
 import traceback
 import uuid
@@ -21,6 +23,7 @@ import datetime
 from st2actions.runners import ActionRunner
 from st2common import log as logging
 from st2common.constants.action import (LIVEACTION_STATUS_SUCCEEDED, LIVEACTION_STATUS_FAILED)
+from st2common.constants.action import LIVEACTION_COMPLETED_STATES
 from st2common.constants.system import SYSTEM_KV_PREFIX
 from st2common.content.loader import MetaLoader
 from st2common.exceptions import actionrunner as runnerexceptions
@@ -31,6 +34,7 @@ from st2common.models.utils import action_param_utils
 from st2common.persistence.execution import ActionExecution
 from st2common.services import action as action_service
 from st2common.services.keyvalues import KeyValueLookup
+from st2common.services import liveaction_watcher
 from st2common.util import action_db as action_db_util
 from st2common.util import isotime
 from st2common.util import jinja as jinja_utils
@@ -40,11 +44,102 @@ LOG = logging.getLogger(__name__)
 RESULTS_KEY = '__results'
 
 
+class ChainDefinitionCache(object):
+    """
+    Cache of parsed and validated action chain definitions keyed by the definition file path.
+
+    Cached definition is reloaded when the modification time or the size of the file changes.
+    Templates used in the task parameters and publish sections are compiled when a definition is
+    loaded.
+    """
+
+    def __init__(self):
+        # file path -> (file version, chainspec, ActionChain)
+        self._definitions = {}
+        self._meta_loader = MetaLoader()
+        self.hits = 0
+        self.misses = 0
+
+    def get_chainspec(self, file_path):
+        """
+        Retrieve parsed chain definition.
+
+        :rtype: ``dict``
+        """
+        return self._get_definition(file_path=file_path)[1]
+
+    def get_actionchain(self, file_path):
+        """
+        Retrieve validated chain definition.
+
+        :rtype: :class:`actionchain.ActionChain`
+        """
+        version, chainspec, chain = self._get_definition(file_path=file_path)
+
+        if not chain:
+            chain = actionchain.ActionChain(**chainspec)
+            self._compile_templates(chain)
+            self._definitions[file_path] = (version, chainspec, chain)
+
+        return chain
+
+    def clear(self):
+        self._definitions = {}
+
+    def _get_definition(self, file_path):
+        stat = os.stat(file_path)
+        version = (stat.st_mtime, stat.st_size)
+        definition = self._definitions.get(file_path, None)
+
+        if definition and definition[0] == version:
+            self.hits += 1
+            return definition
+
+        self.misses += 1
+        chainspec = self._meta_loader.load(file_path=file_path, expected_type=dict)
+        definition = (version, chainspec, None)
+        self._definitions[file_path] = definition
+        return definition
+
+    @staticmethod
+    def _compile_templates(chain):
+        nodes = list(chain.chain)
+
+        while nodes:
+            node = nodes.pop()
+            nodes.extend(node.parallel or [])
+            values = list((node.params or {}).values()) + list((node.publish or {}).values())
+
+            for value in values:
+                # Same template source as used by jinja_utils.render_values
+                if isinstance(value, (dict, list)):
+                    value = json.dumps(value)
+                else:
+                    value = str(value)
+
+                try:
+                    jinja_utils.get_template(value)
+                except Exception:
+                    # Invalid template is reported when the task is run
+                    pass
+
+
+_CHAIN_DEFINITION_CACHE = ChainDefinitionCache()
+
+
 class ChainHolder(object):
 
     def __init__(self, chainspec, chainname):
-        self.actionchain = actionchain.ActionChain(**chainspec)
+        """
+        :param chainspec: Chain definition.
+        :type chainspec: ``dict`` or :class:`actionchain.ActionChain`
+        """
+        if isinstance(chainspec, actionchain.ActionChain):
+            self.actionchain = chainspec
+        else:
+            self.actionchain = actionchain.ActionChain(**chainspec)
         self.chainname = chainname
+        self._nodes = dict([(node.name, node) for node in self.actionchain.chain])
         if not self.actionchain.default:
             default = self._get_default(self.actionchain)
             self.actionchain.default = default
@@ -92,9 +187,9 @@ class ChainHolder(object):
     def get_node(self, node_name=None, raise_on_failure=False):
         if not node_name:
             return None
-        for node in self.actionchain.chain:
-            if node.name == node_name:
-                return node
+        node = self._nodes.get(node_name, None)
+        if node:
+            return node
         if raise_on_failure:
             raise runnerexceptions.ActionRunnerException('Unable to find node with name "%s".' %
                                                          (node_name))
@@ -116,7 +211,6 @@ class ActionChainRunner(ActionRunner):
     def __init__(self, runner_id):
         super(ActionChainRunner, self).__init__(runner_id=runner_id)
         self.chain_holder = None
-        self._meta_loader = MetaLoader()
 
     def pre_run(self):
         chainspec_file = self.entry_point
@@ -124,8 +218,7 @@ class ActionChainRunner(ActionRunner):
                   self.action)
 
         try:
-            chainspec = self._meta_loader.load(file_path=chainspec_file,
-                                               expected_type=dict)
+            _CHAIN_DEFINITION_CACHE.get_chainspec(file_path=chainspec_file)
         except Exception as e:
             message = ('Failed to parse action chain definition from "%s": %s' %
                        (chainspec_file, str(e)))
@@ -133,7 +226,8 @@ class ActionChainRunner(ActionRunner):
             raise runnerexceptions.ActionRunnerPreRunError(message)
 
         try:
-            self.chain_holder = ChainHolder(chainspec, self.action_name)
+            chain = _CHAIN_DEFINITION_CACHE.get_actionchain(file_path=chainspec_file)
+            self.chain_holder = ChainHolder(chain, self.action_name)
         except Exception as e:
             message = e.message or str(e)
             LOG.exception('Failed to instantiate ActionChain.')
@@ -165,6 +259,34 @@ class ActionChainRunner(ActionRunner):
             resolved_params = None
             liveaction = None
 
+            if action_node.parallel:
+                try:
+                    tasks = self._resolve_parallel_tasks(action_node=action_node,
+                                                         action_parameters=action_parameters,
+                                                         context_result=context_result)
+                except Exception as e:
+                    LOG.exception('Failed to run parallel tasks of "%s".', action_node.name)
+
+                    fail = True
+                    top_level_error = {
+                        'error': str(e),
+                        'traceback': traceback.format_exc(10)
+                    }
+                    break
+
+                succeeded = self._run_parallel_tasks(action_node=action_node, tasks=tasks,
+                                                     action_parameters=action_parameters,
+                                                     context_result=context_result,
+                                                     result=result)
+                fail = not succeeded
+                condition = 'on-success' if succeeded else 'on-failure'
+                action_node, next_node_error = self._get_next_node(action_node=action_node,
+                                                                   condition=condition)
+                if next_node_error:
+                    fail = True
+                    top_level_error = next_node_error
+                continue
+
             created_at = datetime.datetime.now()
 
             try:
@@ -241,27 +363,19 @@ class ActionChainRunner(ActionRunner):
                 task_result = self._format_action_exec_result(**format_kwargs)
                 result['tasks'].append(task_result)
 
-                try:
-                    if not liveaction or liveaction.status == LIVEACTION_STATUS_FAILED:
-                        fail = True
-                        action_node = self.chain_holder.get_next_node(action_node.name,
-                                                                      condition='on-failure')
-                    elif liveaction.status == LIVEACTION_STATUS_SUCCEEDED:
-                        action_node = self.chain_holder.get_next_node(action_node.name,
-                                                                      condition='on-success')
-                except Exception as e:
-                    LOG.exception('Failed to get next node "%s".', action_node.name)
+                next_node_error = None
 
+                if not liveaction or liveaction.status == LIVEACTION_STATUS_FAILED:
                     fail = True
-                    error = ('Failed to get next node "%s". Lookup failed: %s' %
-                            (action_node.name, str(e)))
-                    trace = traceback.format_exc(10)
-                    top_level_error = {
-                        'error': error,
-                        'traceback': trace
-                    }
-                    # reset action_node here so that chain breaks on failure.
-                    action_node = None
+                    action_node, next_node_error = self._get_next_node(action_node=action_node,
+                                                                       condition='on-failure')
+                elif liveaction.status == LIVEACTION_STATUS_SUCCEEDED:
+                    action_node, next_node_error = self._get_next_node(action_node=action_node,
+                                                                       condition='on-success')
+
+                if next_node_error:
+                    fail = True
+                    top_level_error = next_node_error
 
         if fail:
             status = LIVEACTION_STATUS_FAILED
@@ -275,6 +389,121 @@ class ActionChainRunner(ActionRunner):
 
         return (status, result, None)
 
+    def _get_next_node(self, action_node, condition):
+        """
+        Resolve the node which follows the provided node.
+
+        :return: Tuple of the next node (None if there is no next node) and a top level error
+                 (None if the lookup succeeded).
+        :rtype: ``tuple``
+        """
+        try:
+            next_node = self.chain_holder.get_next_node(action_node.name, condition=condition)
+        except Exception as e:
+            LOG.exception('Failed to get next node "%s".', action_node.name)
+
+            error = ('Failed to get next node "%s". Lookup failed: %s' %
+                     (action_node.name, str(e)))
+            trace = traceback.format_exc(10)
+            top_level_error = {
+                'error': error,
+                'traceback': trace
+            }
+            # next node is None so that chain breaks on failure.
+            return None, top_level_error
+
+        return next_node, None
+
+    def _resolve_parallel_tasks(self, action_node, action_parameters, context_result):
+        """
+        Render parameters and verify the referenced action exists for all the parallel tasks of
+        the provided node. Nothing is run if any of the tasks is invalid.
+
+        :return: List of (task node, rendered parameters) tuples.
+        :rtype: ``list``
+        """
+        tasks = []
+
+        for task_node in action_node.parallel:
+            try:
+                resolved_params = ActionChainRunner._resolve_params(
+                    action_node=task_node, original_parameters=action_parameters,
+                    results=context_result, chain_vars=self.chain_holder.vars)
+            except Exception as e:
+                raise Exception('Failed to run task "%s". Parameter rendering failed: %s' %
+                                (task_node.name, str(e)))
+
+            if not action_db_util.get_action_by_ref(ref=task_node.ref):
+                raise Exception('Failed to run task "%s". Action with reference "%s" doesn\'t '
+                                'exist.' % (task_node.name, task_node.ref))
+
+            tasks.append((task_node, resolved_params))
+
+        return tasks
+
+    def _run_parallel_tasks(self, action_node, tasks, action_parameters, context_result, result):
+        """
+        Run the parallel tasks of the provided node concurrently and wait for all of them to
+        complete.
+
+        Result of each task is stored in the context under the task name and under the node name
+        (dictionary keyed by the task name) and each task is reported in the chain result.
+
+        :return: True if all the tasks succeeded.
+        :rtype: ``bool``
+        """
+        pool = eventlet.GreenPool(action_node.concurrency or len(tasks))
+
+        def run_task(task):
+            task_node, params = task
+            liveaction = None
+            error = None
+            created_at = datetime.datetime.now()
+
+            try:
+                liveaction = ActionChainRunner._run_action(
+                    action_node=task_node, parent_execution_id=self.liveaction_id, params=params)
+            except Exception as e:
+                LOG.exception('Failure in running action "%s".', task_node.name)
+
+                error = {
+                    'error': 'Task "%s" failed: %s' % (task_node.name, str(e)),
+                    'traceback': traceback.format_exc(10)
+                }
+
+            return task_node, liveaction, error, created_at, datetime.datetime.now()
+
+        succeeded = True
+        task_results = {}
+
+        # Note: imap preserves the order of the tasks
+        for task_node, liveaction, error, created_at, updated_at in pool.imap(run_task, tasks):
+            task_results[task_node.name] = error if error else liveaction.result
+
+            format_kwargs = {'action_node': task_node, 'liveaction_db': liveaction,
+                             'created_at': created_at, 'updated_at': updated_at}
+
+            if error:
+                format_kwargs['error'] = error
+
+            result['tasks'].append(self._format_action_exec_result(**format_kwargs))
+
+            if error or liveaction.status != LIVEACTION_STATUS_SUCCEEDED:
+                succeeded = False
+
+        context_result.update(task_results)
+        context_result[action_node.name] = task_results
+
+        rendered_publish_vars = ActionChainRunner._render_publish_vars(
+            action_node=action_node, action_parameters=action_parameters,
+            execution_result=task_results, previous_execution_results=context_result,
+            chain_vars=self.chain_holder.vars)
+
+        if rendered_publish_vars:
+            self.chain_holder.vars.update(rendered_publish_vars)
+
+        return succeeded
+
     @staticmethod
     def _render_publish_vars(action_node, action_parameters, execution_result,
                              previous_execution_results, chain_vars):
@@ -324,11 +553,11 @@ class ActionChainRunner(ActionRunner):
         }
 
         liveaction, _ = action_service.schedule(execution)
-        while (wait_for_completion and
-               liveaction.status != LIVEACTION_STATUS_SUCCEEDED and
-               liveaction.status != LIVEACTION_STATUS_FAILED):
-            eventlet.sleep(1)
-            liveaction = action_db_util.get_liveaction_by_id(liveaction.id)
+
+        if wait_for_completion and liveaction.status not in LIVEACTION_COMPLETED_STATES:
+            # Wait for the liveaction update notification instead of polling the database
+            liveaction = liveaction_watcher.wait_for_completion(liveaction_id=liveaction.id)
+
         return liveaction
 
     def _format_action_exec_result(self, action_node, liveaction_db, created_at, updated_at,
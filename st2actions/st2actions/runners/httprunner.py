@@ -19,6 +19,7 @@ import json
 import uuid
 
 import requests
+from requests.adapters import HTTPAdapter
 from oslo.config import cfg
 from six.moves.urllib import parse as urlparse
 
@@ -55,10 +56,88 @@ RESPONSE_BODY_PARSE_FUNCTIONS = {
 }
 
 
+_SESSION_POOL = None
+
+
 def get_runner():
     return HttpRunner(str(uuid.uuid4()))
 
 
+class HTTPSessionPool(object):
+    """
+    Per-process pool of keep-alive connections keyed by the URL scheme and host.
+
+    Only the connections are shared. Each request gets its own session so cookies, auth and other
+    session state never leak between action executions.
+    """
+
+    def __init__(self, pool_size=10, keep_alive=True, max_retries=0):
+        """
+        :param pool_size: Maximum number of connections kept open per scheme and host.
+        :type pool_size: ``int``
+
+        :param keep_alive: False to close the connection after each request.
+        :type keep_alive: ``bool``
+
+        :param max_retries: Number of retries for requests which failed to connect. Requests
+                            which reached the server are never retried.
+        :type max_retries: ``int``
+        """
+        self._pool_size = pool_size
+        self._keep_alive = keep_alive
+        self._max_retries = max_retries
+
+        # (scheme, host) -> HTTPAdapter
+        self._adapters = {}
+
+    def get_session(self, url):
+        """
+        Return a new session which uses the shared connection pool for the provided URL.
+
+        Note: Session shouldn't be closed since that would close the shared connections.
+
+        :rtype: :class:`requests.Session`
+        """
+        parsed = urlparse.urlparse(url)
+        key = (parsed.scheme.lower(), parsed.netloc.lower())
+
+        session = requests.Session()
+        session.mount('%s://' % (key[0]), self._get_adapter(key=key))
+
+        if not self._keep_alive:
+            session.headers['Connection'] = 'close'
+
+        return session
+
+    def _get_adapter(self, key):
+        adapter = self._adapters.get(key, None)
+
+        if not adapter:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_size,
+                                  max_retries=self._max_retries)
+
+            if self._keep_alive:
+                self._adapters[key] = adapter
+
+        return adapter
+
+
+def get_session_pool():
+    """
+    Return the process-wide HTTP session pool.
+
+    :rtype: :class:`HTTPSessionPool`
+    """
+    global _SESSION_POOL
+
+    if not _SESSION_POOL:
+        _SESSION_POOL = HTTPSessionPool(pool_size=cfg.CONF.http_runner.pool_size,
+                                        keep_alive=cfg.CONF.http_runner.keep_alive,
+                                        max_retries=cfg.CONF.http_runner.max_retries)
+
+    return _SESSION_POOL
+
+
 class HttpRunner(ActionRunner):
     def __init__(self, runner_id):
         super(HttpRunner, self).__init__(runner_id=runner_id)
@@ -192,7 +271,9 @@ class HTTPClient(object):
             else:
                 data = self.body
 
-            resp = requests.request(
+            # Note: Connections are reused across requests to the same host
+            session = get_session_pool().get_session(self.url)
+            resp = session.request(
                 self.method,
                 self.url,
                 params=self.params,
@@ -31,6 +31,7 @@ from st2common.constants.action import LIVEACTION_STATUS_SUCCEEDED
 from st2common.constants.action import LIVEACTION_STATUS_FAILED
 from st2common.constants.runners import LOCAL_RUNNER_DEFAULT_ACTION_TIMEOUT
 import st2common.util.jsonify as jsonify
+from st2actions.utils.output import ProcessOutputCapture
 
 __all__ = [
     'get_runner'
@@ -128,6 +129,14 @@ class LocalShellRunner(ActionRunner, ShellRunnerMixin):
                                    stderr=subprocess.PIPE, shell=True, cwd=self._cwd,
                                    env=env, preexec_fn=os.setsid)
 
+        # Output is read incrementally while the process is running and only a bounded amount of
+        # it is retained in memory
+        output_capture = ProcessOutputCapture(process=process,
+                                              max_bytes=cfg.CONF.action_output.max_bytes,
+                                              spool_dir=cfg.CONF.action_output.spool_dir,
+                                              spool_prefix='st2-%s-' % (self.liveaction_id))
+        output_capture.start()
+
         error_holder = {}
 
         def on_timeout_expired(timeout):
@@ -152,7 +161,8 @@ class LocalShellRunner(ActionRunner, ShellRunnerMixin):
 
         timeout_expiry = eventlet.spawn(on_timeout_expired, self._timeout)
 
-        stdout, stderr = process.communicate()
+        stdout, stderr = output_capture.wait()
+        process.wait()
         timeout_expiry.cancel()
         error = error_holder.get('error', None)
         exit_code = process.returncode
@@ -165,6 +175,7 @@ class LocalShellRunner(ActionRunner, ShellRunnerMixin):
             'stdout': stdout,
             'stderr': stderr
         }
+        result.update(output_capture.get_truncation_info())
 
         if error:
             result['error'] = error
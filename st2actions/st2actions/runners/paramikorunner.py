@@ -13,70 +13,193 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import uuid
+import atexit
+
+import eventlet
+from oslo.config import cfg
 
 from st2actions.runners import ActionRunner
+from st2actions.runners.fabricrunner import FabricRunner
 from st2common import log as logging
-from st2common.util.ssh import SSHClient
+from st2common.constants.runners import PARAMIKO_RUNNER_DEFAULT_ACTION_TIMEOUT
+from st2common.constants.runners import PARAMIKO_RUNNER_DEFAULT_CONCURRENCY
+from st2common.constants.runners import PARAMIKO_RUNNER_MAX_IDLE_CONNECTIONS
+from st2common.constants.runners import PARAMIKO_RUNNER_CONNECTION_IDLE_TIMEOUT
+from st2common.exceptions.actionrunner import ActionRunnerPreRunError
 from st2common.models.system.action import ParamikoSSHCommandAction
+from st2common.models.system.action import is_valid_env_var_name
+from st2common.util.ssh import SSHClientCache, get_pkey
+import st2common.util.jsonify as jsonify
+
+__all__ = [
+    'SSHRunner',
+
+    'get_runner'
+]
 
 LOG = logging.getLogger(__name__)
 
+# constants to lookup in runner_parameters.
+RUNNER_HOSTS = 'hosts'
+RUNNER_USERNAME = 'username'
+RUNNER_PASSWORD = 'password'
+RUNNER_PRIVATE_KEY = 'private_key'
+RUNNER_PARALLEL = 'parallel'
+RUNNER_CONCURRENCY = 'concurrency'
+RUNNER_SUDO = 'sudo'
+RUNNER_COMMAND = 'cmd'
+RUNNER_CWD = 'cwd'
+RUNNER_ENV = 'env'
+RUNNER_TIMEOUT = 'timeout'
+
+# Connections are kept open and reused across action executions
+_SSH_CLIENT_CACHE = SSHClientCache(max_size=PARAMIKO_RUNNER_MAX_IDLE_CONNECTIONS,
+                                   max_idle_time=PARAMIKO_RUNNER_CONNECTION_IDLE_TIMEOUT)
+atexit.register(_SSH_CLIENT_CACHE.close)
+
+
+def get_runner():
+    return SSHRunner(str(uuid.uuid4()))
+
 
 class SSHRunner(ActionRunner):
+    """
+    Runner which executes a command on remote hosts over SSH using paramiko.
+
+    Hosts are processed concurrently in green threads so running a command on many hosts takes
+    about as long as the slowest host. Result is a dictionary keyed by host in the same format
+    as the one produced by the Fabric based runner.
+    """
+
     def __init__(self, runner_id):
         super(SSHRunner, self).__init__(runner_id=runner_id)
+        self._hosts = None
+        self._parallel = True
+        self._concurrency = PARAMIKO_RUNNER_DEFAULT_CONCURRENCY
+        self._sudo = False
+        self._username = None
+        self._password = None
+        self._private_key = None
+        self._cwd = None
+        self._env = None
+        self._timeout = None
 
-    def run(self, ssh_action):
-        LOG.info('Executing action via SSHRunner :%s for user: %s.' %
-                 (self.runner_id, ssh_action.get_user()))
-        LOG.info('Action info:: name: %s, Id: %s, command: %s, actual user: %s' % (ssh_action.name,
-                 ssh_action.id, ssh_action.get_command(), ssh_action.get_user()))
-
-        results = {}
-        for host in ssh_action.get_hosts():
-            result = {'succeeded': True, 'failed': False}
-            try:
-                ssh_client = self._get_ssh_client(host, user=ssh_action.get_user(),
-                                                  pkey=ssh_action.get_pkey(),
-                                                  password=ssh_action.get_password())
-
-                result_stdout, result_stderr, ret_code = ssh_client.execute_sync(
-                    ssh_action.get_command(),
-                    sudo=remote_action.is_sudo())
-
-                result['stdout'] = result_stdout
-                result['stderr'] = result_stderr
-                result['return_code'] = ret_code
-
-                if ret_code != 0:
-                    result['succeeded'] = False
-                    result['failed'] = True
-            except Exception as e:
-                LOG.error('Exception: %s performing ssh action: %s', e, ssh_action)
-                result['failed'] = True
-            finally:
-                results[host] = result
-        return (True, None, results)
-
-    def _get_ssh_client(self, host, user=None, pkey=None, password=None):
-        if pkey is not None:
-            return SSHClient(host, user=user, key=pkey)
-        return SSHClient(host, user=user, password=password)
+    def pre_run(self):
+        LOG.debug('Entering SSHRunner.pre_run() for liveaction_id="%s"', self.liveaction_id)
+        hosts = self.runner_parameters.get(RUNNER_HOSTS, '').split(',')
+        self._hosts = [h.strip() for h in hosts if len(h) > 0]
+        if len(self._hosts) < 1:
+            raise ActionRunnerPreRunError('No hosts specified to run action for action %s.',
+                                          self.liveaction_id)
+        self._username = self.runner_parameters.get(RUNNER_USERNAME, None)
+        self._username = self._username or cfg.CONF.system_user.user
+        self._password = self.runner_parameters.get(RUNNER_PASSWORD, None)
+        self._private_key = self.runner_parameters.get(RUNNER_PRIVATE_KEY, None)
+        self._parallel = self.runner_parameters.get(RUNNER_PARALLEL, True)
+        self._concurrency = self.runner_parameters.get(RUNNER_CONCURRENCY,
+                                                       PARAMIKO_RUNNER_DEFAULT_CONCURRENCY)
+        self._sudo = self.runner_parameters.get(RUNNER_SUDO, False) or False
+        self._cwd = self.runner_parameters.get(RUNNER_CWD, None)
+        self._env = self.runner_parameters.get(RUNNER_ENV, {})
+        invalid_names = [name for name in (self._env or {}) if not is_valid_env_var_name(name)]
+        if invalid_names:
+            raise ActionRunnerPreRunError('Invalid environment variable name(s) %s for action %s.'
+                                          % (', '.join(sorted(invalid_names)),
+                                             self.liveaction_id))
+        self._timeout = self.runner_parameters.get(RUNNER_TIMEOUT,
+                                                   PARAMIKO_RUNNER_DEFAULT_ACTION_TIMEOUT)
 
+    def run(self, action_parameters):
+        ssh_action = ParamikoSSHCommandAction(name=self.action_name,
+                                              action_exec_id=str(self.liveaction_id),
+                                              command=self.runner_parameters.get(RUNNER_COMMAND,
+                                                                                 None),
+                                              env_vars=self._get_env_vars(),
+                                              user=self._username,
+                                              password=self._password,
+                                              pkey=self._get_pkey(),
+                                              hosts=self._hosts,
+                                              parallel=self._parallel,
+                                              sudo=self._sudo,
+                                              timeout=self._timeout,
+                                              cwd=self._cwd)
 
-def get_runner():
-    return SSHRunner(str(uuid.uuid4()))
+        result = self._run(ssh_action)
+        status = FabricRunner._get_result_status(result,
+                                                 cfg.CONF.ssh_runner.allow_partial_failure)
+        return (status, result, None)
+
+    def _run(self, ssh_action):
+        LOG.info('Executing action via SSHRunner :%s for user: %s.', self.runner_id,
+                 ssh_action.get_user())
+        LOG.info('Action info:: name: %s, Id: %s, command: %s, actual user: %s', ssh_action.name,
+                 ssh_action.action_exec_id, ssh_action.get_command(), ssh_action.get_user())
+
+        concurrency = self._concurrency if ssh_action.is_parallel() else 1
+        pool = eventlet.GreenPool(max(1, concurrency))
+
+        def run_on_host(host):
+            return host, self._run_on_host(ssh_action=ssh_action, host=host)
+
+        return dict(pool.imap(run_on_host, ssh_action.get_hosts()))
+
+    def _run_on_host(self, ssh_action, host):
+        client_kwargs = {'host': host, 'user': ssh_action.get_user(),
+                         'password': ssh_action.get_password(), 'pkey': ssh_action.get_pkey()}
+
+        ssh_client = None
+
+        try:
+            ssh_client = _SSH_CLIENT_CACHE.acquire_client(**client_kwargs)
+            stdout, stderr, return_code = ssh_client.execute_sync(
+                ssh_action.get_full_command_string(), sudo=ssh_action.is_sudo(),
+                timeout=ssh_action.timeout)
+        except Exception:
+            LOG.exception('Failed executing remote action on host %s.', host)
+            # Connection might be broken, don't reuse it
+            if ssh_client:
+                _SSH_CLIENT_CACHE.discard_client(ssh_client)
+            return ssh_action.get_error_result()
+
+        _SSH_CLIENT_CACHE.release_client(ssh_client, **client_kwargs)
+
+        succeeded = (return_code == 0)
+        result = {
+            'stdout': stdout,
+            'stderr': stderr,
+            'return_code': return_code,
+            'succeeded': succeeded,
+            'failed': not succeeded
+        }
+        return jsonify.json_loads(result, ParamikoSSHCommandAction.KEYS_TO_TRANSFORM)
+
+    def _get_pkey(self):
+        if self._password and not self._private_key:
+            return None
+
+        if self._private_key:
+            return get_pkey(key_material=self._private_key)
+
+        ssh_key_file = cfg.CONF.system_user.ssh_key_file
+        ssh_key_file = os.path.expanduser(ssh_key_file) if ssh_key_file else None
+
+        if ssh_key_file and os.path.exists(ssh_key_file):
+            return get_pkey(key_file=ssh_key_file)
+
+        return None
+
+    def _get_env_vars(self):
+        """
+        :rtype: ``dict``
+        """
+        env_vars = {}
+
+        if self.auth_token:
+            env_vars['st2_auth_token'] = self.auth_token.token
+
+        if self._env:
+            env_vars.update(self._env)
 
-# XXX: Write proper tests.
-if __name__ == '__main__':
-    print('!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!')
-    print('!!!!!!!!!!!!!!!!!!!!! NORMAL CMD !!!!!!!!!!!!!!!!!!!!!!!!!!')
-    print('!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!')
-    runner = SSHRunner(str(uuid.uuid4()))
-    remote_action = ParamikoSSHCommandAction('UNAME', 'action_exec_id' + str(uuid.uuid4()),
-                                             'unam -a', 'lakshmi',
-                                             hosts=['54.191.85.86', '54.200.102.55'],
-                                             sudo=True)
-    results = runner.run(remote_action)
-    print(results)
+        return env_vars
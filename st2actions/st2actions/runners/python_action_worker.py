@@ -0,0 +1,225 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import copy
+import json
+import argparse
+import traceback
+
+from six.moves import StringIO
+
+from st2common import log as logging
+from st2actions import config
+from st2actions.runners.pythonrunner import Action
+from st2common.util import loader as action_loader
+from st2common.util.config_parser import ContentPackConfigParser
+
+__all__ = [
+    'PythonActionWorker'
+]
+
+LOG = logging.getLogger(__name__)
+
+
+class PythonActionWorker(object):
+    """
+    Long running process which executes Python actions of a single pack.
+
+    Requests are read from stdin and responses are written to stdout, one JSON document per
+    line. Action classes and pack configs are cached between requests and reloaded when the
+    corresponding file changes.
+
+    Request: {"file_path": ..., "parameters": {...}, "env": {...}}
+    Response: {"stdout": ..., "stderr": ..., "exit_code": ..., "result": ...}
+    """
+
+    def __init__(self, pack, max_requests=0, parent_args=None):
+        """
+        :param pack: Name of the pack this worker runs actions for.
+        :type pack: ``str``
+
+        :param max_requests: Number of requests after which the worker exits. 0 means no limit.
+        :type max_requests: ``int``
+
+        :param parent_args: Command line arguments passed to the parent process.
+        :type parse_args: ``list``
+        """
+        self._pack = pack
+        self._max_requests = max_requests
+        self._parent_args = parent_args or []
+
+        # file path -> (mtime, action class)
+        self._action_classes = {}
+        # config path -> (mtime, config)
+        self._configs = {}
+        self._config_parser = None
+
+        # Parent arguments are not always valid config arguments (e.g. when the parent is a
+        # test runner) and argparse exits in that case
+        try:
+            config.parse_args(args=self._parent_args)
+        except (Exception, SystemExit):
+            pass
+
+    def run(self):
+        # Anything which is written directly to the stdout file descriptor (e.g. by a child
+        # process) would corrupt the responses so the original descriptors are only used for the
+        # communication with the parent and stdout is redirected to stderr.
+        requests = os.fdopen(os.dup(sys.stdin.fileno()), 'r')
+        responses = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, sys.stdin.fileno())
+        os.close(devnull)
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+        handled = 0
+
+        for line in iter(requests.readline, ''):
+            request = json.loads(line)
+            response = self.handle_request(file_path=request['file_path'],
+                                           parameters=request.get('parameters', None),
+                                           env=request.get('env', None))
+            responses.write(json.dumps(response) + '\n')
+            responses.flush()
+
+            handled += 1
+            if self._max_requests and handled >= self._max_requests:
+                LOG.debug('Worker handled %s requests, exiting.', handled)
+                break
+
+    def handle_request(self, file_path, parameters=None, env=None):
+        """
+        Run the action and capture its output.
+
+        :rtype: ``dict``
+        """
+        stdout, stderr = StringIO(), StringIO()
+        original_stdout, original_stderr = sys.stdout, sys.stderr
+        original_env = os.environ.copy()
+
+        exit_code = 0
+        result = None
+        action = None
+
+        sys.stdout, sys.stderr = stdout, stderr
+        os.environ.update(env or {})
+
+        try:
+            action = self._get_action_instance(file_path=file_path)
+            result = action.run(**(parameters or {}))
+        except SystemExit as e:
+            # Same semantics as the exit status of an interpreter which calls sys.exit()
+            if e.code is None:
+                exit_code = 0
+            elif isinstance(e.code, int):
+                exit_code = e.code
+            else:
+                exit_code = 1
+                stderr.write('%s\n' % (e.code))
+        except Exception:
+            exit_code = 1
+            traceback.print_exc(file=stderr)
+        finally:
+            sys.stdout, sys.stderr = original_stdout, original_stderr
+            os.environ.clear()
+            os.environ.update(original_env)
+
+            # Each action instance adds a handler to the (shared) action logger
+            if action:
+                for handler in list(action.logger.handlers):
+                    action.logger.removeHandler(handler)
+
+        try:
+            json.dumps(result)
+        except Exception:
+            result = str(result)
+
+        return {
+            'stdout': stdout.getvalue(),
+            'stderr': stderr.getvalue(),
+            'exit_code': exit_code,
+            'result': result
+        }
+
+    def _get_action_instance(self, file_path):
+        action_cls = self._get_action_class(file_path=file_path)
+        action_config = self._get_action_config(file_path=file_path)
+
+        return action_cls(config=action_config)
+
+    def _get_action_class(self, file_path):
+        mtime = os.path.getmtime(file_path)
+        cached = self._action_classes.get(file_path, None)
+
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        # Module is imported by name so make sure a stale module or a module with the same name
+        # from a different directory is not picked up
+        module_name = os.path.splitext(os.path.basename(file_path))[0]
+        sys.modules.pop(module_name, None)
+
+        actions_cls = action_loader.register_plugin(Action, file_path)
+        action_cls = actions_cls[0] if actions_cls and len(actions_cls) > 0 else None
+
+        if not action_cls:
+            raise Exception('File "%s" has no action or the file doesn\'t exist.' % (file_path))
+
+        self._action_classes[file_path] = (mtime, action_cls)
+        return action_cls
+
+    def _get_action_config(self, file_path):
+        if not self._config_parser:
+            self._config_parser = ContentPackConfigParser(pack_name=self._pack)
+
+        config_path = self._config_parser.get_global_config_path()
+
+        if not config_path or not os.path.isfile(config_path):
+            LOG.info('No config found for action "%s"' % (file_path))
+            return {}
+
+        mtime = os.path.getmtime(config_path)
+        cached = self._configs.get(config_path, None)
+
+        # Actions can modify the config they get so each one gets its own copy
+        if cached and cached[0] == mtime:
+            return copy.deepcopy(cached[1])
+
+        action_config = self._config_parser.get_and_parse_config(config_path=config_path)
+        action_config = action_config.config if action_config else {}
+        self._configs[config_path] = (mtime, action_config)
+        return copy.deepcopy(action_config)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Python action runner worker process')
+    parser.add_argument('--pack', required=True,
+                        help='Name of the pack this worker runs actions for')
+    parser.add_argument('--max-requests', required=False, type=int, default=0,
+                        help='Number of requests after which the worker exits')
+    parser.add_argument('--parent-args', required=False,
+                        help='Command line arguments passed to the parent process')
+    args = parser.parse_args()
+
+    parent_args = json.loads(args.parent_args) if args.parent_args else []
+    assert isinstance(parent_args, list)
+
+    worker = PythonActionWorker(pack=args.pack,
+                                max_requests=args.max_requests,
+                                parent_args=parent_args)
+    worker.run()
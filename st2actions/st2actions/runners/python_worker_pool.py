@@ -0,0 +1,242 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import json
+
+import eventlet
+from eventlet.green import subprocess
+from oslo.config import cfg
+
+from st2common import log as logging
+
+__all__ = [
+    'PythonActionWorkerPool',
+
+    'get_worker_pool',
+    'shutdown_worker_pool'
+]
+
+LOG = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKER_SCRIPT_NAME = 'python_action_worker.py'
+WORKER_SCRIPT_PATH = os.path.join(BASE_DIR, WORKER_SCRIPT_NAME)
+
+_WORKER_POOL = None
+
+
+class PythonActionWorkerProcess(object):
+    """
+    Handle for a single long running Python action worker process.
+    """
+
+    def __init__(self, pack, python_path, env, max_requests=0):
+        args = [
+            python_path,
+            WORKER_SCRIPT_PATH,
+            '--pack=%s' % (pack),
+            '--max-requests=%s' % (max_requests),
+            '--parent-args=%s' % (json.dumps(sys.argv[1:]))
+        ]
+
+        self.requests = 0
+        self.max_requests = max_requests
+        self.process = subprocess.Popen(args=args, stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, shell=False, env=env)
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def is_recyclable(self):
+        if self.max_requests and self.requests >= self.max_requests:
+            return False
+
+        return self.is_alive()
+
+    def execute(self, file_path, parameters, env, timeout=None):
+        """
+        Run the action inside the worker and wait for the response.
+
+        :raises: :class:`eventlet.Timeout` if no response is received in ``timeout`` seconds.
+        """
+        request = {
+            'file_path': file_path,
+            'parameters': parameters,
+            'env': env
+        }
+
+        self.requests += 1
+        self.process.stdin.write(json.dumps(request) + '\n')
+        self.process.stdin.flush()
+
+        with eventlet.Timeout(timeout):
+            line = self.process.stdout.readline()
+
+        if not line:
+            # Worker died while running the action (e.g. the action called os._exit())
+            return {
+                'stdout': '',
+                'stderr': 'Python action worker exited unexpectedly.',
+                'exit_code': self.process.wait(),
+                'result': None
+            }
+
+        return json.loads(line)
+
+    def stop(self):
+        if not self.is_alive():
+            return
+
+        # Worker exits once there are no more requests
+        try:
+            self.process.stdin.close()
+        except Exception:
+            pass
+
+        eventlet.spawn_n(self.process.wait)
+
+    def kill(self):
+        if not self.is_alive():
+            return
+
+        try:
+            self.process.kill()
+            self.process.wait()
+        except OSError:
+            pass
+
+
+class PythonActionWorkerPool(object):
+    """
+    Pool of long running Python action worker processes. Workers are kept per pack since each
+    pack uses its own virtualenv.
+    """
+
+    def __init__(self, pool_size, max_requests=0):
+        """
+        :param pool_size: Maximum number of idle workers kept per pack.
+        :type pool_size: ``int``
+
+        :param max_requests: Number of requests after which a worker is replaced. 0 means no
+                             limit.
+        :type max_requests: ``int``
+        """
+        self._pool_size = pool_size
+        self._max_requests = max_requests
+
+        # (pack, python path) -> list of idle workers
+        self._idle_workers = {}
+        # Workers which are running an action
+        self._busy_workers = set()
+
+    def execute(self, pack, python_path, worker_env, file_path, parameters=None, env=None,
+                timeout=None):
+        """
+        Run the action in an idle worker for the provided pack. New worker is started if there is
+        no idle worker available.
+
+        :param worker_env: Environment used when starting a new worker process.
+        :type worker_env: ``dict``
+
+        :param env: Environment variables which are only set for this action run.
+        :type env: ``dict``
+
+        :return: Response with stdout, stderr, exit_code and result.
+        :rtype: ``dict``
+
+        :raises: :class:`eventlet.Timeout` if the action doesn't finish in ``timeout`` seconds.
+        """
+        key = (pack, python_path)
+        worker = self._acquire(key=key, worker_env=worker_env)
+        self._busy_workers.add(worker)
+
+        try:
+            response = worker.execute(file_path=file_path, parameters=parameters, env=env,
+                                      timeout=timeout)
+        except (Exception, eventlet.Timeout):
+            # Worker is in an unknown state (e.g. still running the action which timed out)
+            worker.kill()
+            raise
+        finally:
+            self._busy_workers.discard(worker)
+
+        self._release(key=key, worker=worker)
+        return response
+
+    def shutdown(self):
+        """
+        Stop all the idle workers and kill the ones which are still running an action.
+        """
+        for workers in self._idle_workers.values():
+            for worker in workers:
+                worker.stop()
+
+        for worker in self._busy_workers:
+            worker.kill()
+
+        self._idle_workers = {}
+        self._busy_workers = set()
+
+    def _acquire(self, key, worker_env):
+        workers = self._idle_workers.get(key, [])
+
+        while workers:
+            worker = workers.pop()
+
+            if worker.is_alive():
+                return worker
+
+        LOG.debug('Starting new Python action worker for pack "%s".', key[0])
+        return PythonActionWorkerProcess(pack=key[0], python_path=key[1], env=worker_env,
+                                         max_requests=self._max_requests)
+
+    def _release(self, key, worker):
+        workers = self._idle_workers.setdefault(key, [])
+
+        if not worker.is_recyclable() or len(workers) >= self._pool_size:
+            worker.stop()
+            return
+
+        workers.append(worker)
+
+
+def get_worker_pool():
+    """
+    Return the process-wide Python action worker pool.
+
+    :rtype: :class:`PythonActionWorkerPool`
+    """
+    global _WORKER_POOL
+
+    if not _WORKER_POOL:
+        _WORKER_POOL = PythonActionWorkerPool(
+            pool_size=cfg.CONF.python_runner.worker_pool_size,
+            max_requests=cfg.CONF.python_runner.worker_max_requests)
+
+    return _WORKER_POOL
+
+
+def shutdown_worker_pool():
+    """
+    Shut down the process-wide Python action worker pool (if it has been created) so no worker
+    processes are left behind when the process exits.
+    """
+    global _WORKER_POOL
+
+    if _WORKER_POOL:
+        _WORKER_POOL.shutdown()
+        _WORKER_POOL = None
@@ -21,9 +21,13 @@ import uuid
 import logging as stdlib_logging
 
 import six
+import eventlet
 from eventlet.green import subprocess
+from oslo.config import cfg
 
 from st2actions.runners import ActionRunner
+from st2actions.utils.output import BoundedOutputBuffer, ProcessOutputCapture
+from st2actions.utils.output import get_truncation_info
 from st2common import log as logging
 from st2common.constants.action import ACTION_OUTPUT_RESULT_DELIMITER
 from st2common.constants.action import LIVEACTION_STATUS_SUCCEEDED, LIVEACTION_STATUS_FAILED
@@ -33,6 +37,7 @@ from st2common.util.sandboxing import get_sandbox_python_path
 from st2common.util.sandboxing import get_sandbox_python_binary_path
 from st2common.util.sandboxing import get_sandbox_virtualenv_path
 from st2common.constants.runners import PYTHON_RUNNER_DEFAULT_ACTION_TIMEOUT
+from st2actions.runners.python_worker_pool import get_worker_pool
 
 LOG = logging.getLogger(__name__)
 
@@ -118,15 +123,6 @@ class PythonRunner(ActionRunner):
         if not self.entry_point:
             raise Exception('Action "%s" is missing entry_point attribute' % (self.action.name))
 
-        args = [
-            python_path,
-            WRAPPER_SCRIPT_PATH,
-            '--pack=%s' % (pack),
-            '--file-path=%s' % (self.entry_point),
-            '--parameters=%s' % (serialized_parameters),
-            '--parent-args=%s' % (json.dumps(sys.argv[1:]))
-        ]
-
         # We need to ensure all the st2 dependencies are also available to the
         # subprocess
         env = os.environ.copy()
@@ -135,13 +131,37 @@ class PythonRunner(ActionRunner):
 
         # Include user provided environment variables (if any)
         user_env_vars = self._get_env_vars()
+
+        if cfg.CONF.python_runner.worker_pool_enable:
+            return self._run_in_worker_pool(pack=pack, python_path=python_path, worker_env=env,
+                                            env=user_env_vars,
+                                            action_parameters=action_parameters)
+
         env.update(user_env_vars)
 
+        args = [
+            python_path,
+            WRAPPER_SCRIPT_PATH,
+            '--pack=%s' % (pack),
+            '--file-path=%s' % (self.entry_point),
+            '--parameters=%s' % (serialized_parameters),
+            '--parent-args=%s' % (json.dumps(sys.argv[1:]))
+        ]
+
         # Note: We are using eventlet friendly implementation of subprocess
         # which uses GreenPipe so it doesn't block
         process = subprocess.Popen(args=args, stdin=None, stdout=subprocess.PIPE,
                                    stderr=subprocess.PIPE, shell=False, env=env)
 
+        # Output needs to be read while waiting for the process to finish, otherwise an action
+        # which writes more than the pipe buffer size blocks until it times out
+        output_capture = ProcessOutputCapture(process=process,
+                                              max_bytes=cfg.CONF.action_output.max_bytes,
+                                              spool_dir=cfg.CONF.action_output.spool_dir,
+                                              spool_prefix='st2-%s-' % (self.liveaction_id),
+                                              result_delimiter=ACTION_OUTPUT_RESULT_DELIMITER)
+        output_capture.start()
+
         try:
             exit_code = process.wait(timeout=self._timeout)
         except subprocess.TimeoutExpired:
@@ -153,28 +173,67 @@ class PythonRunner(ActionRunner):
         else:
             error = None
 
-        stdout, stderr = process.communicate()
-        exit_code = process.returncode
+        stdout, stderr = output_capture.wait()
+        exit_code = process.wait()
 
-        if ACTION_OUTPUT_RESULT_DELIMITER in stdout:
-            split = stdout.split(ACTION_OUTPUT_RESULT_DELIMITER)
-            assert len(split) == 3
-            result = split[1].strip()
-            stdout = split[0] + split[2]
-        else:
-            result = None
+        # Result is separated from stdout while the output is read so it's retained in full
+        # even if the rest of the output has been truncated
+        result = output_capture.result
+
+        if result is not None:
+            result = result.strip()
 
         try:
             result = json.loads(result)
         except:
             pass
 
+        return self._get_result(stdout=stdout, stderr=stderr, exit_code=exit_code,
+                                result=result, error=error,
+                                truncation_info=output_capture.get_truncation_info())
+
+    def _run_in_worker_pool(self, pack, python_path, worker_env, env, action_parameters):
+        """
+        Run the action inside one of the long running worker processes for the pack.
+        """
+        worker_pool = get_worker_pool()
+
+        try:
+            response = worker_pool.execute(pack=pack, python_path=python_path,
+                                           worker_env=worker_env, file_path=self.entry_point,
+                                           parameters=action_parameters, env=env,
+                                           timeout=self._timeout)
+        except eventlet.Timeout:
+            # Worker running the action has been killed
+            response = {'stdout': '', 'stderr': '', 'exit_code': -9, 'result': None}
+            error = 'Action failed to complete in %s seconds' % (self._timeout)
+        else:
+            error = None
+
+        stdout = BoundedOutputBuffer(max_bytes=cfg.CONF.action_output.max_bytes,
+                                     spool_dir=cfg.CONF.action_output.spool_dir,
+                                     spool_prefix='st2-%s-stdout-' % (self.liveaction_id))
+        stderr = BoundedOutputBuffer(max_bytes=cfg.CONF.action_output.max_bytes,
+                                     spool_dir=cfg.CONF.action_output.spool_dir,
+                                     spool_prefix='st2-%s-stderr-' % (self.liveaction_id))
+
+        for output, value in [(stdout, response['stdout']), (stderr, response['stderr'])]:
+            output.write(value)
+            output.close()
+
+        return self._get_result(stdout=stdout.getvalue(), stderr=stderr.getvalue(),
+                                exit_code=response['exit_code'], result=response['result'],
+                                error=error,
+                                truncation_info=get_truncation_info(stdout=stdout, stderr=stderr))
+
+    def _get_result(self, stdout, stderr, exit_code, result, error=None, truncation_info=None):
         output = {
             'stdout': stdout,
             'stderr': stderr,
             'exit_code': exit_code,
             'result': result
         }
+        output.update(truncation_info or {})
 
         if error:
             output['error'] = error
@@ -0,0 +1,415 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+from collections import deque
+
+import eventlet
+
+from st2common import log as logging
+
+__all__ = [
+    'BoundedOutputBuffer',
+    'DelimitedResultExtractor',
+    'ProcessOutputCapture',
+
+    'get_truncation_info'
+]
+
+LOG = logging.getLogger(__name__)
+
+# Size of the chunks in which the process output is read
+READ_CHUNK_SIZE = 4096
+
+TRUNCATED_MARKER = '\n... [%s bytes truncated] ...\n'
+
+
+class BoundedOutputBuffer(object):
+    """
+    Buffer which holds at most ``max_bytes`` of the written data.
+
+    Once the limit is exceeded only the beginning (head) and the end (tail) of the data is
+    retained and, if ``spool_dir`` is provided, the complete data is written to a file in that
+    directory.
+    """
+
+    def __init__(self, max_bytes, spool_dir=None, spool_prefix='st2-output-'):
+        """
+        :param max_bytes: Maximum number of bytes to retain in memory. 0 means no limit.
+        :type max_bytes: ``int``
+
+        :param spool_dir: Directory where the complete output is written once it exceeds the
+                          limit. If not provided, the output is not spooled.
+        :type spool_dir: ``str``
+
+        :param spool_prefix: Prefix for the name of the spool file.
+        :type spool_prefix: ``str``
+        """
+        self.max_bytes = max_bytes
+        self.spool_dir = spool_dir
+        self.spool_prefix = spool_prefix
+        self.spool_path = None
+        self.total_bytes = 0
+
+        self._head_size = max_bytes // 2
+        self._tail_size = max_bytes - self._head_size
+
+        self._chunks = []
+        self._head = None
+        self._tail = deque()
+        self._tail_bytes = 0
+        self._spool_file = None
+
+    @property
+    def truncated(self):
+        return self._head is not None
+
+    def write(self, data):
+        if not data:
+            return
+
+        self.total_bytes += len(data)
+
+        if self._spool_file:
+            self._write_spool(data)
+
+        if not self.truncated:
+            self._chunks.append(data)
+
+            if self.max_bytes <= 0 or self.total_bytes <= self.max_bytes:
+                return
+
+            value = b''.join(self._chunks)
+            self._chunks = []
+            self._head = value[:self._head_size]
+            self._append_tail(value[self._head_size:])
+            self._start_spool(value)
+            return
+
+        self._append_tail(data)
+
+    def getvalue(self):
+        """
+        Return the retained data. If the data has been truncated, head and tail are separated
+        by a marker with the number of omitted bytes.
+
+        :rtype: ``str``
+        """
+        if not self.truncated:
+            return b''.join(self._chunks)
+
+        # Head and tail are cut on character boundaries so multi-byte UTF-8 characters which
+        # span the cut point don't result in a value which can't be decoded (and stored).
+        head = _strip_incomplete_utf8_end(self._head)
+        tail = b''.join(self._tail)
+        tail = _strip_incomplete_utf8_start(tail[len(tail) - self._tail_size:])
+        omitted = self.total_bytes - len(head) - len(tail)
+        return head + TRUNCATED_MARKER % (omitted) + tail
+
+    def close(self):
+        if self._spool_file:
+            self._spool_file.close()
+            self._spool_file = None
+
+    def _append_tail(self, data):
+        self._tail.append(data)
+        self._tail_bytes += len(data)
+
+        # Only drop chunks which lie completely outside of the tail window
+        while self._tail and self._tail_bytes - len(self._tail[0]) >= self._tail_size:
+            self._tail_bytes -= len(self._tail.popleft())
+
+    def _start_spool(self, data):
+        if not self.spool_dir:
+            LOG.debug('Output exceeds %s bytes and has been truncated. Complete output is not '
+                      'retained since action_output.spool_dir is not set.', self.max_bytes)
+            return
+
+        try:
+            fd, self.spool_path = tempfile.mkstemp(prefix=self.spool_prefix, suffix='.log',
+                                                   dir=self.spool_dir)
+            self._spool_file = os.fdopen(fd, 'wb')
+        except (IOError, OSError):
+            LOG.exception('Failed to create output spool file in "%s".', self.spool_dir)
+            self.spool_path = None
+            return
+
+        self._write_spool(data)
+
+    def _write_spool(self, data):
+        try:
+            self._spool_file.write(data)
+        except (IOError, OSError):
+            LOG.exception('Failed to write to output spool file "%s".', self.spool_path)
+            self.close()
+
+
+class DelimitedResultExtractor(object):
+    """
+    Separates a block enclosed in delimiters from the rest of a stream which is read in chunks.
+
+    The block is removed from the stream before the stream reaches a bounded buffer so it is
+    retained in full even if the surrounding output is truncated.
+    """
+
+    def __init__(self, delimiter):
+        """
+        :param delimiter: Delimiter which marks the beginning and the end of the block.
+        :type delimiter: ``str``
+        """
+        self.delimiter = delimiter
+        self.result = None
+
+        # Data at the end of the last chunk which could be the beginning of a delimiter
+        self._pending = b''
+        # Chunks of the block which is being read, None when outside of the block
+        self._result_chunks = None
+        self._done = False
+
+    def feed(self, data):
+        """
+        Process a chunk of the stream.
+
+        :return: Data which is not part of the delimited block.
+        :rtype: ``str``
+        """
+        if self._done:
+            return data
+
+        data = self._pending + data
+        self._pending = b''
+        output = []
+
+        while data:
+            index = data.find(self.delimiter)
+
+            if index == -1:
+                pending_length = self._get_partial_delimiter_length(data)
+                value = data[:len(data) - pending_length]
+                self._pending = data[len(data) - pending_length:]
+
+                if self._result_chunks is None:
+                    output.append(value)
+                else:
+                    self._result_chunks.append(value)
+                break
+
+            if self._result_chunks is None:
+                output.append(data[:index])
+                self._result_chunks = []
+                data = data[index + len(self.delimiter):]
+                continue
+
+            self._result_chunks.append(data[:index])
+            self.result = b''.join(self._result_chunks)
+            self._result_chunks = None
+            self._done = True
+            output.append(data[index + len(self.delimiter):])
+            break
+
+        return b''.join(output)
+
+    def flush(self):
+        """
+        Return the remaining data once the stream has been closed. A block which has not been
+        closed by a delimiter is returned as regular data.
+
+        :rtype: ``str``
+        """
+        data = self._pending
+        self._pending = b''
+
+        if self._result_chunks is not None:
+            data = self.delimiter + b''.join(self._result_chunks) + data
+            self._result_chunks = None
+
+        return data
+
+    def _get_partial_delimiter_length(self, data):
+        for length in range(min(len(self.delimiter) - 1, len(data)), 0, -1):
+            if data.endswith(self.delimiter[:length]):
+                return length
+
+        return 0
+
+
+class ProcessOutputCapture(object):
+    """
+    Reads stdout and stderr of a process incrementally in green threads into bounded buffers.
+
+    Reading both pipes while the process is running means a process which writes more than the
+    pipe buffer size never blocks on a write.
+    """
+
+    def __init__(self, process, max_bytes, spool_dir=None, spool_prefix='st2-',
+                 result_delimiter=None):
+        """
+        :param process: Process started with stdout and stderr set to ``subprocess.PIPE``.
+        :type process: :class:`subprocess.Popen`
+
+        :param max_bytes: Maximum number of bytes to retain per stream. 0 means no limit.
+        :type max_bytes: ``int``
+
+        :param spool_dir: Directory where oversized output is spooled.
+        :type spool_dir: ``str``
+
+        :param result_delimiter: If provided, the block of stdout enclosed in this delimiter is
+                                 removed from the output before truncation and is available as
+                                 ``result``.
+        :type result_delimiter: ``str``
+        """
+        self._process = process
+        self._result_extractor = None
+
+        if result_delimiter:
+            self._result_extractor = DelimitedResultExtractor(delimiter=result_delimiter)
+
+        self.stdout = BoundedOutputBuffer(max_bytes=max_bytes, spool_dir=spool_dir,
+                                          spool_prefix='%sstdout-' % (spool_prefix))
+        self.stderr = BoundedOutputBuffer(max_bytes=max_bytes, spool_dir=spool_dir,
+                                          spool_prefix='%sstderr-' % (spool_prefix))
+        self._readers = []
+
+    @property
+    def result(self):
+        """
+        Delimited result block read from stdout or None if there was no (complete) block.
+        """
+        if not self._result_extractor:
+            return None
+
+        return self._result_extractor.result
+
+    def start(self):
+        self._readers = [
+            eventlet.spawn(self._read_stream, self._process.stdout, self.stdout,
+                           self._result_extractor),
+            eventlet.spawn(self._read_stream, self._process.stderr, self.stderr)
+        ]
+
+    def wait(self):
+        """
+        Wait until both streams are closed.
+
+        :return: Tuple with the retained stdout and stderr.
+        :rtype: ``tuple`` of (``str``, ``str``)
+        """
+        for reader in self._readers:
+            reader.wait()
+
+        self._readers = []
+        return (self.stdout.getvalue(), self.stderr.getvalue())
+
+    def get_truncation_info(self):
+        """
+        Return result attributes which describe which streams were truncated.
+
+        :rtype: ``dict``
+        """
+        return get_truncation_info(stdout=self.stdout, stderr=self.stderr)
+
+    @staticmethod
+    def _read_stream(stream, output, result_extractor=None):
+        try:
+            while True:
+                data = stream.read(READ_CHUNK_SIZE)
+
+                if not data:
+                    break
+
+                if result_extractor:
+                    data = result_extractor.feed(data)
+
+                output.write(data)
+
+            if result_extractor:
+                output.write(result_extractor.flush())
+        except Exception:
+            LOG.exception('Failed to read process output.')
+        finally:
+            output.close()
+            stream.close()
+
+
+def _is_utf8_continuation_byte(byte):
+    return byte & 0xC0 == 0x80
+
+
+def _get_utf8_sequence_length(byte):
+    if byte & 0xE0 == 0xC0:
+        return 2
+    elif byte & 0xF0 == 0xE0:
+        return 3
+    elif byte & 0xF8 == 0xF0:
+        return 4
+    return 1
+
+
+def _strip_incomplete_utf8_end(data):
+    """
+    Remove a multi-byte UTF-8 character which has been cut off at the end of the data.
+    """
+    data_bytes = bytearray(data[-4:])
+
+    for index in range(len(data_bytes) - 1, -1, -1):
+        byte = data_bytes[index]
+
+        if _is_utf8_continuation_byte(byte):
+            continue
+
+        if _get_utf8_sequence_length(byte) > len(data_bytes) - index:
+            return data[:len(data) - (len(data_bytes) - index)]
+        break
+
+    return data
+
+
+def _strip_incomplete_utf8_start(data):
+    """
+    Remove the continuation bytes of a multi-byte UTF-8 character which has been cut off at the
+    beginning of the data.
+    """
+    data_bytes = bytearray(data[:3])
+    index = 0
+
+    while index < len(data_bytes) and _is_utf8_continuation_byte(data_bytes[index]):
+        index += 1
+
+    return data[index:]
+
+
+def get_truncation_info(stdout, stderr):
+    """
+    Return result attributes which describe which of the provided output buffers were truncated.
+
+    :type stdout: :class:`BoundedOutputBuffer`
+    :type stderr: :class:`BoundedOutputBuffer`
+
+    :rtype: ``dict``
+    """
+    info = {}
+
+    for name, output in [('stdout', stdout), ('stderr', stderr)]:
+        if not output.truncated:
+            continue
+
+        info['%s_truncated' % (name)] = True
+        info['%s_size' % (name)] = output.total_bytes
+
+        if output.spool_path:
+            info['%s_path' % (name)] = output.spool_path
+
+    return info
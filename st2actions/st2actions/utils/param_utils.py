@@ -25,6 +25,7 @@ from st2common.exceptions import actionrunner
 from st2common.services.keyvalues import KeyValueLookup
 from st2common.util.casts import get_cast
 from st2common.util.compat import to_unicode
+from st2common.util import jinja as jinja_utils
 
 
 LOG = logging.getLogger(__name__)
@@ -163,23 +164,10 @@ def _check_availability(param, param_dependencies, renderable_params, context):
     return True
 
 
-def _check_cyclic(dep_chain, dependencies):
-    last_idx = len(dep_chain) - 1
-    last_value = dep_chain[last_idx]
-    for dependency in dependencies.get(last_value, []):
-        if dependency in dep_chain:
-            dep_chain.append(dependency)
-            return False
-        dep_chain.append(dependency)
-        if not _check_cyclic(dep_chain, dependencies):
-            return False
-        dep_chain.pop()
-    return True
-
-
-def _validate_dependencies(renderable_params, context):
+def _get_render_order(renderable_params, context):
     '''
-    Validates dependencies between the parameters.
+    Validates dependencies between the parameters and returns the keys of renderable_params
+    ordered so that every parameter comes after all the parameters it depends on.
     e.g.
     {
         'a': '{{b}}',
@@ -198,66 +186,52 @@ def _validate_dependencies(renderable_params, context):
         if not _check_availability(k, v, renderable_params, context):
             msg = 'Dependecy unsatisfied - %s: %s.' % (k, v)
             raise actionrunner.ActionRunnerException(msg)
-        dep_chain = []
-        dep_chain.append(k)
-        if not _check_cyclic(dep_chain, dependencies):
-            msg = 'Cyclic dependecy found - %s.' % dep_chain
-            raise actionrunner.ActionRunnerException(msg)
+
+    render_order = []
+    visited = set()
+
+    def visit(dep_chain):
+        # Depth first walk of the dependency graph. A parameter is added to the render order
+        # once all its dependencies have been added.
+        k = dep_chain[-1]
+        if k in visited:
+            return
+        for dependency in sorted(dependencies[k]):
+            if dependency not in renderable_params:
+                # Value comes from the context
+                continue
+            dep_chain.append(dependency)
+            if dependency in dep_chain[:-1]:
+                msg = 'Cyclic dependecy found - %s.' % dep_chain
+                raise actionrunner.ActionRunnerException(msg)
+            visit(dep_chain)
+            dep_chain.pop()
+        visited.add(k)
+        render_order.append(k)
+
+    for k in sorted(renderable_params.keys()):
+        visit([k])
+
+    return render_order
 
 
 def _do_render_params(renderable_params, context):
     '''
-    Will render the params per the context and will return best attempt to render. Render attempts
-    with missing params will leave blanks.
+    Will render the params per the context. Each param is rendered exactly once, after the params
+    it depends on.
     '''
     if not renderable_params:
         return renderable_params
-    _validate_dependencies(renderable_params, context)
-    env = Environment(undefined=StrictUndefined)
+    render_order = _get_render_order(renderable_params, context)
     rendered_params = {}
     rendered_params.update(context)
 
-    # Maps parameter key to render exception
-    # We save the exception so we can throw a more meaningful exception at the end if rendering of
-    # some parameter fails
-    parameter_render_exceptions = {}
-
-    num_parameters = len(renderable_params) + len(context)
-    # After how many attempts at failing to render parameter we should bail out
-    max_rendered_parameters_unchanged_count = num_parameters
-    rendered_params_unchanged_count = 0
-
-    while len(renderable_params) != 0:
-        renderable_params_pre_loop = renderable_params.copy()
-        for k, v in six.iteritems(renderable_params):
-            template = env.from_string(v)
-
-            try:
-                rendered = template.render(rendered_params)
-                rendered_params[k] = rendered
-
-                if k in parameter_render_exceptions:
-                    del parameter_render_exceptions[k]
-            except Exception as e:
-                # Note: This sucks, but because we support multi level and out of order
-                # rendering, we can't throw an exception here yet since the parameter could get
-                # rendered in future iteration
-                LOG.debug('Failed to render %s: %s', k, v, exc_info=True)
-                parameter_render_exceptions[k] = e
-
-        for k in rendered_params:
-            if k in renderable_params:
-                del renderable_params[k]
-
-        if renderable_params_pre_loop == renderable_params:
-            rendered_params_unchanged_count += 1
-
-        # Make sure we terminate and don't end up in an infinite loop if we
-        # tried to render all the parameters but rendering of some parameters
-        # still fails
-        if rendered_params_unchanged_count >= max_rendered_parameters_unchanged_count:
-            k = parameter_render_exceptions.keys()[0]
-            e = parameter_render_exceptions[k]
+    for k in render_order:
+        v = renderable_params[k]
+        try:
+            rendered_params[k] = jinja_utils.get_template(v).render(rendered_params)
+        except Exception as e:
+            LOG.debug('Failed to render %s: %s', k, v, exc_info=True)
             msg = 'Failed to render parameter "%s": %s' % (k, str(e))
             raise actionrunner.ActionRunnerException(msg)
 
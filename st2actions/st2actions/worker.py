@@ -18,17 +18,23 @@ from kombu.mixins import ConsumerMixin
 from oslo.config import cfg
 
 from st2actions.container.base import RunnerContainer
+from st2actions.runners.python_worker_pool import shutdown_worker_pool
 from st2common import log as logging
 from st2common.exceptions.db import StackStormDBObjectNotFoundError
 from st2common.constants.action import LIVEACTION_STATUS_RUNNING
 from st2common.constants.action import LIVEACTION_STATUS_SUCCEEDED
 from st2common.constants.action import LIVEACTION_STATUS_FAILED
 from st2common.exceptions.actionrunner import ActionRunnerException
-from st2common.services import executions
-from st2common.transport import liveaction, publishers
+from st2common.services import execution_state
+from st2common.services.action_metadata_watcher import (setup_metadata_cache,
+                                                        teardown_metadata_cache)
+from st2common.services.liveaction_watcher import (setup_completion_watcher,
+                                                   teardown_completion_watcher)
+from st2common.transport import liveaction, publishers, serialization
 from st2common.util import system_info
-from st2common.util.action_db import (get_liveaction_by_id, update_liveaction_status)
+from st2common.util.action_db import get_liveaction_by_id
 from st2common.util.greenpooldispatch import BufferedDispatcher
+from st2common.util.templating import setup_template_cache, teardown_template_cache
 
 LOG = logging.getLogger(__name__)
 
@@ -43,13 +49,26 @@ class Worker(ConsumerMixin):
         self.connection = connection
         self.container = RunnerContainer()
         self._dispatcher = BufferedDispatcher()
+        self._metadata_cache_watcher = None
+        self._template_cache_stats_thread = None
+
+    def start(self):
+        self._metadata_cache_watcher = setup_metadata_cache()
+        self._template_cache_stats_thread = setup_template_cache()
+        # Action chains running in this process wait for task completion notifications
+        setup_completion_watcher()
+        self.run()
 
     def shutdown(self):
         self._dispatcher.shutdown()
+        teardown_metadata_cache(self._metadata_cache_watcher)
+        teardown_template_cache(self._template_cache_stats_thread)
+        teardown_completion_watcher()
+        shutdown_worker_pool()
 
     def get_consumers(self, Consumer, channel):
         consumer = Consumer(queues=[ACTIONRUNNER_WORK_Q],
-                            accept=['pickle'],
+                            accept=serialization.ACCEPT_CONTENT,
                             callbacks=[self.process_task])
         # use prefetch_count=1 for fair dispatch. This way workers that finish an item get the next
         # task and the work does not get queued behind any single large item.
@@ -88,10 +107,8 @@ class Worker(ConsumerMixin):
         runner_info = system_info.get_process_info()
 
         # Update liveaction status to "running"
-        liveaction_db = update_liveaction_status(status=LIVEACTION_STATUS_RUNNING,
-                                                 runner_info=runner_info,
-                                                 liveaction_id=liveaction_db.id)
-        action_execution_db = executions.update_execution(liveaction_db)
+        liveaction_db, action_execution_db = execution_state.update_status(
+            liveaction_db, status=LIVEACTION_STATUS_RUNNING, runner_info=runner_info)
 
         # Launch action
         extra = {'action_execution_db': action_execution_db, 'liveaction_db': liveaction_db}
@@ -106,8 +123,7 @@ class Worker(ConsumerMixin):
             if not result:
                 raise ActionRunnerException('Failed to execute action.')
         except Exception:
-            liveaction_db = update_liveaction_status(status=LIVEACTION_STATUS_FAILED,
-                                                     liveaction_id=liveaction_db.id)
+            execution_state.update_status(liveaction_db, status=LIVEACTION_STATUS_FAILED)
             raise
 
         return result
@@ -117,7 +133,7 @@ def work():
     with Connection(cfg.CONF.messaging.url) as conn:
         worker = Worker(conn)
         try:
-            worker.run()
+            worker.start()
         except:
             worker.shutdown()
             raise
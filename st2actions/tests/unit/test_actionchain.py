@@ -13,6 +13,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import shutil
+import tempfile
+
 import mock
 
 from st2actions.runners import actionchainrunner as acr
@@ -82,6 +86,8 @@ CHAIN_WITH_PUBLISH = FixturesLoader().get_fixture_file_path_abs(
     FIXTURES_PACK, 'actionchains', 'chain_with_publish.json')
 CHAIN_WITH_INVALID_ACTION = FixturesLoader().get_fixture_file_path_abs(
     FIXTURES_PACK, 'actionchains', 'chain_with_invalid_action.json')
+CHAIN_WITH_PARALLEL_TASKS = FixturesLoader().get_fixture_file_path_abs(
+    FIXTURES_PACK, 'actionchains', 'chain_with_parallel_tasks.json')
 
 
 @mock.patch.object(action_db_util, 'get_runnertype_by_name',
@@ -513,6 +519,75 @@ class TestActionChainRunner(DbTestCase):
         self.assertTrue(expected_error in output['error'])
         self.assertTrue(expected_error in output['traceback'])
 
+    @mock.patch.object(action_db_util, 'get_action_by_ref',
+                       mock.MagicMock(return_value=ACTION_2))
+    @mock.patch.object(action_service, 'schedule',
+                       return_value=(DummyActionExecution(result={'raw_out': 'published'}), None))
+    def test_chain_runner_parallel_tasks(self, schedule):
+        chain_runner = acr.get_runner()
+        chain_runner.entry_point = CHAIN_WITH_PARALLEL_TASKS
+        chain_runner.action = ACTION_2
+        chain_runner.container_service = RunnerContainerService()
+        chain_runner.pre_run()
+        status, output, _ = chain_runner.run({})
+
+        self.assertEqual(status, LIVEACTION_STATUS_SUCCEEDED)
+        self.assertEqual(schedule.call_count, 3)
+        self.assertEqual([task['name'] for task in output['tasks']], ['p1', 'p2', 'c2'])
+
+        # Results of the parallel tasks are available under the task and the node name
+        expected_value = {'inttype': 3,
+                          'strtype': 'published-published',
+                          'booltype': True}
+        mock_args, _ = schedule.call_args
+        self.assertEqual(mock_args[0].parameters, expected_value)
+
+    @mock.patch.object(action_db_util, 'get_action_by_ref',
+                       mock.MagicMock(return_value=ACTION_2))
+    @mock.patch.object(action_service, 'schedule', side_effect=[
+        (DummyActionExecution(result={'raw_out': 'published'}), None),
+        (DummyActionExecution(status=LIVEACTION_STATUS_FAILED, result={'raw_out': 'error'}),
+         None)])
+    def test_chain_runner_parallel_tasks_failure(self, schedule):
+        chain_runner = acr.get_runner()
+        chain_runner.entry_point = CHAIN_WITH_PARALLEL_TASKS
+        chain_runner.action = ACTION_2
+        chain_runner.container_service = RunnerContainerService()
+        chain_runner.pre_run()
+        status, output, _ = chain_runner.run({})
+
+        # All the parallel tasks run, but the chain doesn't continue on the success path
+        self.assertEqual(status, LIVEACTION_STATUS_FAILED)
+        self.assertEqual(schedule.call_count, 2)
+        self.assertEqual([task['state'] for task in output['tasks']],
+                         [LIVEACTION_STATUS_SUCCEEDED, LIVEACTION_STATUS_FAILED])
+
+    def test_chain_holder_get_node(self):
+        chain = acr.ChainDefinitionCache().get_actionchain(CHAIN_1_PATH)
+        chain_holder = acr.ChainHolder(chain, 'chain1')
+
+        self.assertEqual(chain_holder.get_node('c3').ref, 'wolfpack.a3')
+        self.assertEqual(chain_holder.get_node('c5'), None)
+        self.assertRaises(runnerexceptions.ActionRunnerException, chain_holder.get_node, 'c5',
+                          raise_on_failure=True)
+
+    def test_chain_definition_cache(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        chain_path = os.path.join(temp_dir, 'chain1.json')
+        shutil.copy(CHAIN_1_PATH, chain_path)
+
+        cache = acr.ChainDefinitionCache()
+        chain = cache.get_actionchain(chain_path)
+        self.assertTrue(cache.get_actionchain(chain_path) is chain)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # Definition is reloaded once the file changes
+        stat = os.stat(chain_path)
+        os.utime(chain_path, (stat.st_atime, stat.st_mtime + 10))
+        self.assertFalse(cache.get_actionchain(chain_path) is chain)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
     @classmethod
     def tearDownClass(cls):
         FixturesLoader().delete_models_from_db(MODELS)
@@ -17,7 +17,7 @@
 import mock
 import unittest2
 
-from st2actions.runners.httprunner import HTTPClient
+from st2actions.runners.httprunner import HTTPClient, HTTPSessionPool
 import st2tests.config as tests_config
 
 
@@ -30,8 +30,9 @@ class HTTPRunnerTestCase(unittest2.TestCase):
     def setUpClass(cls):
         tests_config.parse_args()
 
-    @mock.patch('st2actions.runners.httprunner.requests')
-    def test_parse_response_body(self, mock_requests):
+    @mock.patch.object(HTTPSessionPool, 'get_session')
+    def test_parse_response_body(self, mock_get_session):
+        mock_session = mock_get_session.return_value
         client = HTTPClient(url='http://localhost')
         mock_result = MockResult()
 
@@ -40,7 +41,7 @@ class HTTPRunnerTestCase(unittest2.TestCase):
         mock_result.headers = {'Content-Type': 'text/html'}
         mock_result.status_code = 200
 
-        mock_requests.request.return_value = mock_result
+        mock_session.request.return_value = mock_result
         result = client.run()
 
         self.assertEqual(result['body'], mock_result.text)
@@ -51,7 +52,7 @@ class HTTPRunnerTestCase(unittest2.TestCase):
         mock_result.text = '{"test1": "val1"}'
         mock_result.headers = {'Content-Type': 'text/html'}
 
-        mock_requests.request.return_value = mock_result
+        mock_session.request.return_value = mock_result
         result = client.run()
 
         self.assertEqual(result['body'], mock_result.text)
@@ -60,7 +61,7 @@ class HTTPRunnerTestCase(unittest2.TestCase):
         mock_result.text = '{"test1": "val1"}'
         mock_result.headers = {'Content-Type': 'application/json'}
 
-        mock_requests.request.return_value = mock_result
+        mock_session.request.return_value = mock_result
         result = client.run()
 
         self.assertTrue(isinstance(result['body'], dict))
@@ -70,7 +71,7 @@ class HTTPRunnerTestCase(unittest2.TestCase):
         mock_result.text = '{"test1": "val1"}'
         mock_result.headers = {'Content-Type': 'application/json; charset=UTF-8'}
 
-        mock_requests.request.return_value = mock_result
+        mock_session.request.return_value = mock_result
         result = client.run()
 
         self.assertTrue(isinstance(result['body'], dict))
@@ -80,8 +81,32 @@ class HTTPRunnerTestCase(unittest2.TestCase):
         mock_result.text = 'not json'
         mock_result.headers = {'Content-Type': 'application/json'}
 
-        mock_requests.request.return_value = mock_result
+        mock_session.request.return_value = mock_result
         result = client.run()
 
         self.assertFalse(isinstance(result['body'], dict))
         self.assertEqual(result['body'], mock_result.text)
+
+    def test_session_pool_shares_connections_per_host(self):
+        pool = HTTPSessionPool(pool_size=5)
+
+        session1 = pool.get_session('http://localhost:8080/foo')
+        session2 = pool.get_session('HTTP://LOCALHOST:8080/bar')
+        session3 = pool.get_session('http://127.0.0.1:8080/foo')
+
+        # Connections are shared, session state is not
+        adapter1 = session1.get_adapter('http://localhost:8080/foo')
+        self.assertTrue(adapter1 is session2.get_adapter('http://localhost:8080/bar'))
+        self.assertFalse(adapter1 is session3.get_adapter('http://127.0.0.1:8080/foo'))
+        self.assertFalse(session1 is session2)
+        self.assertFalse(session1.cookies is session2.cookies)
+
+    def test_session_pool_without_keep_alive(self):
+        pool = HTTPSessionPool(keep_alive=False)
+
+        session1 = pool.get_session('http://localhost:8080/foo')
+        session2 = pool.get_session('http://localhost:8080/foo')
+
+        self.assertFalse(session1.get_adapter('http://localhost:8080/foo') is
+                         session2.get_adapter('http://localhost:8080/foo'))
+        self.assertEqual(session1.headers['Connection'], 'close')
@@ -0,0 +1,197 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import threading
+import time
+
+import mock
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+from six.moves.urllib import parse as urlparse
+import unittest2
+
+# XXX: MistralResultsQuerier import depends on config being setup.
+import st2tests.config as tests_config
+tests_config.parse_args()
+
+from st2actions.query.mistral.v2 import MistralResultsQuerier
+from st2common.constants.action import LIVEACTION_STATUS_RUNNING, LIVEACTION_STATUS_SUCCEEDED
+
+
+class FakeMistralServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    Minimal Mistral v2 API which serves executions and tasks and records the requests made.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), FakeMistralRequestHandler)
+        self.executions = {}
+        self.requests = []
+        self.connections = 0
+        self.listing_status_code = 200
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:%s/v2' % (self.server_address[1])
+
+    def set_execution(self, exec_id, state, updated_at, output=None):
+        self.executions[exec_id] = {'id': exec_id, 'state': state, 'updated_at': updated_at,
+                                    'output': json.dumps(output or {})}
+
+
+class FakeMistralRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def do_GET(self):
+        url = urlparse.urlparse(self.path)
+        params = urlparse.parse_qs(url.query)
+        parts = url.path.strip('/').split('/')[1:]
+        self.server.requests.append(url.path)
+
+        status_code = 200
+
+        if parts == ['executions']:
+            status_code = self.server.listing_status_code
+            executions = list(self.server.executions.values())
+            if 'updated_at' in params:
+                marker = params['updated_at'][0].split(':', 1)[1]
+                executions = [e for e in executions if e['updated_at'] >= marker]
+            body = {'executions': executions}
+        elif len(parts) == 2:
+            body = self.server.executions[parts[1]]
+        else:
+            body = {'tasks': []}
+
+        body = json.dumps(body).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class MistralResultsQuerierTest(unittest2.TestCase):
+
+    def setUp(self):
+        super(MistralResultsQuerierTest, self).setUp()
+        self.server = FakeMistralServer()
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+
+        for index in range(1, 4):
+            self.server.set_execution('exec%s' % index, 'RUNNING', '2015-01-01 00:00:00')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        super(MistralResultsQuerierTest, self).tearDown()
+
+    def _get_querier(self, batch_mode):
+        querier = MistralResultsQuerier('dummy', container_service=mock.Mock(),
+                                        query_interval=60, batch_mode=batch_mode)
+        querier._base_url = self.server.base_url
+        return querier
+
+    def _query(self, querier, exec_id):
+        query_context = {'mistral': {'execution_id': exec_id}}
+        return querier.query('liveaction-%s' % (exec_id), query_context)[0]
+
+    def _query_all(self, querier):
+        # Pretend query interval has passed since the last poll
+        querier._last_listing_time = 0
+        self.server.requests = []
+
+        results = {}
+        for index in range(1, 4):
+            exec_id = 'exec%s' % index
+            query_context = {'mistral': {'execution_id': exec_id}}
+            status, _ = querier.query('liveaction%s' % index, query_context)
+            results[exec_id] = status
+        return results
+
+    def test_query_all_executions_on_every_poll(self):
+        querier = self._get_querier(batch_mode=False)
+
+        self._query_all(querier)
+        self.assertEqual(len(self.server.requests), 6)
+
+        self._query_all(querier)
+        self.assertEqual(len(self.server.requests), 6)
+
+    def test_batched_query_only_fetches_changed_executions(self):
+        querier = self._get_querier(batch_mode=True)
+
+        # Initial poll retrieves details of all the executions. Executions are listed once the
+        # first execution is tracked.
+        results = self._query_all(querier)
+        self.assertEqual(len(self.server.requests), 7)
+        self.assertEqual(set(results.values()), set([LIVEACTION_STATUS_RUNNING]))
+
+        # Nothing changed, single listing call is made
+        results = self._query_all(querier)
+        self.assertEqual(self.server.requests, ['/v2/executions'])
+        self.assertEqual(set(results.values()), set([LIVEACTION_STATUS_RUNNING]))
+
+        # Only the execution which changed is retrieved
+        self.server.set_execution('exec2', 'SUCCESS', '2015-01-01 00:05:00', output={'k': 'v'})
+        results = self._query_all(querier)
+        self.assertEqual(self.server.requests, ['/v2/executions', '/v2/executions/exec2',
+                                                '/v2/executions/exec2/tasks'])
+        self.assertEqual(results['exec2'], LIVEACTION_STATUS_SUCCEEDED)
+        self.assertEqual(results['exec1'], LIVEACTION_STATUS_RUNNING)
+        self.assertNotIn('exec2', querier._results)
+
+        # Connections are kept alive and reused
+        self.assertEqual(self.server.connections, 1)
+
+    def test_batched_query_update_before_new_execution_is_not_missed(self):
+        querier = self._get_querier(batch_mode=True)
+        self.assertEqual(self._query(querier, 'exec1'), LIVEACTION_STATUS_RUNNING)
+
+        # exec1 completes and afterwards a new execution is started. Details of the new
+        # execution are retrieved before the next listing.
+        self.server.set_execution('exec1', 'SUCCESS', '2015-01-01 00:05:00')
+        self.server.set_execution('exec4', 'RUNNING', '2015-01-01 00:10:00')
+        querier._last_listing_time = time.time()
+        self.assertEqual(self._query(querier, 'exec4'), LIVEACTION_STATUS_RUNNING)
+
+        # Next listing still includes the update of exec1
+        querier._last_listing_time = 0
+        self.assertEqual(self._query(querier, 'exec1'), LIVEACTION_STATUS_SUCCEEDED)
+        self.assertEqual(querier._updated_at_marker, '2015-01-01 00:10:00')
+
+    def test_batched_query_listing_failure(self):
+        querier = self._get_querier(batch_mode=True)
+        self._query_all(querier)
+
+        self.server.listing_status_code = 500
+        self.server.set_execution('exec2', 'SUCCESS', '2015-01-01 00:05:00')
+
+        # Executions are retrieved since it's unknown which ones changed
+        results = self._query_all(querier)
+        self.assertEqual(results['exec2'], LIVEACTION_STATUS_SUCCEEDED)
+        self.assertEqual(results['exec1'], LIVEACTION_STATUS_RUNNING)
+        self.assertEqual(len(self.server.requests), 7)
+        self.assertEqual(querier._updated_at_marker, '2015-01-01 00:00:00')
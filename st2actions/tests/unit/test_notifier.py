@@ -15,6 +15,7 @@
 
 import datetime
 
+import mock
 import unittest2
 
 import st2tests.config as tests_config
@@ -67,6 +68,11 @@ class NotifierTestCase(unittest2.TestCase):
             except Exception:
                 self.tester.fail('Test failed')
 
+        def dispatch_batch(self, trigger, payloads):
+            self.tester.assertEqual(len(set([p['channel'] for p in payloads])), len(payloads))
+            for payload in payloads:
+                self.dispatch(trigger, payload=payload)
+
     def test_notify_triggers(self):
         liveaction = LiveActionDB(action='core.local')
         liveaction.description = ''
@@ -82,3 +88,24 @@ class NotifierTestCase(unittest2.TestCase):
         notifier = Notifier(q_connection=None,
                             trigger_dispatcher=dispatcher)
         notifier.handle_action_complete(liveaction)
+
+    def test_notify_triggers_multiple_channels(self):
+        liveaction = LiveActionDB(action='core.local')
+        liveaction.description = ''
+        liveaction.status = 'succeeded'
+        liveaction.parameters = {}
+        on_success = NotificationSubSchema(message='Action succeeded.',
+                                           channels=['slack', 'email'])
+        liveaction.notify = NotificationSchema(on_success=on_success)
+        liveaction.start_timestamp = datetime.datetime.utcnow()
+
+        dispatcher = NotifierTestCase.MockDispatcher(self)
+        dispatcher.dispatch_batch = mock.Mock(wraps=dispatcher.dispatch_batch)
+        notifier = Notifier(q_connection=None,
+                            trigger_dispatcher=dispatcher)
+        notifier.handle_action_complete(liveaction)
+
+        # All the channels are notified using a single batch publish
+        self.assertEqual(dispatcher.dispatch_batch.call_count, 1)
+        payloads = dispatcher.dispatch_batch.call_args[1]['payloads']
+        self.assertEqual([payload['channel'] for payload in payloads], ['slack', 'email'])
@@ -0,0 +1,178 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import sys
+import tempfile
+
+import unittest2
+from eventlet.green import subprocess
+
+from st2actions.utils.output import BoundedOutputBuffer, ProcessOutputCapture
+from st2actions.utils.output import DelimitedResultExtractor
+
+
+class BoundedOutputBufferTestCase(unittest2.TestCase):
+
+    def test_output_within_limit_is_not_truncated(self):
+        output = BoundedOutputBuffer(max_bytes=10)
+        output.write('abcde')
+        output.write('fghij')
+
+        self.assertFalse(output.truncated)
+        self.assertEqual(output.getvalue(), 'abcdefghij')
+        self.assertEqual(output.total_bytes, 10)
+
+    def test_output_over_limit_retains_head_and_tail(self):
+        output = BoundedOutputBuffer(max_bytes=10)
+
+        for char in 'abcdefghijklmnopqrstuvwxyz':
+            output.write(char * 3)
+
+        self.assertTrue(output.truncated)
+        self.assertEqual(output.total_bytes, 78)
+        self.assertEqual(output.getvalue(), 'aaabb\n... [68 bytes truncated] ...\nyyzzz')
+        self.assertEqual(output.spool_path, None)
+
+    def test_truncation_doesnt_split_multi_byte_characters(self):
+        data = u'\u00e9\u20ac\U0001f600'.encode('utf-8') * 10
+
+        for max_bytes in range(1, 20):
+            output = BoundedOutputBuffer(max_bytes=max_bytes)
+            output.write(data)
+
+            value = output.getvalue()
+            head, tail = value.split(b'\n... [', 1)
+            tail = tail.split(b'] ...\n', 1)[1]
+
+            # Would throw if a character was cut in half
+            value.decode('utf-8')
+            self.assertTrue(data.startswith(head))
+            self.assertTrue(data.endswith(tail))
+            self.assertTrue(len(head) + len(tail) <= max_bytes)
+
+    def test_truncation_with_character_across_cut_point(self):
+        output = BoundedOutputBuffer(max_bytes=6)
+        # Cut points fall in the middle of the three byte euro sign
+        output.write(u'ab\u20acdef\u20acgh'.encode('utf-8'))
+
+        self.assertEqual(output.getvalue(), 'ab\n... [9 bytes truncated] ...\ngh')
+
+    def test_no_limit(self):
+        output = BoundedOutputBuffer(max_bytes=0)
+        output.write('a' * 1000)
+
+        self.assertFalse(output.truncated)
+        self.assertEqual(len(output.getvalue()), 1000)
+
+    def test_output_over_limit_is_spooled(self):
+        spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spool_dir)
+
+        output = BoundedOutputBuffer(max_bytes=4, spool_dir=spool_dir, spool_prefix='test-')
+        output.write('abc')
+        output.write('def')
+        output.write('ghi')
+        output.close()
+
+        self.assertTrue(output.truncated)
+        self.assertEqual(os.path.dirname(output.spool_path), spool_dir)
+        self.assertTrue(os.path.basename(output.spool_path).startswith('test-'))
+
+        with open(output.spool_path, 'rb') as fp:
+            self.assertEqual(fp.read(), 'abcdefghi')
+
+
+class DelimitedResultExtractorTestCase(unittest2.TestCase):
+
+    def _feed(self, extractor, data, chunk_size):
+        output = []
+
+        for index in range(0, len(data), chunk_size):
+            output.append(extractor.feed(data[index:index + chunk_size]))
+
+        output.append(extractor.flush())
+        return ''.join(output)
+
+    def test_result_is_extracted(self):
+        data = 'before##result##after'
+
+        # Delimiters are split across chunks for smaller chunk sizes
+        for chunk_size in [1, 2, 3, 5, len(data)]:
+            extractor = DelimitedResultExtractor(delimiter='##')
+            self.assertEqual(self._feed(extractor, data, chunk_size), 'beforeafter')
+            self.assertEqual(extractor.result, 'result')
+
+    def test_partial_delimiter_is_returned_as_output(self):
+        extractor = DelimitedResultExtractor(delimiter='###')
+        self.assertEqual(self._feed(extractor, 'a#b##', 2), 'a#b##')
+        self.assertEqual(extractor.result, None)
+
+    def test_unterminated_result_is_returned_as_output(self):
+        extractor = DelimitedResultExtractor(delimiter='##')
+        self.assertEqual(self._feed(extractor, 'before##result', 3), 'before##result')
+        self.assertEqual(extractor.result, None)
+
+
+class ProcessOutputCaptureTestCase(unittest2.TestCase):
+
+    def _get_process(self, code):
+        return subprocess.Popen(args=[sys.executable, '-c', code], stdin=None,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def test_capture_output(self):
+        process = self._get_process('import sys; sys.stdout.write("out"); '
+                                    'sys.stderr.write("err")')
+        output_capture = ProcessOutputCapture(process=process, max_bytes=1024)
+        output_capture.start()
+
+        self.assertEqual(output_capture.wait(), ('out', 'err'))
+        self.assertEqual(process.wait(), 0)
+        self.assertEqual(output_capture.get_truncation_info(), {})
+
+    def test_capture_output_larger_than_pipe_buffer(self):
+        # Process doesn't exit before the whole output has been consumed
+        process = self._get_process('import sys; sys.stdout.write("a" * 1024 * 1024); '
+                                    'sys.stderr.write("b" * 1024 * 1024)')
+        output_capture = ProcessOutputCapture(process=process, max_bytes=1024)
+        output_capture.start()
+
+        self.assertEqual(process.wait(timeout=10), 0)
+        stdout, stderr = output_capture.wait()
+
+        self.assertTrue(stdout.startswith('a' * 512))
+        self.assertTrue(stdout.endswith('a' * 512))
+        self.assertTrue(stderr.startswith('b' * 512))
+        self.assertEqual(output_capture.get_truncation_info(), {
+            'stdout_truncated': True,
+            'stdout_size': 1024 * 1024,
+            'stderr_truncated': True,
+            'stderr_size': 1024 * 1024
+        })
+
+    def test_result_is_extracted_before_truncation(self):
+        process = self._get_process('import sys; sys.stdout.write("a" * 1024 * 1024); '
+                                    'sys.stdout.write("##result##")')
+        output_capture = ProcessOutputCapture(process=process, max_bytes=1024,
+                                              result_delimiter='##')
+        output_capture.start()
+
+        self.assertEqual(process.wait(timeout=10), 0)
+        stdout, _ = output_capture.wait()
+
+        self.assertEqual(output_capture.result, 'result')
+        self.assertTrue(stdout.endswith('a' * 512))
+        self.assertEqual(output_capture.get_truncation_info()['stdout_size'], 1024 * 1024)
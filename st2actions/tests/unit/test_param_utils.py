@@ -300,6 +300,34 @@ class ParamsUtilsTest(DbTestCase):
                                 runnertype_parameter_info={},
                                 action_parameter_info={})
 
+    def test_get_rendered_params_dependency_chain(self):
+        runner_params = {'r1': '{{a1}}-r1', 'r2': 'r2'}
+        action_params = {'a1': '{{a2}}-a1', 'a2': '{{a3}}-a2', 'a3': '{{r2}}-a3'}
+
+        runner_param_info = {'r1': {}, 'r2': {}}
+        action_param_info = {'a1': {}, 'a2': {}, 'a3': {}}
+        r_runner_params, r_action_params = param_utils.get_rendered_params(
+            runner_params, action_params, runner_param_info, action_param_info)
+        self.assertEqual(r_runner_params, {'r1': 'r2-a3-a2-a1-r1', 'r2': 'r2'})
+        self.assertEqual(r_action_params, {'a1': 'r2-a3-a2-a1', 'a2': 'r2-a3-a2',
+                                           'a3': 'r2-a3'})
+
+    def test_render_order_dependencies_first(self):
+        renderable_params = {'a1': '{{a2}}{{a3}}', 'a2': '{{a3}}{{c1}}', 'a3': '{{c1}}'}
+        render_order = param_utils._get_render_order(renderable_params, {'c1': 'v'})
+        self.assertEqual(render_order, ['a3', 'a2', 'a1'])
+
+    def test_get_rendered_params_with_indirect_cyclic_dependency(self):
+        runner_params = {'r1': '{{r2}}', 'r2': '{{r3}}', 'r3': '{{r1}}', 'r4': 'r4'}
+        expected_msg = 'Cyclic dependecy found - \\[\'r1\', \'r2\', \'r3\', \'r1\'\\].'
+        self.assertRaisesRegexp(actionrunner.ActionRunnerException,
+                                expected_msg,
+                                param_utils.get_rendered_params,
+                                runner_parameters=runner_params,
+                                action_parameters={},
+                                runnertype_parameter_info={},
+                                action_parameter_info={})
+
     def _get_action_exec_db_model(self, params):
         liveaction_db = LiveActionDB()
         liveaction_db.status = 'initializing'
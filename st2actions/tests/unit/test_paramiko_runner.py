@@ -0,0 +1,198 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# XXX: SSHRunner import depends on config being setup.
+import st2tests.config as tests_config
+tests_config.parse_args()
+
+import mock
+from unittest2 import TestCase
+
+from st2actions.runners.paramikorunner import get_runner
+from st2common.constants.action import LIVEACTION_STATUS_SUCCEEDED, LIVEACTION_STATUS_FAILED
+from st2common.exceptions.actionrunner import ActionRunnerPreRunError
+from st2common.models.system.action import ParamikoSSHCommandAction
+from st2common.util.ssh import SSHClientCache
+
+
+class SSHRunnerTestCase(TestCase):
+
+    def _get_runner(self, **runner_parameters):
+        runner = get_runner()
+        runner.action_name = 'dummy'
+        runner.liveaction_id = 'dummy_id'
+        runner.context = {}
+        runner.runner_parameters = {'hosts': 'host1,host2,host3', 'cmd': 'uname -a'}
+        runner.runner_parameters.update(runner_parameters)
+        runner.pre_run()
+        return runner
+
+    @mock.patch.object(SSHClientCache, 'release_client')
+    @mock.patch.object(SSHClientCache, 'acquire_client')
+    def test_run_on_all_hosts(self, mock_get_client, mock_release_client):
+        mock_get_client.return_value.execute_sync.return_value = ('Linux', '', 0)
+        runner = self._get_runner(password='secret')
+
+        status, result, _ = runner.run({})
+
+        self.assertEqual(status, LIVEACTION_STATUS_SUCCEEDED)
+        self.assertEqual(sorted(result.keys()), ['host1', 'host2', 'host3'])
+        self.assertEqual(result['host1'], {'stdout': 'Linux', 'stderr': '', 'return_code': 0,
+                                           'succeeded': True, 'failed': False})
+        hosts = sorted([call[1]['host'] for call in mock_get_client.call_args_list])
+        self.assertEqual(hosts, ['host1', 'host2', 'host3'])
+        # Connections are returned to the cache
+        self.assertEqual(mock_release_client.call_count, 3)
+
+    @mock.patch.object(SSHClientCache, 'discard_client')
+    @mock.patch.object(SSHClientCache, 'release_client')
+    @mock.patch.object(SSHClientCache, 'acquire_client')
+    def test_failure_on_one_host(self, mock_get_client, mock_release_client,
+                                 mock_discard_client):
+        clients = {}
+
+        def get_client(host, **kwargs):
+            client = mock.Mock()
+            client.execute_sync.return_value = ('Linux', '', 0)
+
+            if host == 'host2':
+                client.execute_sync.side_effect = Exception('Connection refused')
+
+            clients[host] = client
+            return client
+
+        mock_get_client.side_effect = get_client
+        runner = self._get_runner(password='secret')
+
+        status, result, _ = runner.run({})
+
+        self.assertEqual(status, LIVEACTION_STATUS_FAILED)
+        self.assertTrue(result['host1']['succeeded'])
+        self.assertTrue(result['host2']['failed'])
+        self.assertIn('Connection refused', result['host2']['error'])
+        # Broken connection is closed instead of being returned to the cache
+        mock_discard_client.assert_called_once_with(clients['host2'])
+        self.assertEqual(mock_release_client.call_count, 2)
+
+    def test_invalid_env_var_name(self):
+        self.assertRaises(ActionRunnerPreRunError, self._get_runner, password='secret',
+                          env={'VALID_1': 'a', 'INVALID; rm -rf /': 'b'})
+
+    @mock.patch.object(SSHClientCache, 'release_client', mock.Mock())
+    @mock.patch.object(SSHClientCache, 'acquire_client')
+    def test_non_zero_return_code(self, mock_get_client):
+        mock_get_client.return_value.execute_sync.return_value = ('', 'not found', 127)
+        runner = self._get_runner(hosts='host1', password='secret')
+
+        status, result, _ = runner.run({})
+
+        self.assertEqual(status, LIVEACTION_STATUS_FAILED)
+        self.assertEqual(result['host1']['return_code'], 127)
+        self.assertTrue(result['host1']['failed'])
+
+
+class ParamikoSSHCommandActionTestCase(TestCase):
+
+    def test_get_full_command_string(self):
+        action = ParamikoSSHCommandAction(name='dummy', action_exec_id='dummy_id',
+                                          command='ls -la', env_vars={'b': 'two words', 'a': 1},
+                                          user='stanley', cwd='/tmp')
+        self.assertEqual(action.get_full_command_string(),
+                         'export a=1 b=\'two words\' && cd /tmp && ls -la')
+
+    def test_get_full_command_string_sudo(self):
+        action = ParamikoSSHCommandAction(name='dummy', action_exec_id='dummy_id',
+                                          command='ls', env_vars={}, user='stanley', sudo=True)
+        self.assertEqual(action.get_full_command_string(), 'sudo -E -- bash -c ls')
+
+    def test_get_full_command_string_invalid_env_var_name(self):
+        action = ParamikoSSHCommandAction(name='dummy', action_exec_id='dummy_id',
+                                          command='ls', env_vars={'A=1 B': 'x'}, user='stanley')
+        self.assertRaises(ValueError, action.get_full_command_string)
+
+    def test_get_full_command_string_quotes_values(self):
+        action = ParamikoSSHCommandAction(name='dummy', action_exec_id='dummy_id',
+                                          command='ls', env_vars={'A': '$(reboot); `id`'},
+                                          user='stanley')
+        self.assertEqual(action.get_full_command_string(),
+                         'export A=\'$(reboot); `id`\' && ls')
+
+
+class SSHClientCacheTestCase(TestCase):
+
+    def _get_client(self, connected=True):
+        client = mock.Mock()
+        client.client.get_transport.return_value.is_active.return_value = connected
+        return client
+
+    @mock.patch('st2common.util.ssh.SSHClient')
+    def test_clients_are_not_shared(self, mock_ssh_client):
+        mock_ssh_client.side_effect = lambda *args, **kwargs: self._get_client()
+        cache = SSHClientCache()
+
+        # Concurrent users of the same host get their own connection
+        client1 = cache.acquire_client(host='host1', user='stanley', password='secret')
+        client2 = cache.acquire_client(host='host1', user='stanley', password='secret')
+        self.assertTrue(client1 is not client2)
+
+        cache.release_client(client1, host='host1', user='stanley', password='secret')
+        self.assertTrue(cache.acquire_client(host='host1', user='stanley',
+                                             password='secret') is client1)
+
+        # Different credentials never get the cached connection
+        cache.release_client(client1, host='host1', user='stanley', password='secret')
+        self.assertTrue(cache.acquire_client(host='host1', user='stanley',
+                                             password='other') is not client1)
+
+        # Discarded client is closed and not reused
+        client3 = cache.acquire_client(host='host1', user='stanley', password='secret')
+        self.assertTrue(client3 is client1)
+        cache.discard_client(client3)
+        self.assertTrue(client3.client.close.called)
+        self.assertTrue(cache.acquire_client(host='host1', user='stanley',
+                                             password='secret') is not client3)
+
+    def test_max_size(self):
+        cache = SSHClientCache(max_size=2)
+        clients = [self._get_client() for _ in range(3)]
+
+        for index, client in enumerate(clients):
+            cache.release_client(client, host='host%s' % (index))
+
+        self.assertTrue(clients[0].client.close.called)
+        self.assertFalse(clients[1].client.close.called)
+        self.assertFalse(clients[2].client.close.called)
+
+        cache.close()
+        self.assertTrue(clients[1].client.close.called)
+        self.assertTrue(clients[2].client.close.called)
+
+    @mock.patch('st2common.util.ssh.SSHClient')
+    def test_idle_and_disconnected_clients_are_closed(self, mock_ssh_client):
+        cache = SSHClientCache(max_idle_time=60)
+        idle_client = self._get_client()
+        disconnected_client = self._get_client(connected=False)
+
+        with mock.patch('st2common.util.ssh.time.time', mock.Mock(return_value=0)):
+            cache.release_client(idle_client, host='host1')
+            cache.release_client(disconnected_client, host='host2')
+
+        self.assertTrue(disconnected_client.client.close.called)
+
+        with mock.patch('st2common.util.ssh.time.time', mock.Mock(return_value=61)):
+            client = cache.acquire_client(host='host1')
+
+        self.assertTrue(idle_client.client.close.called)
+        self.assertTrue(client is mock_ssh_client.return_value)
@@ -14,11 +14,19 @@
 # limitations under the License.
 
 import os
+import shutil
+import tempfile
 from unittest2 import TestCase
 
+import eventlet
 import mock
+from oslo.config import cfg
+from six.moves import StringIO
 
 from st2actions.runners import pythonrunner
+from st2actions.runners import python_worker_pool
+from st2actions.runners.python_action_worker import PythonActionWorker
+from st2actions.runners.python_worker_pool import PythonActionWorkerPool
 from st2actions.container import service
 from st2common.constants.action import ACTION_OUTPUT_RESULT_DELIMITER
 from st2common.constants.action import LIVEACTION_STATUS_SUCCEEDED, LIVEACTION_STATUS_FAILED
@@ -96,9 +104,7 @@ class PythonRunnerTestCase(TestCase):
     def test_action_with_user_supplied_env_vars(self, mock_popen):
         env_vars = {'key1': 'val1', 'key2': 'val2', 'PYTHONPATH': 'foobar'}
 
-        mock_process = mock.Mock()
-        mock_process.communicate.return_value = ('', '')
-        mock_popen.return_value = mock_process
+        mock_popen.return_value = self._get_mock_process(stdout='', stderr='')
 
         runner = pythonrunner.get_runner()
         runner.action = self._get_mock_action_obj()
@@ -125,10 +131,7 @@ class PythonRunnerTestCase(TestCase):
         # No output to stdout and no result (implicit None)
         mock_stdout = '%(delimiter)sNone%(delimiter)s' % values
         mock_stderr = 'foo stderr'
-        mock_process = mock.Mock()
-        mock_process.communicate.return_value = (mock_stdout, mock_stderr)
-        mock_process.returncode = 0
-        mock_popen.return_value = mock_process
+        mock_popen.return_value = self._get_mock_process(stdout=mock_stdout, stderr=mock_stderr)
 
         runner = pythonrunner.get_runner()
         runner.action = self._get_mock_action_obj()
@@ -146,10 +149,7 @@ class PythonRunnerTestCase(TestCase):
         # Output to stdout and no result (implicit None)
         mock_stdout = 'pre result%(delimiter)sNone%(delimiter)spost result' % values
         mock_stderr = 'foo stderr'
-        mock_process = mock.Mock()
-        mock_process.communicate.return_value = (mock_stdout, mock_stderr)
-        mock_process.returncode = 0
-        mock_popen.return_value = mock_process
+        mock_popen.return_value = self._get_mock_process(stdout=mock_stdout, stderr=mock_stderr)
 
         runner = pythonrunner.get_runner()
         runner.action = self._get_mock_action_obj()
@@ -164,6 +164,191 @@ class PythonRunnerTestCase(TestCase):
         self.assertEqual(output['result'], 'None')
         self.assertEqual(output['exit_code'], 0)
 
+    @mock.patch('st2actions.runners.pythonrunner.subprocess.Popen')
+    def test_result_is_retained_when_stdout_is_truncated(self, mock_popen):
+        cfg.CONF.set_override(name='max_bytes', override=100, group='action_output')
+        self.addCleanup(cfg.CONF.clear_override, 'max_bytes', group='action_output')
+
+        values = {'delimiter': ACTION_OUTPUT_RESULT_DELIMITER, 'log': 'a' * 10000}
+        mock_stdout = '%(log)s%(delimiter)s{"key": "value"}%(delimiter)s' % values
+        mock_popen.return_value = self._get_mock_process(stdout=mock_stdout, stderr='')
+
+        runner = pythonrunner.get_runner()
+        runner.action = self._get_mock_action_obj()
+        runner.runner_parameters = {}
+        runner.entry_point = PACAL_ROW_ACTION_PATH
+        runner.container_service = service.RunnerContainerService()
+        runner.pre_run()
+        (_, output, _) = runner.run({'row_index': 4})
+
+        self.assertEqual(output['result'], {'key': 'value'})
+        self.assertTrue(output['stdout_truncated'])
+        self.assertEqual(output['stdout_size'], 10000)
+        self.assertTrue(ACTION_OUTPUT_RESULT_DELIMITER not in output['stdout'])
+
+    def test_simple_action_worker_pool(self):
+        cfg.CONF.set_override(name='worker_pool_enable', override=True, group='python_runner')
+        self.addCleanup(cfg.CONF.clear_override, 'worker_pool_enable', group='python_runner')
+
+        worker_pool = PythonActionWorkerPool(pool_size=1)
+        self.addCleanup(worker_pool.shutdown)
+
+        with mock.patch('st2actions.runners.pythonrunner.get_worker_pool',
+                        mock.Mock(return_value=worker_pool)):
+            for row_index, expected_result in [(4, [1, 4, 6, 4, 1]), (2, [1, 2, 1])]:
+                runner = pythonrunner.get_runner()
+                runner.action = self._get_mock_action_obj()
+                runner.runner_parameters = {}
+                runner.entry_point = PACAL_ROW_ACTION_PATH
+                runner.container_service = service.RunnerContainerService()
+                runner.pre_run()
+                (status, result, _) = runner.run({'row_index': row_index})
+                self.assertEqual(status, LIVEACTION_STATUS_SUCCEEDED)
+                self.assertEqual(result['result'], expected_result)
+
+        # Both runs used the same worker process
+        workers = list(worker_pool._idle_workers.values())
+        self.assertEqual(len(workers), 1)
+        self.assertEqual(len(workers[0]), 1)
+        self.assertEqual(workers[0][0].requests, 2)
+
+    @mock.patch('st2actions.runners.python_action_worker.config', mock.Mock())
+    def test_action_worker_caches_action_class(self):
+        worker = PythonActionWorker(pack=SYSTEM_PACK_NAME)
+
+        response = worker.handle_request(file_path=PACAL_ROW_ACTION_PATH,
+                                         parameters={'row_index': 4}, env={'ST2_TEST': '1'})
+        self.assertEqual(response['exit_code'], 0)
+        self.assertEqual(response['result'], [1, 4, 6, 4, 1])
+        self.assertTrue('ST2_TEST' not in os.environ)
+
+        with mock.patch('st2actions.runners.python_action_worker.action_loader') as mock_loader:
+            response = worker.handle_request(file_path=PACAL_ROW_ACTION_PATH,
+                                             parameters={'row_index': 2})
+            self.assertFalse(mock_loader.register_plugin.called)
+
+        self.assertEqual(response['result'], [1, 2, 1])
+
+        response = worker.handle_request(file_path=PACAL_ROW_ACTION_PATH,
+                                         parameters={'row_index': '4'})
+        self.assertEqual(response['exit_code'], 1)
+        self.assertTrue('Traceback' in response['stderr'])
+
+    def test_worker_pool_replaces_worker_after_max_requests(self):
+        cfg.CONF.set_override(name='worker_pool_enable', override=True, group='python_runner')
+        self.addCleanup(cfg.CONF.clear_override, 'worker_pool_enable', group='python_runner')
+
+        worker_pool = PythonActionWorkerPool(pool_size=1, max_requests=2)
+        self.addCleanup(worker_pool.shutdown)
+
+        def get_idle_workers():
+            return [worker for workers in worker_pool._idle_workers.values()
+                    for worker in workers]
+
+        idle_workers = []
+        with mock.patch('st2actions.runners.pythonrunner.get_worker_pool',
+                        mock.Mock(return_value=worker_pool)):
+            for _ in range(3):
+                runner = pythonrunner.get_runner()
+                runner.action = self._get_mock_action_obj()
+                runner.runner_parameters = {}
+                runner.entry_point = PACAL_ROW_ACTION_PATH
+                runner.container_service = service.RunnerContainerService()
+                runner.pre_run()
+                (status, result, _) = runner.run({'row_index': 2})
+                self.assertEqual(status, LIVEACTION_STATUS_SUCCEEDED)
+                self.assertEqual(result['result'], [1, 2, 1])
+                idle_workers.append(get_idle_workers())
+
+        # Worker is not returned to the pool after the second request and the third request is
+        # handled by a new worker
+        self.assertEqual(len(idle_workers[0]), 1)
+        first_worker = idle_workers[0][0]
+        self.assertEqual(idle_workers[1], [])
+        self.assertEqual(len(idle_workers[2]), 1)
+        self.assertTrue(idle_workers[2][0] is not first_worker)
+        self.assertEqual(idle_workers[2][0].requests, 1)
+        self.assertEqual(first_worker.process.wait(), 0)
+
+    def test_worker_pool_kills_worker_on_timeout(self):
+        worker_pool = PythonActionWorkerPool(pool_size=1)
+        worker = mock.Mock()
+        worker.execute.side_effect = eventlet.Timeout()
+
+        with mock.patch.object(worker_pool, '_acquire', mock.Mock(return_value=worker)):
+            self.assertRaises(eventlet.Timeout, worker_pool.execute, pack='pack',
+                              python_path='python', worker_env={}, file_path='action.py',
+                              timeout=1)
+
+        self.assertTrue(worker.kill.called)
+        self.assertEqual(worker_pool._idle_workers, {})
+
+    def test_worker_pool_shutdown_stops_idle_and_kills_busy_workers(self):
+        idle_worker = mock.Mock()
+        busy_worker = mock.Mock()
+
+        def execute(**kwargs):
+            python_worker_pool.shutdown_worker_pool()
+            return {}
+
+        busy_worker.execute.side_effect = execute
+
+        worker_pool = python_worker_pool.get_worker_pool()
+        worker_pool._idle_workers[('pack', 'python')] = [idle_worker]
+
+        with mock.patch.object(worker_pool, '_acquire', mock.Mock(return_value=busy_worker)):
+            worker_pool.execute(pack='other', python_path='python', worker_env={},
+                                file_path='action.py')
+
+        self.assertTrue(idle_worker.stop.called)
+        self.assertTrue(busy_worker.kill.called)
+        self.assertFalse(python_worker_pool.get_worker_pool() is worker_pool)
+
+    @mock.patch('st2actions.runners.python_action_worker.config', mock.Mock())
+    def test_action_worker_exit_code(self):
+        worker = PythonActionWorker(pack=SYSTEM_PACK_NAME)
+
+        for exit_arg, expected_exit_code in [(None, 0), (0, 0), (3, 3), ('failed', 1)]:
+            action = mock.Mock()
+            action.logger.handlers = []
+            action.run.side_effect = SystemExit(exit_arg)
+
+            with mock.patch.object(worker, '_get_action_instance',
+                                   mock.Mock(return_value=action)):
+                response = worker.handle_request(file_path=PACAL_ROW_ACTION_PATH)
+
+            self.assertEqual(response['exit_code'], expected_exit_code)
+
+        self.assertEqual(response['stderr'], 'failed\n')
+
+    @mock.patch('st2actions.runners.python_action_worker.config', mock.Mock())
+    def test_action_worker_config_is_copied(self):
+        config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, config_dir)
+        config_path = os.path.join(config_dir, 'config.yaml')
+        open(config_path, 'w').close()
+
+        worker = PythonActionWorker(pack=SYSTEM_PACK_NAME)
+        worker._config_parser = mock.Mock()
+        worker._config_parser.get_global_config_path.return_value = config_path
+        worker._config_parser.get_and_parse_config.return_value = mock.Mock(
+            config={'hosts': ['a']})
+
+        action_config = worker._get_action_config(file_path=PACAL_ROW_ACTION_PATH)
+        action_config['hosts'].append('b')
+
+        self.assertEqual(worker._get_action_config(file_path=PACAL_ROW_ACTION_PATH),
+                         {'hosts': ['a']})
+        self.assertEqual(worker._config_parser.get_and_parse_config.call_count, 1)
+
+    def _get_mock_process(self, stdout, stderr, exit_code=0):
+        mock_process = mock.Mock()
+        mock_process.stdout = StringIO(stdout)
+        mock_process.stderr = StringIO(stderr)
+        mock_process.wait.return_value = exit_code
+        mock_process.returncode = exit_code
+        return mock_process
+
     def _get_mock_action_obj(self):
         """
         Return mock action object.
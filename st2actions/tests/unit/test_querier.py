@@ -0,0 +1,84 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import eventlet
+import mock
+import unittest2
+
+from st2actions.query.base import Querier, QueryContext
+
+
+class DummyQuerier(Querier):
+    def query(self, execution_id, query_context):
+        return None
+
+
+def _get_query_context(index):
+    return QueryContext(obj_id='state%s' % index, execution_id='liveaction%s' % index,
+                        query_context={}, query_module='dummy')
+
+
+class QuerierSchedulingTest(unittest2.TestCase):
+
+    def _get_querier(self, **kwargs):
+        return DummyQuerier(container_service=mock.Mock(), **kwargs)
+
+    @mock.patch('st2actions.query.base.time.time', mock.Mock(return_value=100))
+    @mock.patch.object(DummyQuerier, '_query_and_save_results')
+    def test_fire_only_due_queries(self, mock_query_and_save_results):
+        querier = self._get_querier(query_interval=10)
+        context1, context2 = _get_query_context(1), _get_query_context(2)
+        querier._schedule_query(context1, due_time=150)
+        querier._schedule_query(context2, due_time=50)
+
+        querier._fire_queries()
+        querier._thread_pool.waitall()
+
+        mock_query_and_save_results.assert_called_once_with(context2)
+        self.assertEqual(querier.get_pending_queries_count(), 1)
+
+    @mock.patch('st2actions.query.base.time.time', mock.Mock(return_value=100))
+    def test_reschedule_query_backoff(self):
+        querier = self._get_querier(query_interval=2, max_query_interval=5, backoff_factor=2)
+        context = _get_query_context(1)
+        querier.add_queries(query_contexts=[context])
+        querier._query_contexts = []
+
+        due_times = []
+        for _ in range(4):
+            querier._reschedule_query(context)
+            due_times.append(querier._query_contexts.pop()[0])
+
+        self.assertEqual(due_times, [102, 104, 105, 105])
+
+        querier._forget_query(context)
+        self.assertEqual(querier._query_intervals, {})
+
+    def test_no_backoff_by_default(self):
+        querier = self._get_querier(query_interval=3)
+        context = _get_query_context(1)
+        querier.add_queries(query_contexts=[context])
+        querier._reschedule_query(context)
+        querier._reschedule_query(context)
+        self.assertEqual(querier._query_intervals[context.id], 3)
+
+    def test_wait_for_due_queries_wakes_up_on_new_query(self):
+        querier = self._get_querier(empty_q_sleep_time=60)
+        eventlet.spawn_after(0.01, querier.add_queries, [_get_query_context(1)])
+
+        with eventlet.Timeout(5):
+            querier._wait_for_due_queries()
+
+        self.assertEqual(querier.get_pending_queries_count(), 1)
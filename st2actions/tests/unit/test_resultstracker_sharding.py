@@ -0,0 +1,112 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bson
+import mock
+import unittest2
+
+from st2actions.resultstracker import (ResultsTracker, ActionStateQueueConsumer,
+                                       ACTIONSTATE_WORK_Q, get_shard)
+from st2common.models.db.action import ActionExecutionStateDB
+
+EXECUTION_IDS = [str(bson.ObjectId()) for _ in range(30)]
+
+
+def _get_state_db(execution_id):
+    return ActionExecutionStateDB(id=bson.ObjectId(), execution_id=execution_id,
+                                  query_context={'id': 'foo'},
+                                  query_module='tests.resources.test_querymodule')
+
+
+class ResultsTrackerShardingTest(unittest2.TestCase):
+
+    def test_get_shard(self):
+        for execution_id in EXECUTION_IDS:
+            self.assertEqual(get_shard(execution_id, 1), 0)
+            shard = get_shard(execution_id, 3)
+            self.assertTrue(0 <= shard < 3)
+            # Shard assignment is stable
+            self.assertEqual(get_shard(execution_id, 3), shard)
+
+    def test_each_execution_owned_by_exactly_one_tracker(self):
+        trackers = [ResultsTracker(shard_index=index, shard_count=3) for index in range(3)]
+
+        for execution_id in EXECUTION_IDS:
+            owners = [tracker for tracker in trackers if tracker.owns(execution_id)]
+            self.assertEqual(len(owners), 1)
+
+    def test_invalid_shard_index(self):
+        self.assertRaises(ValueError, ResultsTracker, shard_index=3, shard_count=3)
+        self.assertRaises(ValueError, ResultsTracker, shard_index=0, shard_count=0)
+
+    def test_work_queue_per_shard(self):
+        tracker = ResultsTracker()
+        self.assertEqual(tracker._queue_consumer._queue, ACTIONSTATE_WORK_Q)
+
+        tracker = ResultsTracker(shard_index=1, shard_count=2)
+        self.assertEqual(tracker._queue_consumer._queue.name, 'st2.resultstracker.work.1')
+
+    @mock.patch('st2actions.resultstracker.ActionExecutionState.get_all')
+    @mock.patch.object(ResultsTracker, 'get_querier')
+    def test_bootstrap_only_own_shard(self, mock_get_querier, mock_get_all):
+        mock_get_all.return_value = [_get_state_db(execution_id)
+                                     for execution_id in EXECUTION_IDS]
+        tracker = ResultsTracker(shard_index=1, shard_count=3)
+
+        tracker._bootstrap()
+
+        querier = mock_get_querier.return_value
+        contexts = querier.add_queries.call_args[1]['query_contexts']
+        expected = [execution_id for execution_id in EXECUTION_IDS
+                    if get_shard(execution_id, 3) == 1]
+        self.assertEqual([context.execution_id for context in contexts], expected)
+
+    @mock.patch.object(ResultsTracker, 'get_querier')
+    def test_new_states_routed_to_owning_shard(self, mock_get_querier):
+        trackers = [ResultsTracker(shard_index=index, shard_count=2) for index in range(2)]
+        state_db = _get_state_db(EXECUTION_IDS[0])
+
+        for tracker in trackers:
+            ActionStateQueueConsumer(None, tracker)._add_to_querier(state_db)
+
+        querier = mock_get_querier.return_value
+        self.assertEqual(querier.add_queries.call_count, 1)
+        self.assertEqual(mock_get_querier.call_count, 1)
+
+    def test_setup_queues_unbinds_unsharded_queue(self):
+        connection = mock.Mock()
+        channel = connection.channel.return_value
+        tracker = ResultsTracker(q_connection=connection, shard_index=1, shard_count=2)
+
+        tracker._setup_queues()
+
+        declared = [call[1]['queue'] for call in channel.queue_declare.call_args_list]
+        self.assertEqual(declared, ['st2.resultstracker.work.1'])
+        self.assertEqual(channel.queue_unbind.call_count, 1)
+        unbind_kwargs = channel.queue_unbind.call_args[1]
+        self.assertEqual(unbind_kwargs['queue'], 'st2.resultstracker.work')
+        self.assertEqual(unbind_kwargs['exchange'], ACTIONSTATE_WORK_Q.exchange.name)
+        self.assertEqual(unbind_kwargs['routing_key'], ACTIONSTATE_WORK_Q.routing_key)
+
+    def test_setup_queues_unsharded(self):
+        connection = mock.Mock()
+        channel = connection.channel.return_value
+        tracker = ResultsTracker(q_connection=connection)
+
+        tracker._setup_queues()
+
+        declared = [call[1]['queue'] for call in channel.queue_declare.call_args_list]
+        self.assertEqual(declared, ['st2.resultstracker.work'])
+        self.assertFalse(channel.queue_unbind.called)
@@ -26,14 +26,14 @@ from st2common.exceptions.actionrunner import ActionRunnerException
 from st2common.models.db.action import LiveActionDB
 from st2common.models.system.common import ResourceReference
 from st2common.persistence import action
-from st2common.services import executions
+from st2common.persistence.execution import ActionExecution
 from st2common.transport.publishers import PoolPublisher
 from st2common.util.action_db import get_liveaction_by_id
 from st2tests.base import DbTestCase
 
 
 @mock.patch.object(PoolPublisher, 'publish', mock.MagicMock())
-@mock.patch.object(executions, 'update_execution', mock.MagicMock())
+@mock.patch.object(ActionExecution, 'update_fields', mock.MagicMock())
 class TestWorker(DbTestCase):
 
     @mock.patch.object(RunnerContainer, 'dispatch', mock.MagicMock())
@@ -36,7 +36,7 @@ from oslo.config import cfg
 
 from st2common.models.api.action import LiveActionAPI
 from st2common.models.api.execution import ActionExecutionAPI
-from st2common.transport import liveaction, execution, publishers
+from st2common.transport import liveaction, execution, publishers, serialization
 from st2common import log as logging
 
 __all__ = [
@@ -65,14 +65,14 @@ class Listener(ConsumerMixin):
         return [
             consumer(queues=[execution.get_queue(routing_key=publishers.ANY_RK,
                                                  exclusive=True)],
-                     accept=['pickle'],
+                     accept=serialization.ACCEPT_CONTENT,
                      callbacks=[self.processor(ActionExecutionAPI)]),
 
             consumer(queues=[Queue(None,
                                    liveaction.LIVEACTION_XCHG,
                                    routing_key=publishers.ANY_RK,
                                    exclusive=True)],
-                     accept=['pickle'],
+                     accept=serialization.ACCEPT_CONTENT,
                      callbacks=[self.processor(LiveActionAPI)])
         ]
 
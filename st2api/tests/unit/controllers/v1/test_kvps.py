@@ -13,6 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import mock
+
+from st2common.transport.publishers import PoolPublisher
 from tests import FunctionalTest
 
 KVP = {
@@ -32,6 +35,7 @@ KVP_WITH_TTL = {
 }
 
 
+@mock.patch.object(PoolPublisher, 'publish', mock.MagicMock())
 class TestKeyValuePairController(FunctionalTest):
 
     def test_get_all(self):
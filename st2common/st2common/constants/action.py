@@ -25,6 +25,7 @@ __all__ = [
     'LIVEACTION_STATUS_FAILED',
 
     'LIVEACTION_STATUSES',
+    'LIVEACTION_COMPLETED_STATES',
 
     'ACTION_OUTPUT_RESULT_DELIMITER'
 ]
@@ -45,4 +46,6 @@ LIVEACTION_STATUSES = [LIVEACTION_STATUS_SCHEDULED,
                        LIVEACTION_STATUS_RUNNING, LIVEACTION_STATUS_SUCCEEDED,
                        LIVEACTION_STATUS_FAILED]
 
+LIVEACTION_COMPLETED_STATES = [LIVEACTION_STATUS_SUCCEEDED, LIVEACTION_STATUS_FAILED]
+
 ACTION_OUTPUT_RESULT_DELIMITER = '%%%%%~=~=~=************=~=~=~%%%%'
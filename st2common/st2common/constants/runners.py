@@ -21,6 +21,11 @@ __all__ = [
     'FABRIC_RUNNER_DEFAULT_ACTION_TIMEOUT',
     'FABRIC_RUNNER_DEFAULT_REMOTE_DIR',
 
+    'PARAMIKO_RUNNER_DEFAULT_ACTION_TIMEOUT',
+    'PARAMIKO_RUNNER_DEFAULT_CONCURRENCY',
+    'PARAMIKO_RUNNER_MAX_IDLE_CONNECTIONS',
+    'PARAMIKO_RUNNER_CONNECTION_IDLE_TIMEOUT',
+
     'PYTHON_RUNNER_DEFAULT_ACTION_TIMEOUT'
 ]
 
@@ -35,6 +40,15 @@ try:
 except:
     FABRIC_RUNNER_DEFAULT_REMOTE_DIR = '/tmp'
 
+# Remote (paramiko runner)
+PARAMIKO_RUNNER_DEFAULT_ACTION_TIMEOUT = 60
+# Maximum number of hosts the command runs on at the same time
+PARAMIKO_RUNNER_DEFAULT_CONCURRENCY = 50
+# Maximum number of idle SSH connections which are kept open for reuse
+PARAMIKO_RUNNER_MAX_IDLE_CONNECTIONS = 100
+# Number of seconds after which an idle SSH connection is closed
+PARAMIKO_RUNNER_CONNECTION_IDLE_TIMEOUT = 5 * 60
+
 # Python runner
 # Default timeout (in seconds) for actions executed by Python runner
 PYTHON_RUNNER_DEFAULT_ACTION_TIMEOUT = 10 * 60
@@ -129,10 +129,51 @@ class MongoDBAccess(object):
                 setattr(instance, attr, field.to_python(value))
         return instance
 
+    def insert(self, instances):
+        return self.model.objects.insert(instances, load_bulk=False)
+
+    def update_fields(self, query, fields, return_document=False):
+        """
+        Update only the provided fields of a single document using a $set update.
+
+        :param query: Raw query which identifies the document (e.g. {'_id': ObjectId(...)}).
+        :type query: ``dict``
+
+        :param fields: Field values keyed by field name. Items of dict fields can be referenced
+                       using a dot notation (e.g. context.user).
+        :type fields: ``dict``
+
+        :param return_document: True to return the updated document.
+        :type return_document: ``bool``
+        """
+        update = {'$set': self._to_mongo_fields(fields)}
+        collection = self.model._get_collection()
+
+        if not return_document:
+            collection.update(query, update)
+            return None
+
+        document = collection.find_and_modify(query=query, update=update, new=True)
+        return self.model._from_son(document) if document else None
+
     @staticmethod
     def delete(instance):
         instance.delete()
 
+    def _to_mongo_fields(self, fields):
+        result = {}
+        for name, value in six.iteritems(fields):
+            path = name.split('.', 1)
+            field = self.model._fields[path[0]]
+            path[0] = field.db_field
+
+            if value is not None:
+                # Conversion of some fields (e.g. escaping) modifies the value in place
+                value = field.to_mongo(copy.deepcopy(value))
+
+            result['.'.join(path)] = value
+        return result
+
     def _process_null_filters(self, filters):
         result = copy.deepcopy(filters)
 
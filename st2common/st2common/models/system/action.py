@@ -14,6 +14,7 @@
 # limitations under the License.
 
 import os
+import re
 import pwd
 import pipes
 import six
@@ -38,13 +39,27 @@ __all__ = [
     'RemoteScriptAction',
     'ParamikoSSHCommandAction',
     'FabricRemoteAction',
-    'FabricRemoteScriptAction'
+    'FabricRemoteScriptAction',
+
+    'is_valid_env_var_name'
 ]
 
 LOG = logging.getLogger(__name__)
 
 LOGGED_USER_USERNAME = pwd.getpwuid(os.getuid())[0]
 
+# Names of the environment variables which are exported in the shell on the remote host
+ENV_VAR_NAME_REGEX = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*\Z')
+
+
+def is_valid_env_var_name(name):
+    """
+    Return True if the provided name can be used as a shell environment variable name.
+
+    :rtype: ``bool``
+    """
+    return bool(ENV_VAR_NAME_REGEX.match(str(name)))
+
 
 class ShellCommandAction(object):
     def __init__(self, name, action_exec_id, command, user, env_vars=None, sudo=False,
@@ -330,7 +345,46 @@ class RemoteScriptAction(ShellScriptAction):
 
 
 class ParamikoSSHCommandAction(SSHCommandAction):
-    pass
+    KEYS_TO_TRANSFORM = ['stdout', 'stderr']
+
+    def get_full_command_string(self):
+        """
+        Return the command which is executed on the remote host. Environment variables and the
+        working directory are part of the command since they can't be set on a paramiko channel.
+
+        :rtype: ``str``
+        """
+        parts = []
+
+        if self.env_vars:
+            for key in self.env_vars:
+                if not is_valid_env_var_name(key):
+                    raise ValueError('Invalid environment variable name "%s"' % (key))
+
+            env_vars = ['%s=%s' % (key, pipes.quote(str(value)))
+                        for key, value in sorted(six.iteritems(self.env_vars))]
+            parts.append('export %s' % (' '.join(env_vars)))
+
+        if self.cwd:
+            parts.append('cd %s' % (pipes.quote(self.cwd)))
+
+        parts.append(self.command)
+        command = ' && '.join(parts)
+
+        # Note: We pass -E to sudo because we want to preserve user provided
+        # environment variables
+        if self.sudo:
+            command = 'sudo -E -- bash -c %s' % (pipes.quote(command))
+
+        return command
+
+    def get_error_result(self):
+        """
+        Return a structured error result for the exception which is currently being handled.
+
+        :rtype: ``dict``
+        """
+        return self._get_error_result()
 
 
 class FabricRemoteAction(RemoteAction):
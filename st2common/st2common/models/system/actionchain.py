@@ -36,14 +36,51 @@ class Node(object):
             },
             "ref": {
                 "type": "string",
-                "description": "Ref of the action to be executed.",
-                "required": True
+                "description": "Ref of the action to be executed. Required unless parallel is"
+                               " specified."
             },
             "params": {
                 "type": "object",
                 "description": "Parameter for the execution.",
                 "default": {}
             },
+            "parallel": {
+                "description": "Tasks which are executed concurrently instead of a single action."
+                               " Results are available under each task name once all the tasks"
+                               " have completed.",
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {
+                            "description": "The name of this task.",
+                            "type": "string",
+                            "required": True
+                        },
+                        "ref": {
+                            "type": "string",
+                            "description": "Ref of the action to be executed.",
+                            "required": True
+                        },
+                        "params": {
+                            "type": "object",
+                            "description": "Parameter for the execution.",
+                            "default": {}
+                        },
+                        "notify": {
+                            "description": "Notification settings for action.",
+                            "type": "object"
+                        }
+                    },
+                    "additionalProperties": False
+                }
+            },
+            "concurrency": {
+                "description": "Maximum number of parallel tasks which run at the same time. All"
+                               " the tasks run at the same time if not specified.",
+                "type": "integer",
+                "minimum": 1
+            },
             "on-success": {
                 "type": "string",
                 "description": "Name of the node to invoke on successful completion of action"
@@ -88,6 +125,13 @@ class Node(object):
             prop = string.replace(prop, '-', '_')
             setattr(self, prop, value)
 
+        if bool(self.ref) == bool(self.parallel):
+            raise ValueError('Node "%s" needs to specify either "ref" or "parallel".' %
+                             (self.name))
+
+        if self.parallel:
+            self.parallel = [Node(**task) for task in self.parallel]
+
 
 class ActionChain(object):
 
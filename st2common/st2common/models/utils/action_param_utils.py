@@ -79,12 +79,22 @@ def get_params_view(action_db=None, runner_db=None, merged_only=False):
     return (required_params, optional_params, immutable_params)
 
 
-def cast_params(action_ref, params):
+def cast_params(action_ref, params, action_db=None, runnertype_db=None):
     """
+    Cast action parameters to the types declared in the action and runner parameters schema.
+
+    :param action_db: Action for the provided reference. If not provided, it's retrieved from
+                      the database.
+    :type action_db: :class:`ActionDB`
+
+    :param runnertype_db: Runner type of the action. If not provided, it's retrieved from the
+                          database.
+    :type runnertype_db: :class:`RunnerTypeDB`
     """
-    action_db = action_db_util.get_action_by_ref(action_ref)
+    action_db = action_db or action_db_util.get_action_by_ref(action_ref)
     action_parameters_schema = action_db.parameters
-    runnertype_db = action_db_util.get_runnertype_by_name(action_db.runner_type['name'])
+    runnertype_db = runnertype_db or \
+        action_db_util.get_runnertype_by_name(action_db.runner_type['name'])
     runner_parameters_schema = runnertype_db.runner_parameters
     # combine into 1 list of parameter schemas
     parameters_schema = {}
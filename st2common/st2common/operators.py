@@ -14,6 +14,7 @@
 # limitations under the License.
 
 import re
+import six
 
 from datetime import datetime
 
@@ -116,7 +117,11 @@ def greater_than(value, criteria_pattern):
 def match_regex(value, criteria_pattern):
     if criteria_pattern is None:
         return False
-    regex = re.compile(criteria_pattern)
+    # pattern can already be compiled (e.g. by the rules engine when a rule is loaded)
+    if isinstance(criteria_pattern, six.string_types):
+        regex = re.compile(criteria_pattern)
+    else:
+        regex = criteria_pattern
     # check for a match and not for details of the match.
     return regex.match(value) is not None
 
@@ -24,11 +24,18 @@ from st2common.persistence.base import (Access, ContentPackResource)
 
 class RunnerType(Access):
     impl = runnertype_access
+    publisher = None
 
     @classmethod
     def _get_impl(cls):
         return cls.impl
 
+    @classmethod
+    def _get_publisher(cls):
+        if not cls.publisher:
+            cls.publisher = transport.action.RunnerTypeCUDPublisher(cfg.CONF.messaging.url)
+        return cls.publisher
+
     @classmethod
     def _get_by_object(cls, object):
         # For RunnerType name is unique.
@@ -38,11 +45,18 @@ class RunnerType(Access):
 
 class Action(ContentPackResource):
     impl = action_access
+    publisher = None
 
     @classmethod
     def _get_impl(cls):
         return cls.impl
 
+    @classmethod
+    def _get_publisher(cls):
+        if not cls.publisher:
+            cls.publisher = transport.action.ActionCUDPublisher(cfg.CONF.messaging.url)
+        return cls.publisher
+
 
 class LiveAction(Access):
     impl = liveaction_access
@@ -99,6 +99,24 @@ class Access(object):
 
         return model_object
 
+    @classmethod
+    def insert_many(cls, model_objects):
+        """
+        Insert multiple new objects using a single bulk insert.
+
+        Note: CUD events are not published for the inserted objects.
+        """
+        return cls._get_impl().insert(model_objects)
+
+    @classmethod
+    def update_fields(cls, query, fields, return_document=False):
+        """
+        Update only the provided fields of a single object using a targeted update.
+
+        Note: CUD events are not published, the caller is responsible for publishing.
+        """
+        return cls._get_impl().update_fields(query, fields, return_document=return_document)
+
     @classmethod
     def delete(cls, model_object, publish=True):
         persisted_object = cls._get_impl().delete(model_object)
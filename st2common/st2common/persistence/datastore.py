@@ -13,17 +13,27 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from oslo.config import cfg
+
+from st2common import transport
 from st2common.persistence.base import Access
 from st2common.models.db import datastore
 
 
 class KeyValuePair(Access):
     IMPL = datastore.keyvaluepair_access
+    publisher = None
 
     @classmethod
     def _get_impl(cls):
         return cls.IMPL
 
+    @classmethod
+    def _get_publisher(cls):
+        if not cls.publisher:
+            cls.publisher = transport.datastore.KeyValuePairCUDPublisher(cfg.CONF.messaging.url)
+        return cls.publisher
+
     @classmethod
     def _get_by_object(cls, object):
         # For KeyValuePair name is unique.
@@ -70,11 +70,18 @@ class TriggerInstance(Access):
 
 class Rule(Access):
     impl = rule_access
+    publisher = None
 
     @classmethod
     def _get_impl(cls):
         return cls.impl
 
+    @classmethod
+    def _get_publisher(cls):
+        if not cls.publisher:
+            cls.publisher = transport.reactor.RuleCUDPublisher(cfg.CONF.messaging.url)
+        return cls.publisher
+
     @classmethod
     def _get_by_object(cls, object):
         # For Rule name is unique.
@@ -34,10 +34,18 @@ def _get_immutable_params(parameters):
     return [k for k, v in six.iteritems(parameters) if v.get('immutable', False)]
 
 
-def schedule(liveaction):
+def schedule(liveaction, action_db=None, runnertype_db=None):
     """
     Schedule an action to be run.
 
+    :param action_db: Action referenced by the liveaction. If not provided, it's retrieved from
+                      the database.
+    :type action_db: :class:`ActionDB`
+
+    :param runnertype_db: Runner type of the action. If not provided, it's retrieved from the
+                          database.
+    :type runnertype_db: :class:`RunnerTypeDB`
+
     :return: (liveaction, execution)
     :rtype: tuple
     """
@@ -49,13 +57,14 @@ def schedule(liveaction):
         liveaction.context['user'] = getattr(parent, 'context', dict()).get('user')
 
     # Validate action.
-    action_db = action_utils.get_action_by_ref(liveaction.action)
+    action_db = action_db or action_utils.get_action_by_ref(liveaction.action)
     if not action_db:
         raise ValueError('Action "%s" cannot be found.' % liveaction.action)
     if not action_db.enabled:
         raise ValueError('Unable to execute. Action "%s" is disabled.' % liveaction.action)
 
-    runnertype_db = action_utils.get_runnertype_by_name(action_db.runner_type['name'])
+    runnertype_db = runnertype_db or \
+        action_utils.get_runnertype_by_name(action_db.runner_type['name'])
 
     if not hasattr(liveaction, 'parameters'):
         liveaction.parameters = dict()
@@ -88,7 +97,9 @@ def schedule(liveaction):
     liveaction.start_timestamp = isotime.add_utc_tz(datetime.datetime.utcnow())
     # Publish creation after both liveaction and actionexecution are created.
     liveaction = LiveAction.add_or_update(liveaction, publish=False)
-    execution = executions.create_execution_object(liveaction, publish=False)
+    execution = executions.create_execution_object(liveaction, publish=False,
+                                                   action_db=action_db,
+                                                   runnertype_db=runnertype_db)
     # assume that this is a creation.
     LiveAction.publish_create(liveaction)
     ActionExecution.publish_create(execution)
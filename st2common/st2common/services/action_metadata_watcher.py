@@ -0,0 +1,138 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import eventlet
+import uuid
+from kombu.mixins import ConsumerMixin
+from kombu import Connection
+from oslo.config import cfg
+
+from st2common import log as logging
+from st2common.transport import action, serialization
+from st2common.util import action_db as action_db_util
+
+__all__ = [
+    'ActionMetadataWatcher',
+
+    'setup_metadata_cache',
+    'teardown_metadata_cache'
+]
+
+LOG = logging.getLogger(__name__)
+
+
+class ActionMetadataWatcher(ConsumerMixin):
+
+    def __init__(self, action_handler, runnertype_handler, queue_suffix=None):
+        """
+        :param action_handler: Function which is called on any ActionDB CUD event.
+        :type action_handler: ``callable``
+
+        :param runnertype_handler: Function which is called on any RunnerTypeDB CUD event.
+        :type runnertype_handler: ``callable``
+        """
+        self._action_handler = action_handler
+        self._runnertype_handler = runnertype_handler
+        self._action_watcher_q, self._runnertype_watcher_q = self._get_queues(queue_suffix)
+
+        self.connection = None
+        self._updates_thread = None
+
+    def get_consumers(self, Consumer, channel):
+        return [Consumer(queues=[self._action_watcher_q],
+                         accept=serialization.ACCEPT_CONTENT,
+                         callbacks=[self.process_action_task]),
+                Consumer(queues=[self._runnertype_watcher_q],
+                         accept=serialization.ACCEPT_CONTENT,
+                         callbacks=[self.process_runnertype_task])]
+
+    def process_action_task(self, body, message):
+        self._process_task(self._action_handler, body, message)
+
+    def process_runnertype_task(self, body, message):
+        self._process_task(self._runnertype_handler, body, message)
+
+    def start(self):
+        try:
+            self.connection = Connection(cfg.CONF.messaging.url)
+            self._updates_thread = eventlet.spawn(self.run)
+        except:
+            LOG.exception('Failed to start action metadata watcher.')
+            if self.connection:
+                self.connection.release()
+
+    def stop(self):
+        try:
+            if self._updates_thread:
+                self._updates_thread = eventlet.kill(self._updates_thread)
+        finally:
+            if self.connection:
+                self.connection.release()
+
+    @staticmethod
+    def _process_task(handler, body, message):
+        LOG.debug('process_task')
+        LOG.debug('     body: %s', body)
+        LOG.debug('     message.delivery_info: %s', message.delivery_info)
+
+        try:
+            handler(body)
+        except Exception as e:
+            LOG.exception('Handling failed. Message body: %s. Exception: %s', body, e.message)
+        finally:
+            message.ack()
+
+    @staticmethod
+    def _get_queues(queue_suffix):
+        if not queue_suffix:
+            # pick last 10 digits of uuid. Arbitrary but unique enough for the watcher.
+            u_hex = uuid.uuid4().hex
+            queue_suffix = uuid.uuid4().hex[len(u_hex) - 10:]
+        action_q = action.get_action_cud_queue('st2.action.watch.%s' % queue_suffix,
+                                               routing_key='#')
+        runnertype_q = action.get_runnertype_cud_queue('st2.runnertype.watch.%s' % queue_suffix,
+                                                       routing_key='#')
+        return action_q, runnertype_q
+
+
+def setup_metadata_cache():
+    """
+    Enable the process-wide action and runner type metadata cache (if enabled in the config) and
+    start a watcher which invalidates it.
+
+    :return: Started watcher or None if the cache is disabled. Watcher needs to be stopped on
+             shutdown.
+    :rtype: :class:`ActionMetadataWatcher`
+    """
+    if not cfg.CONF.action_metadata_cache.enable:
+        return None
+
+    cache = action_db_util.enable_metadata_cache()
+    watcher = ActionMetadataWatcher(action_handler=lambda _: cache.invalidate_actions(),
+                                    runnertype_handler=lambda _: cache.invalidate_runnertypes())
+    watcher.start()
+    return watcher
+
+
+def teardown_metadata_cache(watcher):
+    """
+    Stop the watcher returned by setup_metadata_cache and disable the cache.
+    """
+    if not watcher:
+        return
+
+    watcher.stop()
+    LOG.info('Action metadata cache stats: %s', action_db_util.get_metadata_cache().get_stats())
+    action_db_util.disable_metadata_cache()
@@ -0,0 +1,106 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import six
+
+from st2common import log as logging
+from st2common.constants.action import LIVEACTION_STATUSES
+from st2common.persistence.action import LiveAction
+from st2common.persistence.execution import ActionExecution
+
+__all__ = [
+    'update_status'
+]
+
+LOG = logging.getLogger(__name__)
+
+# LiveAction fields which are stored inside the "liveaction" attribute of the action execution
+# instead of at the top level.
+EXECUTION_LIVEACTION_FIELDS = ['runner_info']
+
+
+def update_status(liveaction_db, status, result=None, context=None, end_timestamp=None,
+                  runner_info=None, publish=True):
+    """
+    Transition the liveaction and the corresponding action execution to the provided status.
+
+    Only the changed fields are written to the database, using a single targeted update per
+    collection, and each object is published once.
+
+    :param liveaction_db: LiveAction to update. The object is updated in place.
+    :type liveaction_db: :class:`LiveActionDB`
+
+    :param status: New status.
+    :type status: ``str``
+
+    :param context: Items to add to the liveaction context.
+    :type context: ``dict``
+
+    :return: Tuple of updated liveaction and action execution. Action execution is None if it
+             doesn't exist.
+    :rtype: ``tuple`` of (:class:`LiveActionDB`, :class:`ActionExecutionDB`)
+    """
+    if status not in LIVEACTION_STATUSES:
+        raise ValueError('Attempting to set status for LiveAction "%s" '
+                         'to unknown status string. Unknown status is "%s"' %
+                         (liveaction_db, status))
+
+    LOG.debug('Updating LiveAction: "%s" with status="%s"', liveaction_db, status)
+
+    fields = {'status': status}
+
+    if result is not None:
+        fields['result'] = result
+
+    if end_timestamp:
+        fields['end_timestamp'] = end_timestamp
+
+    if runner_info:
+        fields['runner_info'] = runner_info
+
+    for name, value in six.iteritems(fields):
+        setattr(liveaction_db, name, value)
+
+    if context:
+        liveaction_db.context.update(context)
+        # Only the provided context items are written so items added by others are preserved
+        for name, value in six.iteritems(context):
+            fields['context.%s' % (name)] = value
+
+    LiveAction.update_fields({'_id': liveaction_db.id}, fields)
+
+    execution_fields = {}
+    for name, value in six.iteritems(fields):
+        if name in EXECUTION_LIVEACTION_FIELDS:
+            name = 'liveaction.%s' % (name)
+        execution_fields[name] = value
+
+    execution_db = ActionExecution.update_fields({'liveaction.id': str(liveaction_db.id)},
+                                                 execution_fields, return_document=True)
+
+    if not execution_db:
+        LOG.warning('Action execution for LiveAction "%s" not found.', liveaction_db.id)
+
+    if publish:
+        # Action execution is updated before the liveaction update is published since consumers
+        # of the liveaction updates rely on the action execution being up to date.
+        try:
+            if execution_db:
+                ActionExecution.publish_update(execution_db)
+            LiveAction.publish_update(liveaction_db)
+        except:
+            LOG.exception('publish failed.')
+
+    return liveaction_db, execution_db
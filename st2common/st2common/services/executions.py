@@ -61,9 +61,9 @@ def _decompose_liveaction(liveaction_db):
     return decomposed
 
 
-def create_execution_object(liveaction, publish=True):
-    action_db = action_utils.get_action_by_ref(liveaction.action)
-    runner = RunnerType.get_by_name(action_db.runner_type['name'])
+def create_execution_object(liveaction, publish=True, action_db=None, runnertype_db=None):
+    action_db = action_db or action_utils.get_action_by_ref(liveaction.action)
+    runner = runnertype_db or RunnerType.get_by_name(action_db.runner_type['name'])
 
     attrs = {
         'action': vars(ActionAPI.from_model(action_db)),
@@ -13,10 +13,118 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+import time
+
 from st2common.persistence.datastore import KeyValuePair
 
+__all__ = [
+    'KeyValueLookup',
+    'KeyValuePairCache',
+
+    'enable_cache',
+    'disable_cache',
+    'get_cache',
+    'invalidate_cache'
+]
+
+DEFAULT_CACHE_MAX_SIZE = 1000
+DEFAULT_CACHE_TTL = 5
+
+# Process-wide datastore read cache. Disabled unless enabled explicitly by a service which also
+# listens for KeyValuePair CUD events and invalidates the cached values.
+_CACHE = None
+
+
+class KeyValuePairCache(object):
+    """
+    LRU cache of datastore values with a TTL.
+
+    Missing keys are cached as well (as an empty string) since partial lookups (e.g. "a" for
+    "a.b") are common when rendering templates.
+    """
+
+    def __init__(self, max_size=DEFAULT_CACHE_MAX_SIZE, ttl=DEFAULT_CACHE_TTL):
+        """
+        :param max_size: Maximum number of cached keys.
+        :type max_size: ``int``
+
+        :param ttl: How long (in seconds) a cached value is considered valid.
+        :type ttl: ``float``
+        """
+        self._max_size = max_size
+        self._ttl = ttl
+
+        # name -> (value, expire_timestamp)
+        self._items = collections.OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name):
+        """
+        Retrieve cached value.
+
+        :rtype: ``tuple`` of (found, value)
+        """
+        item = self._items.pop(name, None)
+
+        if item is None or item[1] < time.time():
+            self.misses += 1
+            return False, None
+
+        # Re-insert so the most recently used items are at the end
+        self._items[name] = item
+        self.hits += 1
+        return True, item[0]
+
+    def set(self, name, value):
+        self._items.pop(name, None)
+        self._items[name] = (value, time.time() + self._ttl)
+
+        while len(self._items) > self._max_size:
+            self._items.popitem(last=False)
+
+    def invalidate(self, name=None):
+        """
+        Remove the provided key or all the keys if name is not provided.
+        """
+        if name is None:
+            self._items.clear()
+        else:
+            self._items.pop(name, None)
+
+    def __len__(self):
+        return len(self._items)
+
+
+def enable_cache(max_size=DEFAULT_CACHE_MAX_SIZE, ttl=DEFAULT_CACHE_TTL):
+    global _CACHE
+    _CACHE = KeyValuePairCache(max_size=max_size, ttl=ttl)
+    return _CACHE
+
+
+def disable_cache():
+    global _CACHE
+    _CACHE = None
+
+
+def get_cache():
+    return _CACHE
+
+
+def invalidate_cache(name=None):
+    if _CACHE:
+        _CACHE.invalidate(name)
+
 
 class KeyValueLookup(object):
+    """
+    Lookup of datastore values which can be used in a Jinja template context.
+
+    Values are cached in the provided cache dict which acts as a snapshot - a key is retrieved at
+    most once for all the lookups sharing the same cache.
+    """
 
     def __init__(self, key_prefix='', cache=None):
         self._key_prefix = key_prefix
@@ -36,8 +144,8 @@ class KeyValueLookup(object):
     def _get(self, name):
         # get the value for this key and save in value_cache
         key = '%s.%s' % (self._key_prefix, name) if self._key_prefix else name
-        value = self._get_kv(key)
-        self._value_cache[key] = value
+        if key not in self._value_cache:
+            self._value_cache[key] = self._get_kv(key)
         # return a KeyValueLookup as response since the lookup may not be complete e.g. if
         # the lookup is for 'key_base.key_value' it is likely that the calling code, e.g. Jinja,
         # will expect to do a dictionary style lookup for key_base and key_value as subsequent
@@ -45,6 +153,12 @@ class KeyValueLookup(object):
         return KeyValueLookup(key, self._value_cache)
 
     def _get_kv(self, key):
+        cache = _CACHE
+        if cache:
+            found, value = cache.get(key)
+            if found:
+                return value
+
         kvp = None
         try:
             kvp = KeyValuePair.get_by_name(key)
@@ -53,4 +167,9 @@ class KeyValueLookup(object):
             pass
         # A good default value for un-matched value is empty string since that will be used
         # for rendering templates.
-        return kvp.value if kvp else ''
+        value = kvp.value if kvp else ''
+
+        if cache:
+            cache.set(key, value)
+
+        return value
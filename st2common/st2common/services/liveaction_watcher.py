@@ -0,0 +1,197 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import eventlet
+from eventlet import event
+import uuid
+from kombu.mixins import ConsumerMixin
+from kombu import Connection
+from oslo.config import cfg
+
+from st2common import log as logging
+from st2common.constants.action import LIVEACTION_COMPLETED_STATES
+from st2common.transport import liveaction, publishers, serialization
+from st2common.util import action_db as action_db_util
+
+__all__ = [
+    'LiveActionCompletionWatcher',
+
+    'setup_completion_watcher',
+    'teardown_completion_watcher',
+    'get_completion_watcher',
+    'wait_for_completion'
+]
+
+LOG = logging.getLogger(__name__)
+
+# How often (in seconds) the database is checked while waiting for a liveaction to complete. This
+# is only a safety net in case a completion notification is missed.
+DEFAULT_POLL_INTERVAL = 10
+
+# How often (in seconds) the database is checked in processes which don't run the watcher.
+FALLBACK_POLL_INTERVAL = 1
+
+_WATCHER = None
+
+
+class LiveActionCompletionWatcher(ConsumerMixin):
+    """
+    Watches liveaction updates and wakes up green threads waiting for a particular liveaction to
+    complete.
+    """
+
+    def __init__(self, queue_suffix=None):
+        # liveaction id -> event which is sent the completed liveaction
+        self._waiters = {}
+        self._liveaction_watcher_q = self._get_queue(queue_suffix)
+
+        self.connection = None
+        self._updates_thread = None
+
+    def get_consumers(self, Consumer, channel):
+        return [Consumer(queues=[self._liveaction_watcher_q],
+                         accept=serialization.ACCEPT_CONTENT,
+                         callbacks=[self.process_task])]
+
+    def process_task(self, body, message):
+        try:
+            waiter = self._waiters.get(str(body.id), None)
+
+            if waiter and not waiter.ready() and body.status in LIVEACTION_COMPLETED_STATES:
+                waiter.send(body)
+        except Exception as e:
+            LOG.exception('Handling failed. Message body: %s. Exception: %s', body, e.message)
+        finally:
+            message.ack()
+
+    def start(self):
+        try:
+            self.connection = Connection(cfg.CONF.messaging.url)
+            self._updates_thread = eventlet.spawn(self.run)
+        except:
+            LOG.exception('Failed to start liveaction completion watcher.')
+            if self.connection:
+                self.connection.release()
+
+    def stop(self):
+        try:
+            if self._updates_thread:
+                self._updates_thread = eventlet.kill(self._updates_thread)
+        finally:
+            if self.connection:
+                self.connection.release()
+
+    def wait(self, liveaction_id, poll_interval=DEFAULT_POLL_INTERVAL):
+        """
+        Block the current green thread until the liveaction completes.
+
+        :param liveaction_id: ID of the liveaction to wait for.
+        :type liveaction_id: ``str``
+
+        :param poll_interval: How often to check the database in case a notification is missed.
+        :type poll_interval: ``int``
+
+        :return: Completed liveaction.
+        :rtype: :class:`LiveActionDB`
+        """
+        liveaction_id = str(liveaction_id)
+        waiter = event.Event()
+        self._waiters[liveaction_id] = waiter
+
+        try:
+            # Liveaction could have completed before the waiter has been registered
+            liveaction_db = action_db_util.get_liveaction_by_id(liveaction_id)
+
+            while liveaction_db.status not in LIVEACTION_COMPLETED_STATES:
+                try:
+                    with eventlet.Timeout(poll_interval):
+                        liveaction_db = waiter.wait()
+                except eventlet.Timeout:
+                    liveaction_db = action_db_util.get_liveaction_by_id(liveaction_id)
+        finally:
+            self._waiters.pop(liveaction_id, None)
+
+        return liveaction_db
+
+    @staticmethod
+    def _get_queue(queue_suffix):
+        if not queue_suffix:
+            # pick last 10 digits of uuid. Arbitrary but unique enough for the watcher.
+            u_hex = uuid.uuid4().hex
+            queue_suffix = uuid.uuid4().hex[len(u_hex) - 10:]
+        queue_name = 'st2.liveaction.completion.%s' % queue_suffix
+        # Queue is private to this process and is removed by the broker once the process goes
+        # away so queues of stopped processes don't keep accumulating updates.
+        return liveaction.get_queue(queue_name, routing_key=publishers.UPDATE_RK,
+                                    exclusive=True, auto_delete=True)
+
+
+def setup_completion_watcher():
+    """
+    Start the process-wide completion watcher.
+
+    :rtype: :class:`LiveActionCompletionWatcher`
+    """
+    global _WATCHER
+
+    if not _WATCHER:
+        _WATCHER = LiveActionCompletionWatcher()
+        _WATCHER.start()
+
+    return _WATCHER
+
+
+def teardown_completion_watcher():
+    """
+    Stop the process-wide completion watcher started by setup_completion_watcher.
+    """
+    global _WATCHER
+
+    if not _WATCHER:
+        return
+
+    _WATCHER.stop()
+    _WATCHER = None
+
+
+def get_completion_watcher():
+    """
+    Return the process-wide completion watcher or None if it hasn't been started.
+
+    :rtype: :class:`LiveActionCompletionWatcher`
+    """
+    return _WATCHER
+
+
+def wait_for_completion(liveaction_id, poll_interval=DEFAULT_POLL_INTERVAL):
+    """
+    Block the current green thread until the liveaction completes.
+
+    If the process doesn't run the completion watcher, the database is polled instead.
+
+    :rtype: :class:`LiveActionDB`
+    """
+    watcher = get_completion_watcher()
+
+    if watcher:
+        return watcher.wait(liveaction_id=liveaction_id, poll_interval=poll_interval)
+
+    liveaction_db = action_db_util.get_liveaction_by_id(liveaction_id)
+
+    while liveaction_db.status not in LIVEACTION_COMPLETED_STATES:
+        eventlet.sleep(FALLBACK_POLL_INTERVAL)
+        liveaction_db = action_db_util.get_liveaction_by_id(liveaction_id)
+
+    return liveaction_db
@@ -0,0 +1,130 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import eventlet
+import uuid
+from kombu.mixins import ConsumerMixin
+from kombu import Connection
+from oslo.config import cfg
+
+from st2common import log as logging
+from st2common.persistence.reactor import Rule
+from st2common.transport import reactor, publishers, serialization
+
+LOG = logging.getLogger(__name__)
+
+
+class RuleWatcher(ConsumerMixin):
+
+    def __init__(self, create_handler, update_handler, delete_handler,
+                 queue_suffix=None, load_from_db=True):
+        """
+        :param create_handler: Function which is called on RuleDB create event. It is also
+                               called for each of the existing rules when the watcher starts
+                               unless load_from_db is False.
+        :type create_handler: ``callable``
+
+        :param update_handler: Function which is called on RuleDB update event.
+        :type update_handler: ``callable``
+
+        :param delete_handler: Function which is called on RuleDB delete event.
+        :type delete_handler: ``callable``
+        """
+        self._create_handler = create_handler
+        self._update_handler = update_handler
+        self._delete_handler = delete_handler
+        self._load_from_db = load_from_db
+        self._rule_watcher_q = self._get_queue(queue_suffix)
+
+        self.connection = None
+        self._load_thread = None
+        self._updates_thread = None
+
+        self._handlers = {
+            publishers.CREATE_RK: create_handler,
+            publishers.UPDATE_RK: update_handler,
+            publishers.DELETE_RK: delete_handler
+        }
+
+    def get_consumers(self, Consumer, channel):
+        return [Consumer(queues=[self._rule_watcher_q],
+                         accept=serialization.ACCEPT_CONTENT,
+                         callbacks=[self.process_task])]
+
+    def process_task(self, body, message):
+        LOG.debug('process_task')
+        LOG.debug('     body: %s', body)
+        LOG.debug('     message.properties: %s', message.properties)
+        LOG.debug('     message.delivery_info: %s', message.delivery_info)
+
+        routing_key = message.delivery_info.get('routing_key', '')
+        handler = self._handlers.get(routing_key, None)
+
+        try:
+            if not handler:
+                LOG.debug('Skipping message %s as no handler was found.', message)
+                return
+
+            try:
+                handler(body)
+            except Exception as e:
+                LOG.exception('Handling failed. Message body: %s. Exception: %s',
+                              body, e.message)
+        finally:
+            message.ack()
+
+    def start(self):
+        try:
+            self.connection = Connection(cfg.CONF.messaging.url)
+            # Declare the queue before the rules are loaded so no update published while the
+            # rules are loaded is missed.
+            self._declare_queue()
+            self._updates_thread = eventlet.spawn(self.run)
+            if self._load_from_db:
+                self._load_thread = eventlet.spawn(self._load_rules_from_db)
+        except:
+            LOG.exception('Failed to start rule_watcher.')
+            self.connection.release()
+
+    def stop(self):
+        try:
+            if self._updates_thread:
+                self._updates_thread = eventlet.kill(self._updates_thread)
+            if self._load_thread:
+                self._load_thread = eventlet.kill(self._load_thread)
+        finally:
+            if self.connection:
+                self.connection.release()
+
+    def _declare_queue(self):
+        channel = self.connection.channel()
+        try:
+            self._rule_watcher_q(channel).declare()
+        finally:
+            channel.close()
+
+    def _load_rules_from_db(self):
+        for rule in Rule.get_all():
+            LOG.debug('Found existing rule: %s in db.' % rule)
+            self._handlers[publishers.CREATE_RK](rule)
+
+    @staticmethod
+    def _get_queue(queue_suffix):
+        if not queue_suffix:
+            # pick last 10 digits of uuid. Arbitrary but unique enough for the RuleWatcher.
+            u_hex = uuid.uuid4().hex
+            queue_suffix = uuid.uuid4().hex[len(u_hex) - 10:]
+        queue_name = 'st2.rule.watch.%s' % queue_suffix
+        return reactor.get_rule_cud_queue(queue_name, routing_key='#')
@@ -21,7 +21,7 @@ from oslo.config import cfg
 
 from st2common import log as logging
 from st2common.persistence.reactor import Trigger
-from st2common.transport import reactor, publishers
+from st2common.transport import reactor, publishers, serialization
 
 LOG = logging.getLogger(__name__)
 
@@ -66,7 +66,7 @@ class TriggerWatcher(ConsumerMixin):
 
     def get_consumers(self, Consumer, channel):
         return [Consumer(queues=[self._trigger_watch_q],
-                         accept=['pickle'],
+                         accept=serialization.ACCEPT_CONTENT,
                          callbacks=[self.process_task])]
 
     def process_task(self, body, message):
@@ -129,8 +129,15 @@ class TriggerWatcher(ConsumerMixin):
         eventlet.sleep(seconds=self.sleep_interval)
 
     def _load_triggers_from_db(self):
-        for trigger_type in self._trigger_types:
-            for trigger in Trigger.query(type=trigger_type):
+        if self._trigger_types:
+            trigger_queries = [Trigger.query(type=trigger_type)
+                               for trigger_type in self._trigger_types]
+        else:
+            # No filtering requested, watcher is interested in all the triggers
+            trigger_queries = [Trigger.get_all()]
+
+        for triggers in trigger_queries:
+            for trigger in triggers:
                 LOG.debug('Found existing trigger: %s in db.' % trigger)
                 self._handlers[publishers.CREATE_RK](trigger)
 
@@ -14,7 +14,9 @@
 # limitations under the License.
 
 from st2common.transport import liveaction, actionexecutionstate, execution, publishers, reactor
+from st2common.transport import action, datastore, serialization
 
 # TODO(manas) : Exchanges, Queues and RoutingKey design discussion pending.
 
-__all__ = ['liveaction', 'actionexecutionstate', 'execution', 'publishers', 'reactor']
+__all__ = ['liveaction', 'actionexecutionstate', 'execution', 'publishers', 'reactor',
+           'action', 'datastore', 'serialization']
@@ -28,5 +28,6 @@ class LiveActionPublisher(publishers.CUDPublisher):
         super(LiveActionPublisher, self).__init__(url, LIVEACTION_XCHG)
 
 
-def get_queue(name, routing_key):
-    return Queue(name, LIVEACTION_XCHG, routing_key=routing_key)
+def get_queue(name, routing_key, exclusive=False, auto_delete=False):
+    return Queue(name, LIVEACTION_XCHG, routing_key=routing_key, exclusive=exclusive,
+                 auto_delete=auto_delete)
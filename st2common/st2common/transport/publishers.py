@@ -14,9 +14,14 @@
 # limitations under the License.
 
 from kombu import Connection
-from kombu.pools import producers
 
 from st2common import log as logging
+from st2common.transport import serialization
+
+__all__ = [
+    'PoolPublisher',
+    'CUDPublisher'
+]
 
 ANY_RK = '*'
 CREATE_RK = 'create'
@@ -27,35 +32,65 @@ LOG = logging.getLogger(__name__)
 
 
 class PoolPublisher(object):
-    def __init__(self, url):
-        self.pool = Connection(url).Pool(limit=10)
+    """
+    Publisher which publishes messages using a pool of connections.
+
+    Each pooled connection keeps a single long-lived channel (the connection default channel)
+    which is reused for all the messages published over that connection. When the broker
+    supports it, publisher confirms are enabled so a publish only returns once the broker has
+    accepted the message.
+    """
+
+    def __init__(self, url, confirm_publish=True, serializer=None):
+        """
+        :param url: Messaging server URL.
+        :type url: ``str``
+
+        :param confirm_publish: True to wait for the broker to confirm each published message.
+        :type confirm_publish: ``bool``
+
+        :param serializer: Name of the serializer to use. Defaults to the one from the config.
+        :type serializer: ``str``
+        """
+        transport_options = {'confirm_publish': confirm_publish}
+        self.pool = Connection(url, transport_options=transport_options).Pool(limit=10)
+        self._serializer = serializer or serialization.get_serializer()
 
     def errback(self, exc, interval):
         LOG.error('Rabbitmq connection error: %s', exc.message, exc_info=False)
 
     def publish(self, payload, exchange, routing_key=''):
-        # pickling the payload for now. Better serialization mechanism is essential.
+        self.publish_batch([payload], exchange=exchange, routing_key=routing_key)
+
+    def publish_batch(self, payloads, exchange, routing_key=''):
+        """
+        Publish multiple messages with the same routing key using a single connection and
+        channel.
+
+        :param payloads: Message payloads.
+        :type payloads: ``list``
+
+        :param exchange: Exchange to publish the messages to.
+        :type exchange: :class:`kombu.Exchange`
+
+        :param routing_key: Routing key for all the messages.
+        :type routing_key: ``str``
+        """
+        if not payloads:
+            return
+
         with self.pool.acquire(block=True) as connection:
-            with producers[connection].acquire(block=True) as producer:
-                channel = None
-                try:
-                    # creating a new channel for every producer publish. This could be expensive
-                    # and maybe there is a better way to do this by creating a ChannelPool etc.
-                    channel = connection.channel()
-                    # ain't clean but I am done trying to find out the right solution!
-                    producer._set_channel(channel)
-                    publish = connection.ensure(producer, producer.publish, errback=self.errback,
-                                                max_retries=3)
+            try:
+                # Producer uses the connection default channel which lives as long as the
+                # connection. ensure() revives the producer on a new channel after reconnecting.
+                producer = connection.Producer()
+                publish = connection.ensure(producer, producer.publish, errback=self.errback,
+                                            max_retries=3)
+                for payload in payloads:
                     publish(payload, exchange=exchange, routing_key=routing_key,
-                            serializer='pickle')
-                except Exception as e:
-                    LOG.error('Connections to rabbitmq cannot be re-established: %s', e.message)
-                finally:
-                    if channel:
-                        try:
-                            channel.close()
-                        except Exception:
-                            LOG.warning('Error closing channel.', exc_info=True)
+                            serializer=self._serializer)
+            except Exception as e:
+                LOG.error('Connections to rabbitmq cannot be re-established: %s', e.message)
 
 
 class CUDPublisher(object):
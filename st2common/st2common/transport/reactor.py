@@ -23,11 +23,13 @@ from st2common.transport import publishers
 __all__ = [
     'TriggerCUDPublisher',
     'TriggerInstancePublisher',
+    'RuleCUDPublisher',
 
     'TriggerDispatcher',
 
     'get_sensor_cud_queue',
     'get_trigger_cud_queue',
+    'get_rule_cud_queue',
     'get_trigger_instances_queue'
 ]
 
@@ -42,6 +44,9 @@ TRIGGER_INSTANCE_XCHG = Exchange('st2.trigger_instances_dispatch', type='topic')
 # Exchane for Sensor CUD events
 SENSOR_CUD_XCHG = Exchange('st2.sensor', type='topic')
 
+# Exchange for Rule CUD events
+RULE_CUD_XCHG = Exchange('st2.rule', type='topic')
+
 
 class SensorCUDPublisher(publishers.CUDPublisher):
     """
@@ -61,6 +66,15 @@ class TriggerCUDPublisher(publishers.CUDPublisher):
         super(TriggerCUDPublisher, self).__init__(url, TRIGGER_CUD_XCHG)
 
 
+class RuleCUDPublisher(publishers.CUDPublisher):
+    """
+    Publisher responsible for publishing Rule model CUD events.
+    """
+
+    def __init__(self, url):
+        super(RuleCUDPublisher, self).__init__(url, RULE_CUD_XCHG)
+
+
 class TriggerInstancePublisher(object):
     def __init__(self, url):
         self._publisher = publishers.PoolPublisher(url=url)
@@ -69,6 +83,9 @@ class TriggerInstancePublisher(object):
         # TODO: We should use trigger reference as a routing key
         self._publisher.publish(payload, TRIGGER_INSTANCE_XCHG, routing_key)
 
+    def publish_triggers(self, payloads, routing_key=None):
+        self._publisher.publish_batch(payloads, TRIGGER_INSTANCE_XCHG, routing_key)
+
 
 class TriggerDispatcher(object):
     """
@@ -100,6 +117,25 @@ class TriggerDispatcher(object):
         self._logger.debug('Dispatching trigger (trigger=%s,payload=%s)', trigger, payload)
         self._publisher.publish_trigger(payload=payload, routing_key=routing_key)
 
+    def dispatch_batch(self, trigger, payloads):
+        """
+        Method which dispatches multiple instances of the same trigger at once.
+
+        :param trigger: Full name / reference of the trigger.
+        :type trigger: ``str`` or ``object``
+
+        :param payloads: Payloads of the trigger instances.
+        :type payloads: ``list`` of ``dict``
+        """
+        for payload in payloads:
+            assert(isinstance(payload, (type(None), dict)))
+
+        payloads = [{'trigger': trigger, 'payload': payload} for payload in payloads]
+        routing_key = 'trigger_instance'
+
+        self._logger.debug('Dispatching %s instance(s) of trigger %s', len(payloads), trigger)
+        self._publisher.publish_triggers(payloads=payloads, routing_key=routing_key)
+
 
 def get_trigger_cud_queue(name, routing_key):
     return Queue(name, TRIGGER_CUD_XCHG, routing_key=routing_key)
@@ -111,3 +147,7 @@ def get_trigger_instances_queue(name, routing_key):
 
 def get_sensor_cud_queue(name, routing_key):
     return Queue(name, SENSOR_CUD_XCHG, routing_key=routing_key)
+
+
+def get_rule_cud_queue(name, routing_key):
+    return Queue(name, RULE_CUD_XCHG, routing_key=routing_key)
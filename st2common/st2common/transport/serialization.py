@@ -0,0 +1,175 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Wire formats for the messages exchanged over the message bus.
+
+Besides pickle, two compact formats are available: JSON ("st2json") and msgpack
+("st2msgpack"). Both wrap the message in an envelope with a format version so a consumer can
+tell whether it understands a message. Database models are sent as their MongoDB document
+representation together with the model name and are turned back into model objects on the
+consuming side, plain payloads (e.g. trigger instances) are sent as they are.
+
+All consumers accept all the formats so the format used by the publishers can be switched once
+all the services in a cluster understand it.
+"""
+
+import datetime
+
+from bson import json_util
+from bson.objectid import ObjectId
+from kombu import serialization
+from mongoengine.base import BaseDocument, get_document
+from oslo.config import cfg
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# "encoding" argument has been replaced with "raw" in msgpack 0.5.2
+if msgpack and getattr(msgpack, 'version', (0, )) >= (0, 5, 2):
+    MSGPACK_UNPACK_KWARGS = {'raw': False}
+else:
+    MSGPACK_UNPACK_KWARGS = {'encoding': 'utf-8'}
+
+__all__ = [
+    'ACCEPT_CONTENT',
+    'WIRE_FORMAT_VERSION',
+
+    'get_serializer',
+    'encode',
+    'decode'
+]
+
+# Version of the envelope. Consumers reject messages with a version they don't know about.
+WIRE_FORMAT_VERSION = 1
+
+PICKLE_SERIALIZER = 'pickle'
+JSON_SERIALIZER = 'st2json'
+MSGPACK_SERIALIZER = 'st2msgpack'
+
+# Formats which are understood by all the consumers
+ACCEPT_CONTENT = [PICKLE_SERIALIZER, JSON_SERIALIZER, MSGPACK_SERIALIZER]
+
+# msgpack extension type codes
+MSGPACK_EXT_OBJECT_ID = 1
+MSGPACK_EXT_DATETIME = 2
+
+DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+
+def get_serializer():
+    """
+    Return name of the serializer publishers should use.
+
+    :rtype: ``str``
+    """
+    serializer = cfg.CONF.messaging.serializer
+
+    if serializer not in ACCEPT_CONTENT:
+        raise ValueError('Serializer "%s" is not available. Note: "%s" requires the msgpack '
+                         'library.' % (serializer, MSGPACK_SERIALIZER))
+
+    return serializer
+
+
+def encode(payload):
+    """
+    Wrap the payload in a versioned envelope made of simple types.
+
+    :rtype: ``dict``
+    """
+    envelope = {'v': WIRE_FORMAT_VERSION}
+
+    if isinstance(payload, BaseDocument):
+        envelope['model'] = payload._class_name
+        envelope['data'] = payload.to_mongo()
+    else:
+        envelope['data'] = payload
+
+    return envelope
+
+
+def decode(envelope):
+    """
+    Unwrap the payload from the envelope produced by :func:`encode`.
+    """
+    version = envelope.get('v', None)
+
+    if version != WIRE_FORMAT_VERSION:
+        raise ValueError('Unsupported message format version: %s' % (version))
+
+    model = envelope.get('model', None)
+
+    if not model:
+        return envelope['data']
+
+    return get_document(model)._from_son(envelope['data'])
+
+
+def _json_dumps(payload):
+    return json.dumps(encode(payload), default=json_util.default, separators=(',', ':'))
+
+
+def _json_loads(data):
+    return decode(json.loads(data, object_hook=json_util.object_hook))
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, ObjectId):
+        return msgpack.ExtType(MSGPACK_EXT_OBJECT_ID, obj.binary)
+
+    if isinstance(obj, datetime.datetime):
+        # Model datetimes are naive UTC values
+        value = obj.strftime(DATETIME_FORMAT).encode('ascii')
+        return msgpack.ExtType(MSGPACK_EXT_DATETIME, value)
+
+    raise TypeError('Object of type %s is not serializable' % (type(obj)))
+
+
+def _msgpack_ext_hook(code, data):
+    if code == MSGPACK_EXT_OBJECT_ID:
+        return ObjectId(data)
+
+    if code == MSGPACK_EXT_DATETIME:
+        return datetime.datetime.strptime(data.decode('ascii'), DATETIME_FORMAT)
+
+    return msgpack.ExtType(code, data)
+
+
+def _msgpack_dumps(payload):
+    return msgpack.packb(encode(payload), default=_msgpack_default, use_bin_type=True)
+
+
+def _msgpack_loads(data):
+    return decode(msgpack.unpackb(data, ext_hook=_msgpack_ext_hook, **MSGPACK_UNPACK_KWARGS))
+
+
+serialization.register(JSON_SERIALIZER, _json_dumps, _json_loads,
+                       content_type='application/x-st2-json',
+                       content_encoding='utf-8')
+
+if msgpack:
+    serialization.register(MSGPACK_SERIALIZER, _msgpack_dumps, _msgpack_loads,
+                           content_type='application/x-st2-msgpack',
+                           content_encoding='binary')
+else:
+    ACCEPT_CONTENT.remove(MSGPACK_SERIALIZER)
@@ -16,15 +16,18 @@
 from kombu import Connection
 from oslo.config import cfg
 from st2common import log as logging
+from st2common.transport.action import ACTION_CUD_XCHG, RUNNERTYPE_CUD_XCHG
+from st2common.transport.datastore import KEY_VALUE_PAIR_CUD_XCHG
 from st2common.transport.execution import EXECUTION_XCHG
 from st2common.transport.liveaction import LIVEACTION_XCHG
 from st2common.transport.reactor import TRIGGER_CUD_XCHG, TRIGGER_INSTANCE_XCHG
-from st2common.transport.reactor import SENSOR_CUD_XCHG
+from st2common.transport.reactor import SENSOR_CUD_XCHG, RULE_CUD_XCHG
 
 LOG = logging.getLogger('st2common.transport.bootstrap')
 
 EXCHANGES = [EXECUTION_XCHG, LIVEACTION_XCHG, TRIGGER_CUD_XCHG, TRIGGER_INSTANCE_XCHG,
-             SENSOR_CUD_XCHG]
+             SENSOR_CUD_XCHG, RULE_CUD_XCHG, KEY_VALUE_PAIR_CUD_XCHG, ACTION_CUD_XCHG,
+             RUNNERTYPE_CUD_XCHG]
 
 
 def _do_register_exchange(exchange, channel):
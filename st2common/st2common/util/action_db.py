@@ -25,6 +25,95 @@ from st2common.persistence.action import (RunnerType, Action, LiveAction)
 
 LOG = logging.getLogger(__name__)
 
+# Process-wide cache of action and runner type metadata. Disabled unless enabled explicitly by a
+# service which also listens for the action and runner type CUD events.
+_METADATA_CACHE = None
+
+
+class MetadataCache(object):
+    """
+    Cache of ActionDB objects keyed by reference and RunnerTypeDB objects keyed by name.
+
+    Updates are rare so all the cached objects of a type are invalidated on any change of an
+    object of that type. This way renamed objects don't need special handling.
+
+    Every invalidation bumps the generation of the type. Callers read the generation before they
+    retrieve an object from the database and pass it to the setter so an object which was read
+    before a concurrent invalidation doesn't end up in the cache.
+    """
+
+    def __init__(self):
+        self._actions = {}
+        self._runnertypes = {}
+        self._actions_generation = 0
+        self._runnertypes_generation = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    def get_action(self, ref):
+        return self._get(self._actions, ref)
+
+    def get_actions_generation(self):
+        return self._actions_generation
+
+    def set_action(self, ref, action_db, generation=None):
+        if generation is not None and generation != self._actions_generation:
+            return
+        self._actions[ref] = action_db
+
+    def get_runnertype(self, name):
+        return self._get(self._runnertypes, name)
+
+    def get_runnertypes_generation(self):
+        return self._runnertypes_generation
+
+    def set_runnertype(self, name, runnertype_db, generation=None):
+        if generation is not None and generation != self._runnertypes_generation:
+            return
+        self._runnertypes[name] = runnertype_db
+
+    def invalidate_actions(self):
+        self._actions_generation += 1
+        self._actions.clear()
+
+    def invalidate_runnertypes(self):
+        self._runnertypes_generation += 1
+        self._runnertypes.clear()
+
+    def get_stats(self):
+        return {
+            'actions': len(self._actions),
+            'runnertypes': len(self._runnertypes),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+    def _get(self, items, key):
+        item = items.get(key, None)
+
+        if item is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return item
+
+
+def enable_metadata_cache():
+    global _METADATA_CACHE
+    _METADATA_CACHE = MetadataCache()
+    return _METADATA_CACHE
+
+
+def disable_metadata_cache():
+    global _METADATA_CACHE
+    _METADATA_CACHE = None
+
+
+def get_metadata_cache():
+    return _METADATA_CACHE
+
 
 def get_runnertype_by_id(runnertype_id):
     """
@@ -48,6 +137,13 @@ def get_runnertype_by_name(runnertype_name):
         Get an runnertype by name.
         On error, raise ST2ObjectNotFoundError.
     """
+    cache = _METADATA_CACHE
+    if cache:
+        runnertype = cache.get_runnertype(runnertype_name)
+        if runnertype is not None:
+            return runnertype
+        generation = cache.get_runnertypes_generation()
+
     try:
         runnertypes = RunnerType.query(name=runnertype_name)
     except (ValueError, ValidationError) as e:
@@ -64,6 +160,9 @@ def get_runnertype_by_name(runnertype_name):
         LOG.warning('More than one RunnerType returned from DB lookup by name. '
                     'Result list is: %s', runnertypes)
 
+    if cache:
+        cache.set_runnertype(runnertype_name, runnertypes[0], generation=generation)
+
     return runnertypes[0]
 
 
@@ -95,13 +194,26 @@ def get_action_by_ref(ref):
 
     :rtype action: ``object``
     """
+    cache = _METADATA_CACHE
+    if cache:
+        action = cache.get_action(ref)
+        if action is not None:
+            return action
+        generation = cache.get_actions_generation()
+
     try:
-        return Action.get_by_ref(ref)
+        action = Action.get_by_ref(ref)
     except ValueError as e:
         LOG.debug('Database lookup for ref="%s" resulted ' +
                   'in exception : %s.', ref, e, exc_info=True)
         return None
 
+    # Missing actions are not cached, those lookups are rare and usually followed by an error
+    if cache and action is not None:
+        cache.set_action(ref, action, generation=generation)
+
+    return action
+
 
 def get_liveaction_by_id(liveaction_id):
     """
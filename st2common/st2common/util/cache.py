@@ -0,0 +1,63 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+
+__all__ = [
+    'LRUCache'
+]
+
+
+class LRUCache(object):
+    """
+    Bounded in-memory cache which evicts the least recently used items.
+    """
+
+    def __init__(self, max_size):
+        """
+        :param max_size: Maximum number of cached items.
+        :type max_size: ``int``
+        """
+        self._max_size = max_size
+        self._items = collections.OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            value = self._items.pop(key)
+        except KeyError:
+            return default
+
+        # Most recently used items are kept at the end
+        self._items[key] = value
+        return value
+
+    def set(self, key, value):
+        self._items.pop(key, None)
+        self._items[key] = value
+
+        while len(self._items) > self._max_size:
+            self._items.popitem(last=False)
+
+    def pop(self, key, default=None):
+        return self._items.pop(key, default)
+
+    def clear(self):
+        self._items.clear()
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
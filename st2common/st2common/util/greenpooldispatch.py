@@ -13,39 +13,96 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import time
+
 import eventlet
-import Queue
+from eventlet import queue
+
+from st2common import log as logging
+
+__all__ = [
+    'BufferedDispatcher'
+]
+
+LOG = logging.getLogger(__name__)
+
+# Maximum number of work items which are buffered before dispatch() blocks
+DEFAULT_BUFFER_SIZE = 100
 
 
 class BufferedDispatcher(object):
+    """
+    Dispatches work items to a green pool.
+
+    Work is handed to the pool as soon as it arrives and a pool slot is free. When both the pool
+    and the buffer are full, dispatch() blocks until a slot frees up which pushes back on the
+    caller (e.g. AMQP consumer) instead of buffering an unbounded amount of work in memory.
+    """
+
+    def __init__(self, dispatch_pool_size=50, buffer_size=DEFAULT_BUFFER_SIZE,
+                 monitor_thread_empty_q_sleep_time=None,
+                 monitor_thread_no_workers_sleep_time=None):
+        """
+        :param dispatch_pool_size: Maximum number of work items processed concurrently.
+        :type dispatch_pool_size: ``int``
+
+        :param buffer_size: Maximum number of work items waiting for a free pool slot. None
+                            means unbounded.
+        :type buffer_size: ``int``
 
-    def __init__(self, dispatch_pool_size=50, monitor_thread_empty_q_sleep_time=5,
-                 monitor_thread_no_workers_sleep_time=1):
+        Note: monitor_thread_* arguments are not used anymore and are only accepted for
+        backward compatibility.
+        """
         self._pool_limit = dispatch_pool_size
         self._dispatcher_pool = eventlet.GreenPool(dispatch_pool_size)
+        self._work_buffer = queue.LightQueue(maxsize=buffer_size)
+
+        self._dispatched_count = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+
         self._dispatch_monitor_thread = eventlet.greenthread.spawn(self._flush)
-        self._monitor_thread_empty_q_sleep_time = monitor_thread_empty_q_sleep_time
-        self._monitor_thread_no_workers_sleep_time = monitor_thread_no_workers_sleep_time
-        self._work_buffer = Queue.Queue()
 
     def dispatch(self, handler, *args):
-        self._work_buffer.put((handler, args), block=True, timeout=1)
-        self._flush_now()
+        """
+        Dispatch a work item. Blocks while the buffer is full.
+        """
+        self._work_buffer.put((handler, args, time.time()))
 
     def shutdown(self):
         self._dispatch_monitor_thread.kill()
 
+    def get_stats(self):
+        """
+        Return dispatcher statistics.
+
+        :rtype: ``dict``
+        """
+        dispatched_count = self._dispatched_count
+        average_wait_time = (self._total_wait_time / dispatched_count) if dispatched_count else 0
+
+        return {
+            'queue_depth': self._work_buffer.qsize(),
+            'in_flight': self._dispatcher_pool.running(),
+            'pool_size': self._pool_limit,
+            'dispatched_count': dispatched_count,
+            'average_wait_time': average_wait_time,
+            'max_wait_time': self._max_wait_time
+        }
+
     def _flush(self):
         while True:
-            while self._work_buffer.empty():
-                eventlet.greenthread.sleep(self._monitor_thread_empty_q_sleep_time)
-            while self._dispatcher_pool.free() <= 0:
-                eventlet.greenthread.sleep(self._monitor_thread_no_workers_sleep_time)
-            self._flush_now()
-
-    def _flush_now(self):
-        if self._dispatcher_pool.free() <= 0:
-            return
-        while not self._work_buffer.empty() and self._dispatcher_pool.free() > 0:
-            (handler, args) = self._work_buffer.get_nowait()
-            self._dispatcher_pool.spawn(handler, *args)
+            # Both calls block (without polling) until work arrives or a pool slot frees up
+            (handler, args, queued_at) = self._work_buffer.get()
+            self._dispatcher_pool.spawn_n(self._run, handler, args, queued_at)
+
+    def _run(self, handler, args, queued_at):
+        wait_time = time.time() - queued_at
+        self._dispatched_count += 1
+        self._total_wait_time += wait_time
+        self._max_wait_time = max(self._max_wait_time, wait_time)
+
+        try:
+            handler(*args)
+        except Exception:
+            LOG.exception('Dispatched handler %s failed.', handler)
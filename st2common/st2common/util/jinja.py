@@ -13,11 +13,142 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
 import json
 
 import jinja2
 import six
 
+__all__ = [
+    'JINJA_MARKERS',
+
+    'TemplateCache',
+
+    'render_values',
+    'is_template',
+    'get_template',
+    'get_template_cache_stats',
+    'set_template_cache_size'
+]
+
+# Markers which indicate a string contains a jinja expression, statement or a comment
+JINJA_MARKERS = ['{{', '{%', '{#']
+
+DEFAULT_TEMPLATE_CACHE_SIZE = 1000
+
+
+class TemplateCache(object):
+    """
+    Bounded LRU cache of compiled templates keyed by the template source.
+    """
+
+    def __init__(self, max_size=DEFAULT_TEMPLATE_CACHE_SIZE, environment=None):
+        """
+        :param max_size: Maximum number of cached templates.
+        :type max_size: ``int``
+
+        :param environment: Environment used to compile the templates. Defaults to an
+                            environment with StrictUndefined.
+        :type environment: :class:`jinja2.Environment`
+        """
+        self._max_size = max_size
+        self._environment = environment or jinja2.Environment(undefined=jinja2.StrictUndefined)
+        self._templates = collections.OrderedDict()
+
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def environment(self):
+        return self._environment
+
+    def get_template(self, source):
+        """
+        Return compiled template for the provided template source.
+
+        :param source: Template string.
+        :type source: ``str``
+
+        :rtype: :class:`jinja2.Template`
+        """
+        template = self._templates.pop(source, None)
+
+        if template is not None:
+            self._hits += 1
+        else:
+            self._misses += 1
+            template = self._environment.from_string(source)
+
+        # Most recently used templates are kept at the end
+        self._templates[source] = template
+        self._evict()
+
+        return template
+
+    def set_max_size(self, max_size):
+        """
+        Change the maximum number of cached templates, evicting the least recently used ones
+        which don't fit anymore.
+
+        :type max_size: ``int``
+        """
+        self._max_size = max_size
+        self._evict()
+
+    def get_stats(self):
+        """
+        :rtype: ``dict``
+        """
+        lookups = self._hits + self._misses
+        return {
+            'size': len(self._templates),
+            'max_size': self._max_size,
+            'hits': self._hits,
+            'misses': self._misses,
+            'hit_rate': (float(self._hits) / lookups) if lookups else 0.0
+        }
+
+    def clear(self):
+        self._templates.clear()
+        self._hits = 0
+        self._misses = 0
+
+    def _evict(self):
+        while len(self._templates) > self._max_size:
+            self._templates.popitem(last=False)
+
+
+# Process-wide cache used by all the template rendering helpers
+_TEMPLATE_CACHE = TemplateCache()
+
+
+def get_template(source):
+    """
+    Return compiled template (StrictUndefined) for the provided source from the process-wide
+    template cache.
+
+    :rtype: :class:`jinja2.Template`
+    """
+    return _TEMPLATE_CACHE.get_template(source)
+
+
+def get_template_cache_stats():
+    """
+    Return size and hit rate statistics of the process-wide template cache.
+
+    :rtype: ``dict``
+    """
+    return _TEMPLATE_CACHE.get_stats()
+
+
+def set_template_cache_size(max_size):
+    """
+    Change the maximum number of templates held by the process-wide template cache.
+
+    :type max_size: ``int``
+    """
+    _TEMPLATE_CACHE.set_max_size(max_size)
+
 
 def render_values(mapping=None, context=None):
     """
@@ -36,7 +167,6 @@ def render_values(mapping=None, context=None):
     if not context or not mapping:
         return mapping
 
-    env = jinja2.Environment(undefined=jinja2.StrictUndefined)
     rendered_mapping = {}
     for k, v in six.iteritems(mapping):
         # jinja2 works with string so transform list and dict to strings.
@@ -46,7 +176,7 @@ def render_values(mapping=None, context=None):
             reverse_json_dumps = True
         else:
             v = str(v)
-        rendered_v = env.from_string(v).render(context)
+        rendered_v = get_template(v).render(context)
         # no change therefore no templatization so pick params from original to retain
         # original type
         if rendered_v == v:
@@ -56,3 +186,15 @@ def render_values(mapping=None, context=None):
             rendered_v = json.loads(rendered_v)
         rendered_mapping[k] = rendered_v
     return rendered_mapping
+
+
+def is_template(value):
+    """
+    Return True if the provided value is a string which contains jinja markup.
+
+    :rtype: ``bool``
+    """
+    if not isinstance(value, six.string_types):
+        return False
+
+    return any(marker in value for marker in JINJA_MARKERS)
@@ -16,6 +16,9 @@
 import os
 import socket
 import sys
+import time
+
+from six.moves import StringIO
 
 import eventlet
 import paramiko
@@ -33,7 +36,16 @@ eventlet.monkey_patch(
     time=True
 )
 
+__all__ = [
+    'SSHClient',
+    'SSHClientCache',
+
+    'get_pkey'
+]
+
 LOG = logging.getLogger('st2.util.ssh.paramikoclient')
+
+PKEY_CLASSES = [paramiko.RSAKey, paramiko.DSSKey]
 # This implementation of SSH is heavily inspired by parallel-ssh which uses gvent instead of
 # eventlet.
 
@@ -160,3 +172,132 @@ class SSHClient(object):
         else:
             LOG.info("Copied local file %s to remote destination %s:%s", local_file, self.host,
                      remote_file)
+
+
+class SSHClientCache(object):
+    """
+    Cache of idle connected SSH clients keyed by host, port, user and credentials.
+
+    Credentials are part of the key so a connection which was authenticated with one set of
+    credentials is never handed out to a caller which uses different credentials.
+
+    A client is only used by one caller at a time. It's removed from the cache when it's acquired
+    and added back when it's released so concurrent executions on the same host each get their
+    own connection. At most ``max_size`` idle clients are kept and clients which have been idle for
+    longer than ``max_idle_time`` seconds are closed.
+    """
+
+    def __init__(self, max_size=100, max_idle_time=300):
+        """
+        :param max_size: Maximum number of idle clients which are kept open.
+        :type max_size: ``int``
+
+        :param max_idle_time: Number of seconds after which an idle client is closed.
+        :type max_idle_time: ``int``
+        """
+        self._max_size = max_size
+        self._max_idle_time = max_idle_time
+
+        # List of (release time, key, client) tuples, least recently released first
+        self._idle_clients = []
+
+    def acquire_client(self, host, user=None, password=None, pkey=None, port=None):
+        """
+        Return a connected client for exclusive use, creating a new connection if there is no
+        usable idle one. Client needs to be returned with release_client or discard_client.
+
+        :rtype: :class:`SSHClient`
+        """
+        self._close_expired_clients()
+        key = self._get_key(host=host, user=user, password=password, pkey=pkey, port=port)
+
+        for index in range(len(self._idle_clients) - 1, -1, -1):
+            if self._idle_clients[index][1] != key:
+                continue
+
+            _, _, client = self._idle_clients.pop(index)
+
+            if self._is_connected(client):
+                return client
+
+            self._close_client(client)
+
+        LOG.debug('Opening new SSH connection to %s@%s.', user, host)
+        return SSHClient(host, user=user, password=password, port=port, key=pkey)
+
+    def release_client(self, client, host, user=None, password=None, pkey=None, port=None):
+        """
+        Return a client obtained with acquire_client to the cache.
+        """
+        if not self._is_connected(client):
+            self._close_client(client)
+            return
+
+        key = self._get_key(host=host, user=user, password=password, pkey=pkey, port=port)
+        self._idle_clients.append((time.time(), key, client))
+
+        while len(self._idle_clients) > self._max_size:
+            self._close_client(self._idle_clients.pop(0)[2])
+
+    def discard_client(self, client):
+        """
+        Close a client obtained with acquire_client instead of returning it to the cache (e.g.
+        after the connection broke).
+        """
+        self._close_client(client)
+
+    def close(self):
+        """
+        Close all the idle clients.
+        """
+        idle_clients, self._idle_clients = self._idle_clients, []
+
+        for _, _, client in idle_clients:
+            self._close_client(client)
+
+    def _close_expired_clients(self):
+        expire_time = time.time() - self._max_idle_time
+
+        while self._idle_clients and self._idle_clients[0][0] < expire_time:
+            self._close_client(self._idle_clients.pop(0)[2])
+
+    @staticmethod
+    def _close_client(client):
+        try:
+            client.client.close()
+        except Exception:
+            LOG.debug('Failed to close SSH connection to %s.', client.host, exc_info=True)
+
+    @staticmethod
+    def _get_key(host, user, password, pkey, port):
+        fingerprint = pkey.get_fingerprint() if pkey else None
+        return (host, port, user, password, fingerprint)
+
+    @staticmethod
+    def _is_connected(client):
+        transport = client.client.get_transport()
+        return transport is not None and transport.is_active()
+
+
+def get_pkey(key_material=None, key_file=None):
+    """
+    Load a private key from the provided key material or key file.
+
+    :param key_material: Private key in PEM format.
+    :type key_material: ``str``
+
+    :param key_file: Path to the private key file.
+    :type key_file: ``str``
+
+    :rtype: :class:`paramiko.PKey`
+    """
+    for pkey_class in PKEY_CLASSES:
+        try:
+            if key_material:
+                return pkey_class.from_private_key(StringIO(key_material))
+
+            return pkey_class.from_private_key_file(key_file)
+        except paramiko.SSHException:
+            continue
+
+    raise ValueError('Invalid or unsupported private key.')
@@ -13,17 +13,25 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import eventlet
 import six
-from jinja2 import Environment, StrictUndefined
+from oslo.config import cfg
 
+from st2common import log as logging
 from st2common.constants.system import SYSTEM_KV_PREFIX
 from st2common.services.keyvalues import KeyValueLookup
+from st2common.util import jinja as jinja_utils
 
 __all__ = [
     'render_template',
-    'render_template_with_system_context'
+    'render_template_with_system_context',
+
+    'setup_template_cache',
+    'teardown_template_cache'
 ]
 
+LOG = logging.getLogger(__name__)
+
 
 def render_template(value, context=None):
     """
@@ -38,26 +46,67 @@ def render_template(value, context=None):
     assert isinstance(value, six.string_types)
     context = context or {}
 
-    env = Environment(undefined=StrictUndefined)
-    template = env.from_string(value)
+    template = jinja_utils.get_template(value)
     rendered = template.render(context)
 
     return rendered
 
 
-def render_template_with_system_context(value):
+def render_template_with_system_context(value, kv_lookup=None):
     """
     Render provided template with a default system context.
 
     :param value: Template string.
     :type value: ``str``
 
-    :param context: Template context.
-    :type context: ``dict``
+    :param kv_lookup: Datastore lookup to use for the system context. If not provided, a new
+                      lookup is created.
+    :type kv_lookup: :class:`KeyValueLookup`
     """
+    if kv_lookup is None:
+        kv_lookup = KeyValueLookup()
+
     context = {
-        SYSTEM_KV_PREFIX: KeyValueLookup(),
+        SYSTEM_KV_PREFIX: kv_lookup,
     }
 
     rendered = render_template(value=value, context=context)
     return rendered
+
+
+def setup_template_cache():
+    """
+    Size the process-wide template cache using the config and start a thread which logs the
+    cache statistics periodically (if enabled in the config).
+
+    :return: Stats logging thread or None if periodic logging is disabled. Thread needs to be
+             passed to teardown_template_cache on shutdown.
+    :rtype: :class:`eventlet.greenthread.GreenThread`
+    """
+    jinja_utils.set_template_cache_size(cfg.CONF.template_cache.size)
+
+    if cfg.CONF.template_cache.stats_log_interval <= 0:
+        return None
+
+    return eventlet.spawn(_log_template_cache_stats_periodically,
+                          cfg.CONF.template_cache.stats_log_interval)
+
+
+def teardown_template_cache(stats_thread):
+    """
+    Stop the thread returned by setup_template_cache and log the final cache statistics.
+    """
+    if stats_thread:
+        stats_thread.kill()
+
+    _log_template_cache_stats()
+
+
+def _log_template_cache_stats_periodically(interval):
+    while True:
+        eventlet.sleep(interval)
+        _log_template_cache_stats()
+
+
+def _log_template_cache_stats():
+    LOG.info('Template cache stats: %s', jinja_utils.get_template_cache_stats())
@@ -0,0 +1,116 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+
+import mock
+
+from st2tests import DbTestCase
+from st2common.constants.action import LIVEACTION_STATUS_RUNNING
+from st2common.constants.action import LIVEACTION_STATUS_SUCCEEDED
+from st2common.models.api.action import RunnerTypeAPI, ActionAPI
+from st2common.models.db.action import LiveActionDB
+from st2common.models.system.common import ResourceReference
+from st2common.persistence.action import RunnerType, Action, LiveAction
+from st2common.persistence.execution import ActionExecution
+from st2common.services import action as action_service
+from st2common.services import execution_state
+from st2common.transport.publishers import PoolPublisher
+from st2common.util import isotime
+
+
+RUNNER = {
+    'name': 'run-local',
+    'description': 'A runner to execute local command.',
+    'enabled': True,
+    'runner_parameters': {
+        'hosts': {'type': 'string'},
+        'cmd': {'type': 'string'}
+    },
+    'runner_module': 'st2actions.runners.fabricrunner'
+}
+
+ACTION = {
+    'name': 'my.action',
+    'description': 'my test',
+    'enabled': True,
+    'entry_point': '/tmp/test/action.sh',
+    'pack': 'default',
+    'runner_type': 'run-local',
+    'parameters': {}
+}
+
+ACTION_REF = ResourceReference(name='my.action', pack='default').ref
+
+
+@mock.patch.object(PoolPublisher, 'publish', mock.MagicMock())
+class ExecutionStateServiceTest(DbTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(ExecutionStateServiceTest, cls).setUpClass()
+        cls.runnerdb = RunnerType.add_or_update(RunnerTypeAPI.to_model(RunnerTypeAPI(**RUNNER)))
+        cls.actiondb = Action.add_or_update(ActionAPI.to_model(ActionAPI(**ACTION)))
+
+    @classmethod
+    def tearDownClass(cls):
+        Action.delete(cls.actiondb)
+        RunnerType.delete(cls.runnerdb)
+        super(ExecutionStateServiceTest, cls).tearDownClass()
+
+    def _schedule(self):
+        liveaction_db = LiveActionDB(action=ACTION_REF, context={'user': 'stanley'},
+                                     parameters={'hosts': 'localhost', 'cmd': 'uname -a'})
+        liveaction_db, _ = action_service.schedule(liveaction_db)
+        return liveaction_db
+
+    def test_update_status(self):
+        liveaction_db = self._schedule()
+        runner_info = {'hostname': 'localhost', 'pid': 1}
+        end_timestamp = isotime.add_utc_tz(datetime.datetime.utcnow())
+
+        liveaction_db, execution_db = execution_state.update_status(
+            liveaction_db, status=LIVEACTION_STATUS_RUNNING, runner_info=runner_info)
+        liveaction_db, execution_db = execution_state.update_status(
+            liveaction_db, status=LIVEACTION_STATUS_SUCCEEDED, result={'stdout': 'done'},
+            context={'key': 'value'}, end_timestamp=end_timestamp)
+
+        for db_obj in [LiveAction.get_by_id(str(liveaction_db.id)),
+                       ActionExecution.get_by_id(str(execution_db.id)), liveaction_db,
+                       execution_db]:
+            self.assertEqual(db_obj.status, LIVEACTION_STATUS_SUCCEEDED)
+            self.assertEqual(db_obj.result, {'stdout': 'done'})
+            self.assertEqual(db_obj.context, {'user': 'stanley', 'key': 'value'})
+            self.assertEqual(isotime.format(db_obj.end_timestamp, usec=False),
+                             isotime.format(end_timestamp, usec=False))
+
+        self.assertEqual(LiveAction.get_by_id(str(liveaction_db.id)).runner_info, runner_info)
+        self.assertEqual(execution_db.liveaction['runner_info'], runner_info)
+        self.assertEqual(execution_db.parameters, {'hosts': 'localhost', 'cmd': 'uname -a'})
+
+    def test_update_status_publishes_once(self):
+        liveaction_db = self._schedule()
+
+        with mock.patch.object(LiveAction, 'publish_update') as mock_liveaction_publish, \
+                mock.patch.object(ActionExecution, 'publish_update') as mock_execution_publish:
+            execution_state.update_status(liveaction_db, status=LIVEACTION_STATUS_RUNNING)
+
+        self.assertEqual(mock_liveaction_publish.call_count, 1)
+        self.assertEqual(mock_execution_publish.call_count, 1)
+
+    def test_update_status_invalid_status(self):
+        liveaction_db = self._schedule()
+        self.assertRaises(ValueError, execution_state.update_status, liveaction_db,
+                          status='mea culpa')
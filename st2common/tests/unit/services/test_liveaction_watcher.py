@@ -0,0 +1,104 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bson
+import eventlet
+import mock
+import unittest2
+
+from st2common.constants.action import LIVEACTION_STATUS_RUNNING
+from st2common.constants.action import LIVEACTION_STATUS_SUCCEEDED
+from st2common.models.db.action import LiveActionDB
+from st2common.services import liveaction_watcher
+from st2common.services.liveaction_watcher import LiveActionCompletionWatcher
+from st2common.util import action_db as action_db_util
+
+
+def _get_liveaction_db(liveaction_id, status):
+    return LiveActionDB(id=liveaction_id, action='core.local', status=status)
+
+
+class LiveActionCompletionWatcherTest(unittest2.TestCase):
+
+    def setUp(self):
+        super(LiveActionCompletionWatcherTest, self).setUp()
+        self.liveaction_id = bson.ObjectId()
+        self.running = _get_liveaction_db(self.liveaction_id, LIVEACTION_STATUS_RUNNING)
+        self.succeeded = _get_liveaction_db(self.liveaction_id, LIVEACTION_STATUS_SUCCEEDED)
+
+    @mock.patch.object(action_db_util, 'get_liveaction_by_id')
+    def test_wait_woken_up_by_notification(self, mock_get_liveaction_by_id):
+        mock_get_liveaction_by_id.return_value = self.running
+        watcher = LiveActionCompletionWatcher()
+
+        waiter = eventlet.spawn(watcher.wait, self.liveaction_id, poll_interval=60)
+        eventlet.sleep(0)
+
+        # Updates which don't complete the liveaction are ignored
+        message = mock.Mock()
+        watcher.process_task(self.running, message)
+        self.assertFalse(waiter.dead)
+
+        watcher.process_task(self.succeeded, message)
+        liveaction_db = waiter.wait()
+
+        self.assertEqual(liveaction_db.status, LIVEACTION_STATUS_SUCCEEDED)
+        self.assertEqual(mock_get_liveaction_by_id.call_count, 1)
+        self.assertEqual(message.ack.call_count, 2)
+        self.assertEqual(watcher._waiters, {})
+
+    @mock.patch.object(action_db_util, 'get_liveaction_by_id')
+    def test_wait_liveaction_already_completed(self, mock_get_liveaction_by_id):
+        mock_get_liveaction_by_id.return_value = self.succeeded
+        watcher = LiveActionCompletionWatcher()
+
+        liveaction_db = watcher.wait(self.liveaction_id)
+        self.assertEqual(liveaction_db.status, LIVEACTION_STATUS_SUCCEEDED)
+
+    @mock.patch.object(action_db_util, 'get_liveaction_by_id')
+    def test_wait_falls_back_to_polling(self, mock_get_liveaction_by_id):
+        mock_get_liveaction_by_id.side_effect = [self.running, self.running, self.succeeded]
+        watcher = LiveActionCompletionWatcher()
+
+        liveaction_db = watcher.wait(self.liveaction_id, poll_interval=0.01)
+        self.assertEqual(liveaction_db.status, LIVEACTION_STATUS_SUCCEEDED)
+        self.assertEqual(mock_get_liveaction_by_id.call_count, 3)
+
+    def test_queue_is_removed_with_the_process(self):
+        watcher = LiveActionCompletionWatcher()
+        self.assertTrue(watcher._liveaction_watcher_q.exclusive)
+        self.assertTrue(watcher._liveaction_watcher_q.auto_delete)
+
+    @mock.patch.object(LiveActionCompletionWatcher, 'stop')
+    @mock.patch.object(LiveActionCompletionWatcher, 'start')
+    def test_setup_and_teardown(self, mock_start, mock_stop):
+        watcher = liveaction_watcher.setup_completion_watcher()
+        self.addCleanup(setattr, liveaction_watcher, '_WATCHER', None)
+
+        self.assertTrue(mock_start.called)
+        self.assertTrue(liveaction_watcher.get_completion_watcher() is watcher)
+
+        liveaction_watcher.teardown_completion_watcher()
+        self.assertTrue(mock_stop.called)
+        self.assertEqual(liveaction_watcher.get_completion_watcher(), None)
+
+    @mock.patch('eventlet.sleep', mock.Mock())
+    @mock.patch.object(action_db_util, 'get_liveaction_by_id')
+    def test_wait_for_completion_without_watcher_polls(self, mock_get_liveaction_by_id):
+        mock_get_liveaction_by_id.side_effect = [self.running, self.succeeded]
+
+        liveaction_db = liveaction_watcher.wait_for_completion(self.liveaction_id)
+        self.assertEqual(liveaction_db.status, LIVEACTION_STATUS_SUCCEEDED)
+        self.assertEqual(mock_get_liveaction_by_id.call_count, 2)
@@ -75,6 +75,61 @@ class ActionDBUtilsTestCase(DbTestCase):
         action = action_db_utils.get_action_by_ref(action_ref)
         self.assertEqual(action.id, ActionDBUtilsTestCase.action_db.id)
 
+    def test_metadata_cache(self):
+        cache = action_db_utils.enable_metadata_cache()
+        self.addCleanup(action_db_utils.disable_metadata_cache)
+        action_ref = ResourceReference.to_string_reference(
+            pack=ActionDBUtilsTestCase.action_db.pack,
+            name=ActionDBUtilsTestCase.action_db.name)
+        runnertype_name = ActionDBUtilsTestCase.runnertype_db.name
+
+        with mock.patch.object(Action, 'get_by_ref', mock.MagicMock(wraps=Action.get_by_ref)) \
+                as mock_get_by_ref:
+            for _ in range(3):
+                action = action_db_utils.get_action_by_ref(action_ref)
+                self.assertEqual(action.id, ActionDBUtilsTestCase.action_db.id)
+            self.assertEqual(mock_get_by_ref.call_count, 1)
+
+            cache.invalidate_actions()
+            action_db_utils.get_action_by_ref(action_ref)
+            self.assertEqual(mock_get_by_ref.call_count, 2)
+
+            # Missing actions are not cached
+            for _ in range(2):
+                self.assertTrue(action_db_utils.get_action_by_ref('pack.missing') is None)
+            self.assertEqual(mock_get_by_ref.call_count, 4)
+
+        with mock.patch.object(RunnerType, 'query', mock.MagicMock(wraps=RunnerType.query)) \
+                as mock_query:
+            for _ in range(3):
+                runnertype = action_db_utils.get_runnertype_by_name(runnertype_name)
+                self.assertEqual(runnertype.id, ActionDBUtilsTestCase.runnertype_db.id)
+            self.assertEqual(mock_query.call_count, 1)
+
+        self.assertEqual(cache.get_stats(), {'actions': 1, 'runnertypes': 1, 'hits': 4,
+                                             'misses': 5})
+
+    def test_metadata_cache_invalidated_during_lookup(self):
+        cache = action_db_utils.enable_metadata_cache()
+        self.addCleanup(action_db_utils.disable_metadata_cache)
+        action_ref = ResourceReference.to_string_reference(
+            pack=ActionDBUtilsTestCase.action_db.pack,
+            name=ActionDBUtilsTestCase.action_db.name)
+        get_by_ref = Action.get_by_ref
+
+        def get_by_ref_and_invalidate(ref):
+            # Action is updated while the (stale) object is being read from the database.
+            action_db = get_by_ref(ref)
+            cache.invalidate_actions()
+            return action_db
+
+        with mock.patch.object(Action, 'get_by_ref',
+                               mock.MagicMock(side_effect=get_by_ref_and_invalidate)):
+            action = action_db_utils.get_action_by_ref(action_ref)
+            self.assertEqual(action.id, ActionDBUtilsTestCase.action_db.id)
+
+        self.assertEqual(cache.get_stats()['actions'], 0)
+
     def test_get_actionexec_nonexisting(self):
         # By id.
         self.assertRaises(StackStormDBObjectNotFoundError, action_db_utils.get_liveaction_by_id,
@@ -14,6 +14,7 @@
 # limitations under the License.
 
 import eventlet
+import eventlet.event
 import mock
 
 from st2common.util.greenpooldispatch import BufferedDispatcher
@@ -49,3 +50,40 @@ class TestGreenPoolDispatch(TestCase):
         dispatcher.shutdown()
         call_args_list = [(args[0][0], args[0][1]) for args in mock_handler.call_args_list]
         self.assertItemsEqual(expected, call_args_list)
+
+    def test_dispatch_blocks_when_buffer_is_full(self):
+        dispatcher = BufferedDispatcher(dispatch_pool_size=1, buffer_size=1)
+        release = eventlet.event.Event()
+        handled = []
+
+        def handler(i):
+            release.wait()
+            handled.append(i)
+
+        dispatched = []
+
+        def producer():
+            for i in range(4):
+                dispatcher.dispatch(handler, i)
+                dispatched.append(i)
+
+        producer_thread = eventlet.spawn(producer)
+        eventlet.sleep(0.1)
+
+        # One item is running, one is waiting for a pool slot and one is buffered
+        self.assertEqual(dispatched, [0, 1, 2])
+        stats = dispatcher.get_stats()
+        self.assertEqual(stats['in_flight'], 1)
+        self.assertEqual(stats['queue_depth'], 1)
+
+        release.send()
+        producer_thread.wait()
+        while len(handled) < 4:
+            eventlet.sleep(0.01)
+        dispatcher.shutdown()
+
+        self.assertEqual(handled, [0, 1, 2, 3])
+        stats = dispatcher.get_stats()
+        self.assertEqual(stats['dispatched_count'], 4)
+        self.assertEqual(stats['in_flight'], 0)
+        self.assertTrue(stats['max_wait_time'] > 0)
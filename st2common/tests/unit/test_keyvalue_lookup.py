@@ -13,12 +13,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import mock
+import unittest2
+
 from st2tests.base import CleanDbTestCase
 from st2common.models.db.datastore import KeyValuePairDB
 from st2common.persistence.datastore import KeyValuePair
+from st2common.services import keyvalues
 from st2common.services.keyvalues import KeyValueLookup
+from st2common.transport.publishers import PoolPublisher
 
 
+@mock.patch.object(PoolPublisher, 'publish', mock.MagicMock())
 class TestKeyValueLookup(CleanDbTestCase):
 
     def test_non_hierarchical_lookup(self):
@@ -57,3 +63,57 @@ class TestKeyValueLookup(CleanDbTestCase):
         lookup = KeyValueLookup()
         self.assertEquals(str(lookup.missing_key), '')
         self.assertTrue(lookup.missing_key, 'Should be not none.')
+
+    def test_lookups_sharing_cache_retrieve_key_once(self):
+        KeyValuePair.add_or_update(KeyValuePairDB(name='k1', value='v1'))
+
+        cache = {}
+        with mock.patch.object(KeyValuePair, 'get_by_name',
+                               mock.MagicMock(wraps=KeyValuePair.get_by_name)) as mock_get:
+            self.assertEquals(str(KeyValueLookup(cache=cache).k1), 'v1')
+            self.assertEquals(str(KeyValueLookup(cache=cache).k1), 'v1')
+            self.assertEquals(mock_get.call_count, 1)
+
+    def test_process_wide_cache(self):
+        k1 = KeyValuePair.add_or_update(KeyValuePairDB(name='k1', value='v1'))
+        keyvalues.enable_cache(max_size=10, ttl=60)
+        self.addCleanup(keyvalues.disable_cache)
+
+        self.assertEquals(str(KeyValueLookup().k1), 'v1')
+
+        # Value is served from the cache until the key is invalidated
+        k1.value = 'v2'
+        KeyValuePair.add_or_update(k1)
+        self.assertEquals(str(KeyValueLookup().k1), 'v1')
+
+        keyvalues.invalidate_cache('k1')
+        self.assertEquals(str(KeyValueLookup().k1), 'v2')
+
+
+class TestKeyValuePairCache(unittest2.TestCase):
+
+    def test_least_recently_used_key_is_evicted(self):
+        cache = keyvalues.KeyValuePairCache(max_size=2, ttl=60)
+        cache.set('k1', 'v1')
+        cache.set('k2', 'v2')
+        cache.get('k1')
+        cache.set('k3', 'v3')
+
+        self.assertEqual(cache.get('k1'), (True, 'v1'))
+        self.assertEqual(cache.get('k2'), (False, None))
+        self.assertEqual(cache.get('k3'), (True, 'v3'))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+    @mock.patch('st2common.services.keyvalues.time.time')
+    def test_expired_key_is_a_miss(self, mock_time):
+        cache = keyvalues.KeyValuePairCache(max_size=2, ttl=5)
+        mock_time.return_value = 100
+        cache.set('k1', 'v1')
+
+        mock_time.return_value = 104
+        self.assertEqual(cache.get('k1'), (True, 'v1'))
+
+        mock_time.return_value = 106
+        self.assertEqual(cache.get('k1'), (False, None))
+        self.assertEqual(len(cache), 0)
@@ -14,6 +14,7 @@
 # limitations under the License.
 
 import datetime
+import re
 import unittest2
 
 from st2common import operators
@@ -35,6 +36,11 @@ class OperatorTest(unittest2.TestCase):
         op = operators.get_operator('matchregex')
         self.assertFalse(op('v1_foo', 'v1$'), 'Passed matchregex.')
 
+    def test_matchregex_compiled_pattern(self):
+        op = operators.get_operator('matchregex')
+        self.assertTrue(op('v1', re.compile('v1$')), 'Failed matchregex.')
+        self.assertFalse(op('v1_foo', re.compile('v1$')), 'Passed matchregex.')
+
     def test_equals_numeric(self):
         op = operators.get_operator('equals')
         self.assertTrue(op(1, 1), 'Failed equals.')
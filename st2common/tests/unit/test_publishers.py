@@ -0,0 +1,81 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from kombu import Connection, Exchange, Queue
+import mock
+import unittest2
+
+import st2tests.config as tests_config
+tests_config.parse_args()
+
+from st2common.transport import serialization
+from st2common.transport.publishers import PoolPublisher
+
+MEMORY_URL = 'memory://'
+EXCHANGE = Exchange('st2.test.publishers', type='topic')
+QUEUE = Queue('st2.test.publishers.work', EXCHANGE, routing_key='#')
+
+
+class PoolPublisherTest(unittest2.TestCase):
+
+    def setUp(self):
+        super(PoolPublisherTest, self).setUp()
+        self.connection = Connection(MEMORY_URL)
+        self.queue = QUEUE(self.connection.default_channel)
+        self.queue.declare()
+        self.queue.purge()
+
+    def tearDown(self):
+        self.connection.release()
+        super(PoolPublisherTest, self).tearDown()
+
+    def _get_messages(self):
+        messages = []
+        message = self.queue.get(no_ack=True, accept=serialization.ACCEPT_CONTENT)
+        while message:
+            messages.append(message.payload)
+            message = self.queue.get(no_ack=True, accept=serialization.ACCEPT_CONTENT)
+        return messages
+
+    def test_publish_batch(self):
+        publisher = PoolPublisher(MEMORY_URL)
+        publisher.publish_batch([{'id': 1}, {'id': 2}, {'id': 3}], EXCHANGE, routing_key='create')
+        publisher.publish({'id': 4}, EXCHANGE, routing_key='create')
+
+        self.assertEqual(self._get_messages(), [{'id': 1}, {'id': 2}, {'id': 3}, {'id': 4}])
+
+    def test_channel_is_reused(self):
+        publisher = PoolPublisher(MEMORY_URL)
+        channel = Connection.channel
+
+        with mock.patch.object(Connection, 'channel', autospec=True,
+                               side_effect=channel) as mock_channel:
+            for index in range(5):
+                publisher.publish({'id': index}, EXCHANGE, routing_key='create')
+
+            self.assertEqual(mock_channel.call_count, 1)
+
+        self.assertEqual(len(self._get_messages()), 5)
+
+    def test_publish_using_configured_serializer(self):
+        publisher = PoolPublisher(MEMORY_URL)
+        self.assertEqual(publisher._serializer, 'pickle')
+
+        publisher = PoolPublisher(MEMORY_URL, serializer='st2json')
+        publisher.publish({'id': 1}, EXCHANGE, routing_key='create')
+
+        message = self.queue.get(no_ack=True, accept=serialization.ACCEPT_CONTENT)
+        self.assertEqual(message.content_type, 'application/x-st2-json')
+        self.assertEqual(message.payload, {'id': 1})
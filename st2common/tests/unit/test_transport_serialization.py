@@ -0,0 +1,79 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+
+import bson
+from kombu import serialization as kombu_serialization
+import unittest2
+
+import st2tests.config as tests_config
+tests_config.parse_args()
+
+from st2common.models.db.action import LiveActionDB
+from st2common.transport import serialization
+from st2common.util import isotime
+
+
+def _get_liveaction_db():
+    return LiveActionDB(id=bson.ObjectId(), action='core.local', status='succeeded',
+                        parameters={'cmd': 'uname -a'},
+                        result={'stdout': 'Linux', 'stderr': '', 'return_code': 0},
+                        context={'user': 'stanley'},
+                        start_timestamp=isotime.add_utc_tz(datetime.datetime.utcnow()))
+
+
+class SerializationTest(unittest2.TestCase):
+
+    def _round_trip(self, payload, serializer):
+        content_type, content_encoding, data = kombu_serialization.dumps(payload, serializer)
+        # Consumers convert the serializer names to content types the same way
+        accept = kombu_serialization.prepare_accept_content(serialization.ACCEPT_CONTENT)
+        return kombu_serialization.loads(data, content_type, content_encoding, accept=accept)
+
+    def _assert_liveaction_round_trip(self, serializer):
+        liveaction_db = _get_liveaction_db()
+        result = self._round_trip(liveaction_db, serializer)
+
+        self.assertTrue(isinstance(result, LiveActionDB))
+        for attr in ['id', 'action', 'status', 'parameters', 'result', 'context',
+                     'start_timestamp']:
+            self.assertEqual(getattr(result, attr), getattr(liveaction_db, attr), attr)
+
+    def test_json_round_trip(self):
+        self._assert_liveaction_round_trip(serialization.JSON_SERIALIZER)
+
+        payload = {'trigger': 'core.st2.webhook', 'payload': {'k1': [1, 2], 'k2': None}}
+        self.assertEqual(self._round_trip(payload, serialization.JSON_SERIALIZER), payload)
+
+    @unittest2.skipIf(not serialization.msgpack, 'msgpack is not installed')
+    def test_msgpack_round_trip(self):
+        self._assert_liveaction_round_trip(serialization.MSGPACK_SERIALIZER)
+
+        payload = {'trigger': 'core.st2.webhook', 'payload': {'k1': [1, 2], 'k2': None}}
+        self.assertEqual(self._round_trip(payload, serialization.MSGPACK_SERIALIZER), payload)
+
+    def test_messages_smaller_than_pickle(self):
+        liveaction_db = _get_liveaction_db()
+        _, _, pickled = kombu_serialization.dumps(liveaction_db, 'pickle')
+        _, _, encoded = kombu_serialization.dumps(liveaction_db, serialization.JSON_SERIALIZER)
+        self.assertLess(len(encoded), len(pickled))
+
+    def test_unsupported_version(self):
+        envelope = serialization.encode({'k1': 'v1'})
+        self.assertEqual(serialization.decode(envelope), {'k1': 'v1'})
+
+        envelope['v'] = serialization.WIRE_FORMAT_VERSION + 1
+        self.assertRaises(ValueError, serialization.decode, envelope)
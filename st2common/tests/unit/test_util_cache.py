@@ -0,0 +1,46 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest2
+
+from st2common.util.cache import LRUCache
+
+
+class LRUCacheTest(unittest2.TestCase):
+
+    def test_least_recently_used_item_is_evicted(self):
+        cache = LRUCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+
+        # "a" becomes the most recently used item
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_pop_and_clear(self):
+        cache = LRUCache(max_size=2)
+        cache.set('a', 1)
+
+        self.assertEqual(cache.pop('a'), 1)
+        self.assertFalse('a' in cache)
+
+        cache.set('b', 2)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
@@ -0,0 +1,113 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import jinja2
+import mock
+import unittest2
+from oslo.config import cfg
+
+from st2common.util import jinja as jinja_utils
+from st2common.util import templating
+import st2tests.config as tests_config
+
+
+class TemplateCacheTestCase(unittest2.TestCase):
+
+    def test_compiled_template_is_reused(self):
+        cache = jinja_utils.TemplateCache(max_size=10)
+        template = cache.get_template('{{a}}')
+
+        self.assertTrue(cache.get_template('{{a}}') is template)
+        self.assertEqual(template.render({'a': 'b'}), 'b')
+        self.assertEqual(cache.get_stats(), {'size': 1, 'max_size': 10, 'hits': 1,
+                                             'misses': 1, 'hit_rate': 0.5})
+
+    def test_least_recently_used_template_is_evicted(self):
+        cache = jinja_utils.TemplateCache(max_size=2)
+        cache.get_template('{{a}}')
+        cache.get_template('{{b}}')
+        cache.get_template('{{a}}')
+        cache.get_template('{{c}}')
+
+        stats = cache.get_stats()
+        self.assertEqual(stats['size'], 2)
+
+        cache.get_template('{{a}}')
+        self.assertEqual(cache.get_stats()['hits'], stats['hits'] + 1)
+        cache.get_template('{{b}}')
+        self.assertEqual(cache.get_stats()['misses'], stats['misses'] + 1)
+
+    def test_set_max_size_evicts_least_recently_used_templates(self):
+        cache = jinja_utils.TemplateCache(max_size=3)
+        for source in ['{{a}}', '{{b}}', '{{c}}']:
+            cache.get_template(source)
+
+        cache.set_max_size(1)
+        self.assertEqual(cache.get_stats()['size'], 1)
+
+        cache.get_template('{{c}}')
+        self.assertEqual(cache.get_stats()['hits'], 1)
+
+    def test_templates_use_strict_undefined(self):
+        template = jinja_utils.get_template('{{inexistent}}')
+        self.assertRaises(jinja2.UndefinedError, template.render, {})
+
+    def test_render_values_uses_cache(self):
+        mapping = {'k1': '{{a}}-static'}
+        misses = jinja_utils.get_template_cache_stats()['misses']
+
+        for _ in range(3):
+            self.assertEqual(jinja_utils.render_values(mapping=mapping, context={'a': 'b'}),
+                             {'k1': 'b-static'})
+
+        self.assertTrue(jinja_utils.get_template_cache_stats()['misses'] <= misses + 1)
+
+
+class TemplateCacheSetupTestCase(unittest2.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        tests_config.parse_args()
+
+    def tearDown(self):
+        cfg.CONF.clear_override('size', group='template_cache')
+        cfg.CONF.clear_override('stats_log_interval', group='template_cache')
+        jinja_utils.set_template_cache_size(cfg.CONF.template_cache.size)
+        super(TemplateCacheSetupTestCase, self).tearDown()
+
+    def test_cache_is_sized_using_config(self):
+        cfg.CONF.set_override('size', 5, group='template_cache')
+
+        self.assertEqual(templating.setup_template_cache(), None)
+        self.assertEqual(jinja_utils.get_template_cache_stats()['max_size'], 5)
+
+    @mock.patch.object(templating.eventlet, 'spawn')
+    def test_stats_thread_is_started_when_interval_is_set(self, mock_spawn):
+        cfg.CONF.set_override('stats_log_interval', 60, group='template_cache')
+
+        self.assertEqual(templating.setup_template_cache(), mock_spawn.return_value)
+        templating.teardown_template_cache(mock_spawn.return_value)
+        self.assertTrue(mock_spawn.return_value.kill.called)
+
+    @mock.patch.object(templating, 'LOG')
+    def test_stats_are_logged_periodically_and_on_teardown(self, mock_log):
+        with mock.patch.object(templating.eventlet, 'sleep',
+                               mock.Mock(side_effect=[None, Exception('stop')])):
+            self.assertRaises(Exception, templating._log_template_cache_stats_periodically, 60)
+
+        self.assertEqual(mock_log.info.call_count, 1)
+
+        templating.teardown_template_cache(None)
+        self.assertEqual(mock_log.info.call_count, 2)
@@ -84,6 +84,19 @@ class SensorService(object):
         """
         self._dispatcher.dispatch(trigger, payload=payload)
 
+    def dispatch_batch(self, trigger, payloads):
+        """
+        Method which dispatches multiple instances of the same trigger at once. Sensors which
+        retrieve many events per poll should use it instead of calling dispatch for every event.
+
+        :param trigger: Full name / reference of the trigger.
+        :type trigger: ``str``
+
+        :param payloads: Payloads of the trigger instances.
+        :type payloads: ``list`` of ``dict``
+        """
+        self._dispatcher.dispatch_batch(trigger, payloads=payloads)
+
     ##################################
     # Methods for datastore management
     ##################################
@@ -15,6 +15,7 @@
 
 import os
 
+import bson
 import six
 
 from st2common import log as logging
@@ -28,7 +29,7 @@ from st2common.constants.sensors import MINIMUM_POLL_INTERVAL
 LOG = logging.getLogger('st2reactor.sensor.container_utils')
 
 
-def create_trigger_instance(trigger, payload, occurrence_time):
+def create_trigger_instance(trigger, payload, occurrence_time, persist=True):
     """
     This creates a trigger instance object given trigger and payload.
     Trigger can be just a string reference (pack.name) or a ``dict``
@@ -39,6 +40,10 @@ def create_trigger_instance(trigger, payload, occurrence_time):
 
     :param payload: Trigger payload.
     :type payload: ``dict``
+
+    :param persist: True to save the trigger instance in the database. If False, trigger
+                    instance is only assigned an id and it's up to the caller to persist it.
+    :type persist: ``bool``
     """
     # TODO: This is nasty, this should take a unique reference and not a dict
     if isinstance(trigger, six.string_types):
@@ -59,6 +64,11 @@ def create_trigger_instance(trigger, payload, occurrence_time):
     trigger_instance.trigger = trigger_ref
     trigger_instance.payload = payload
     trigger_instance.occurrence_time = occurrence_time
+
+    if not persist:
+        trigger_instance.id = bson.ObjectId()
+        return trigger_instance
+
     return TriggerInstance.add_or_update(trigger_instance)
 
 
@@ -33,6 +33,58 @@ def _register_rules_engine_opts():
     ]
     CONF.register_opts(logging_opts, group='rulesengine')
 
+    rules_matching_opts = [
+        cfg.BoolOpt('use_rules_index', default=True,
+                    help='Keep an in-memory index of the enabled rules which is kept up to date '
+                         'using rule CUD events instead of querying the database for every '
+                         'trigger instance.'),
+        cfg.StrOpt('matcher', default='linear',
+                   help='Rules matcher to use. "linear" evaluates rules one by one, "tree" '
+                        'evaluates criteria shared by multiple rules only once per trigger '
+                        'instance.'),
+        cfg.IntOpt('enforcement_pool_size', default=10,
+                   help='Maximum number of rules enforced concurrently for a single trigger '
+                        'instance.')
+    ]
+    CONF.register_opts(rules_matching_opts, group='rulesengine')
+
+    trigger_instance_opts = [
+        cfg.BoolOpt('trigger_instance_write_behind', default=False,
+                    help='Match trigger instances before they are persisted. Trigger instances '
+                         'which match no rule are inserted in batches in the background.'),
+        cfg.IntOpt('trigger_instance_batch_size', default=100,
+                   help='Number of buffered trigger instances which triggers a bulk insert.'),
+        cfg.FloatOpt('trigger_instance_flush_interval', default=1.0,
+                     help='How often (in seconds) buffered trigger instances are inserted.'),
+        cfg.FloatOpt('unmatched_trigger_instance_sample_rate', default=1.0,
+                     help='Fraction of the trigger instances which matched no rule to persist '
+                          '(1.0 - all, 0.0 - none). Only used in write-behind mode.')
+    ]
+    CONF.register_opts(trigger_instance_opts, group='rulesengine')
+
+    consumer_opts = [
+        cfg.IntOpt('prefetch_count', default=1,
+                   help='Number of unacknowledged trigger instance messages the rules engine '
+                        'consumer can hold. Should be at least batch_size when batches are used.'),
+        cfg.IntOpt('batch_size', default=1,
+                   help='Number of trigger instance messages processed together as a batch. '
+                        'Messages in a batch are acknowledged only after they are processed. '
+                        'Value of 1 disables batching.'),
+        cfg.FloatOpt('batch_max_wait', default=0.1,
+                     help='Maximum time (in seconds) to wait for a batch to fill up.')
+    ]
+    CONF.register_opts(consumer_opts, group='rulesengine')
+
+    datastore_cache_opts = [
+        cfg.IntOpt('datastore_cache_size', default=1000,
+                   help='Maximum number of datastore values cached by the rules engine.'),
+        cfg.FloatOpt('datastore_cache_ttl', default=5.0,
+                     help='How long (in seconds) a cached datastore value is used. Cached values '
+                          'are also invalidated when the key is updated or deleted. Value of 0 '
+                          'disables the cache.')
+    ]
+    CONF.register_opts(datastore_cache_opts, group='rulesengine')
+
     timer_opts = [
         cfg.StrOpt('local_timezone', default='America/Los_Angeles',
                    help='Timezone pertaining to the location where st2 is run.')
@@ -13,35 +13,43 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
 import copy
 import jinja2
+import six
 
 from st2common.constants.rules import TRIGGER_PAYLOAD_PREFIX
 from st2common.constants.system import SYSTEM_KV_PREFIX
 from st2common.services.keyvalues import KeyValueLookup
 from st2common.util import jinja as jinja_utils
 
+# Environment used to render templates in the trigger payload. Values are rendered one by one
+# so trailing new lines need to be kept.
+_PAYLOAD_ENV = jinja2.Environment(keep_trailing_newline=True)
+
 
 class Jinja2BasedTransformer(object):
-    def __init__(self, payload):
+    def __init__(self, payload, kv_lookup=None):
+        self._kv_lookup = kv_lookup
         self._payload_context = Jinja2BasedTransformer.\
-            _construct_context(TRIGGER_PAYLOAD_PREFIX, payload, {})
+            _construct_context(TRIGGER_PAYLOAD_PREFIX, payload, {}, kv_lookup=kv_lookup)
 
     def __call__(self, mapping):
         context = copy.copy(self._payload_context)
-        context[SYSTEM_KV_PREFIX] = KeyValueLookup()
+        context[SYSTEM_KV_PREFIX] = self._kv_lookup or KeyValueLookup()
         return jinja_utils.render_values(mapping=mapping, context=context)
 
     @staticmethod
-    def _construct_context(prefix, data, context):
+    def _construct_context(prefix, data, context, kv_lookup=None):
         if data is None:
             return context
         # setup initial context as system context to help resolve the original context
         # which may itself contain references to system variables.
-        context = {SYSTEM_KV_PREFIX: KeyValueLookup()}
-        template = jinja2.Template(json.dumps(data))
-        resolved_data = json.loads(template.render(context))
+        context = {SYSTEM_KV_PREFIX: kv_lookup or KeyValueLookup()}
+        # Most payloads contain no templates so they are used as is.
+        if _contains_template(data):
+            resolved_data = _render_templates(data, context)
+        else:
+            resolved_data = data
         if resolved_data:
             if prefix not in context:
                 context[prefix] = {}
@@ -49,5 +57,32 @@ class Jinja2BasedTransformer(object):
         return context
 
 
-def get_transformer(payload):
-    return Jinja2BasedTransformer(payload)
+def _contains_template(value):
+    if isinstance(value, dict):
+        return any(_contains_template(item) for item in six.itervalues(value))
+
+    if isinstance(value, list):
+        return any(_contains_template(item) for item in value)
+
+    return jinja_utils.is_template(value)
+
+
+def _render_templates(value, context):
+    """
+    Return a copy of the provided value with all the string leaves which contain jinja markup
+    rendered. The provided value is not modified.
+    """
+    if isinstance(value, dict):
+        return dict((k, _render_templates(v, context)) for k, v in six.iteritems(value))
+
+    if isinstance(value, list):
+        return [_render_templates(item, context) for item in value]
+
+    if jinja_utils.is_template(value):
+        return _PAYLOAD_ENV.from_string(value).render(context)
+
+    return value
+
+
+def get_transformer(payload, kv_lookup=None):
+    return Jinja2BasedTransformer(payload, kv_lookup=kv_lookup)
@@ -17,6 +17,7 @@ import json
 
 from st2common import log as logging
 from st2common.util import reference
+from st2common.util import action_db as action_db_util
 from st2reactor.rules.datatransform import get_transformer
 from st2common.services import action as action_service
 from st2common.models.db.action import LiveActionDB
@@ -29,10 +30,19 @@ LOG = logging.getLogger('st2reactor.ruleenforcement.enforce')
 
 
 class RuleEnforcer(object):
-    def __init__(self, trigger_instance, rule):
+    def __init__(self, trigger_instance, rule, kv_lookup=None, data_transformer=None):
+        """
+        :param kv_lookup: Datastore lookup shared by everything processing the trigger instance.
+        :type kv_lookup: :class:`KeyValueLookup`
+
+        :param data_transformer: Transformer for the trigger instance payload shared by enforcers
+                                 for the same trigger instance.
+        :type data_transformer: :class:`Jinja2BasedTransformer`
+        """
         self.trigger_instance = trigger_instance
         self.rule = rule
-        self.data_transformer = get_transformer(trigger_instance.payload)
+        self.data_transformer = data_transformer or get_transformer(trigger_instance.payload,
+                                                                    kv_lookup=kv_lookup)
 
     def enforce(self):
         data = self.data_transformer(self.rule.action.parameters)
@@ -69,11 +79,19 @@ class RuleEnforcer(object):
         :rtype: :class:`LiveActionDB` on successful schedueling, None otherwise.
         """
         action_ref = action['ref']
+        runnertype_db = None
+
+        # Lookups are served from the process-wide metadata cache when it's enabled.
+        action_db = action_db_util.get_action_by_ref(action_ref)
+        if action_db:
+            runnertype_db = action_db_util.get_runnertype_by_name(action_db.runner_type['name'])
 
         # prior to shipping off the params cast them to the right type.
-        params = action_param_utils.cast_params(action_ref, params)
+        params = action_param_utils.cast_params(action_ref, params, action_db=action_db,
+                                                runnertype_db=runnertype_db)
         liveaction = LiveActionDB(action=action_ref, context=context, parameters=params)
-        liveaction, _ = action_service.schedule(liveaction)
+        liveaction, _ = action_service.schedule(liveaction, action_db=action_db,
+                                                runnertype_db=runnertype_db)
 
         if liveaction.status == LIVEACTION_STATUS_SCHEDULED:
             return liveaction
@@ -13,49 +13,189 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from collections import OrderedDict
+
+import eventlet
+import six
+
 from st2common import log as logging
 from st2common.persistence.reactor import Rule
+from st2common.services.keyvalues import KeyValueLookup
 from st2common.services.triggers import get_trigger_db_by_ref
+from st2reactor.rules.datatransform import get_transformer
+from st2common.util import action_db as action_db_util
 from st2reactor.rules.enforcer import RuleEnforcer
 from st2reactor.rules.matcher import RulesMatcher
 
 LOG = logging.getLogger('st2reactor.rules.RulesEngine')
 
+DEFAULT_ENFORCEMENT_POOL_SIZE = 10
+
 
 class RulesEngine(object):
-    def handle_trigger_instance(self, trigger_instance):
-        # Find matching rules for trigger instance.
-        matching_rules = self.get_matching_rules_for_trigger(trigger_instance)
+    def __init__(self, rules_index=None, rules_matcher_cls=RulesMatcher,
+                 enforcement_pool_size=DEFAULT_ENFORCEMENT_POOL_SIZE,
+                 trigger_instance_writer=None):
+        """
+        :param rules_index: In-memory rules index. If not provided, rules and triggers are
+                            retrieved from the database for every trigger instance.
+        :type rules_index: :class:`st2reactor.rules.index.RulesIndex`
 
-        # Create rule enforcers.
-        enforcers = self.create_rule_enforcers(trigger_instance, matching_rules)
+        :param rules_matcher_cls: Class used to match rules against a trigger instance.
+        :type rules_matcher_cls: ``type``
+
+        :param enforcement_pool_size: Maximum number of rules which are enforced concurrently
+                                      for a single trigger instance or a batch of trigger
+                                      instances.
+        :type enforcement_pool_size: ``int``
+
+        :param trigger_instance_writer: Writer used to persist trigger instances which haven't
+                                        been saved yet (write-behind mode). If not provided,
+                                        trigger instances are expected to be already persisted.
+        :type trigger_instance_writer: :class:`TriggerInstanceWriter`
+        """
+        self._rules_index = rules_index
+        self._rules_matcher_cls = rules_matcher_cls
+        self._enforcement_pool_size = enforcement_pool_size
+        self._trigger_instance_writer = trigger_instance_writer
+
+    def handle_trigger_instance(self, trigger_instance):
+        trigger, rules, rules_version = self._get_trigger_and_rules(trigger_instance.trigger)
+        enforcers = self._get_rule_enforcers(trigger_instance, trigger, rules, rules_version)
 
         # Enforce the rules.
         self.enforce_rules(enforcers)
 
-    def get_matching_rules_for_trigger(self, trigger_instance):
-        trigger = trigger_instance.trigger
-        trigger = get_trigger_db_by_ref(trigger_instance.trigger)
-        rules = Rule.query(trigger=trigger_instance.trigger, enabled=True)
+    def handle_trigger_instances(self, trigger_instances):
+        """
+        Handle a batch of trigger instances.
+
+        Trigger instances are grouped by trigger so the trigger and its rules are retrieved once
+        per group, and the rules matched by all the trigger instances in a group are enforced
+        together. A trigger instance which fails to be handled doesn't affect the other ones.
+
+        :type trigger_instances: ``list`` of :class:`TriggerInstanceDB`
+        """
+        groups = OrderedDict()
+        for trigger_instance in trigger_instances:
+            groups.setdefault(trigger_instance.trigger, []).append(trigger_instance)
+
+        for trigger_ref, group in six.iteritems(groups):
+            try:
+                trigger, rules, rules_version = self._get_trigger_and_rules(trigger_ref)
+            except Exception:
+                LOG.exception('Failed to retrieve rules for trigger %s.', trigger_ref)
+                continue
+
+            enforcers = []
+            for trigger_instance in group:
+                try:
+                    enforcers.extend(self._get_rule_enforcers(trigger_instance, trigger, rules,
+                                                              rules_version))
+                except Exception:
+                    LOG.exception('Failed to handle trigger instance %s.', trigger_instance.id)
+
+            self.enforce_rules(enforcers)
+
+    def get_matching_rules_for_trigger(self, trigger_instance, kv_lookup=None):
+        trigger, rules, rules_version = self._get_trigger_and_rules(trigger_instance.trigger)
+        return self._get_matching_rules(trigger_instance, trigger, rules, rules_version,
+                                        kv_lookup=kv_lookup)
+
+    def _get_trigger_and_rules(self, trigger_ref):
+        if self._rules_index:
+            trigger = self._rules_index.get_trigger_db(trigger_ref)
+            rules = self._rules_index.get_rules(trigger_ref)
+            rules_version = self._rules_index.get_rules_version(trigger_ref)
+        else:
+            trigger = get_trigger_db_by_ref(trigger_ref)
+            rules = Rule.query(trigger=trigger_ref, enabled=True)
+            rules_version = None
         LOG.info('Found %d rules defined for trigger %s (type=%s)', len(rules), trigger['name'],
                  trigger['type'])
-        matcher = RulesMatcher(trigger_instance=trigger_instance,
-                               trigger=trigger, rules=rules)
+        return (trigger, rules, rules_version)
+
+    def _get_rule_enforcers(self, trigger_instance, trigger, rules, rules_version):
+        # Datastore values referenced by the rule criteria and action parameters are retrieved
+        # once per trigger instance.
+        kv_lookup = KeyValueLookup()
+
+        # Find matching rules for trigger instance.
+        matching_rules = self._get_matching_rules(trigger_instance, trigger, rules,
+                                                  rules_version, kv_lookup=kv_lookup)
+
+        if self._trigger_instance_writer:
+            # Executions reference the trigger instance so it needs to be persisted before the
+            # rules are enforced.
+            self._trigger_instance_writer.write(trigger_instance, matched=bool(matching_rules))
+
+        # Create rule enforcers.
+        return self.create_rule_enforcers(trigger_instance, matching_rules,
+                                          kv_lookup=kv_lookup)
+
+    def _get_matching_rules(self, trigger_instance, trigger, rules, rules_version,
+                            kv_lookup=None):
+        matcher = self._rules_matcher_cls(trigger_instance=trigger_instance,
+                                          trigger=trigger, rules=rules, kv_lookup=kv_lookup,
+                                          rules_version=rules_version)
 
         matching_rules = matcher.get_matching_rules()
         LOG.info('Matched %s rule(s) for trigger_instance %s (type=%s)', len(matching_rules),
                  trigger['name'], trigger['type'])
         return matching_rules
 
-    def create_rule_enforcers(self, trigger_instance, matching_rules):
+    def create_rule_enforcers(self, trigger_instance, matching_rules, kv_lookup=None):
+        # Enforcers for the same trigger instance often invoke the same action so the action
+        # and runner type metadata cache is warmed up before they run concurrently.
+        self._warm_up_metadata_cache([rule.action.ref for rule in matching_rules])
+
+        # Templates in the payload only need to be rendered once for all the matched rules
+        data_transformer = None
+        if matching_rules:
+            data_transformer = get_transformer(trigger_instance.payload, kv_lookup=kv_lookup)
+
         enforcers = []
         for matching_rule in matching_rules:
-            enforcers.append(RuleEnforcer(trigger_instance, matching_rule))
+            enforcers.append(RuleEnforcer(trigger_instance, matching_rule,
+                                          kv_lookup=kv_lookup,
+                                          data_transformer=data_transformer))
         return enforcers
 
+    @staticmethod
+    def _warm_up_metadata_cache(action_refs):
+        """
+        Retrieve the provided actions and their runner types so enforcers which run concurrently
+        don't all miss the process-wide metadata cache and query the database for the same action.
+
+        :param action_refs: References of the actions to retrieve.
+        :type action_refs: ``list``
+        """
+        if not action_db_util.get_metadata_cache():
+            return
+
+        for action_ref in set(action_refs):
+            try:
+                action_db = action_db_util.get_action_by_ref(action_ref)
+                if action_db:
+                    action_db_util.get_runnertype_by_name(action_db.runner_type['name'])
+            except Exception:
+                # Enforcer for this action will fail and report the error itself.
+                LOG.debug('Failed to retrieve metadata for action %s.', action_ref,
+                          exc_info=True)
+
     def enforce_rules(self, enforcers):
+        if len(enforcers) <= 1 or self._enforcement_pool_size <= 1:
+            for enforcer in enforcers:
+                self._enforce_rule(enforcer)
+            return
+
+        pool = eventlet.GreenPool(min(self._enforcement_pool_size, len(enforcers)))
         for enforcer in enforcers:
-            try:
-                enforcer.enforce()  # Should this happen in an eventlet pool?
-            except Exception as e:
-                LOG.error('Exception enforcing rule %s: %s', enforcer.rule, e, exc_info=True)
+            pool.spawn_n(self._enforce_rule, enforcer)
+        pool.waitall()
+
+    def _enforce_rule(self, enforcer):
+        try:
+            enforcer.enforce()
+        except Exception as e:
+            LOG.error('Exception enforcing rule %s: %s', enforcer.rule, e, exc_info=True)
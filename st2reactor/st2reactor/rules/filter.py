@@ -13,6 +13,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
+import itertools
+import re
+
 import six
 from jsonpath_rw import parse
 
@@ -21,14 +25,38 @@ import st2common.operators as criteria_operators
 from st2common.constants.rules import TRIGGER_PAYLOAD_PREFIX
 from st2common.constants.system import SYSTEM_KV_PREFIX
 from st2common.services.keyvalues import KeyValueLookup
+from st2common.util.cache import LRUCache
+from st2common.util.jinja import JINJA_MARKERS
 from st2common.util.templating import render_template_with_system_context
 
+__all__ = [
+    'RuleFilter',
+    'CompiledCriterion',
+    'PayloadLookup',
+
+    'compile_criteria',
+    'get_compiled_criteria',
+    'get_versioned_compiled_criteria',
+    'invalidate_compiled_criteria'
+]
 
 LOG = logging.getLogger('st2reactor.ruleenforcement.filter')
 
+PARSED_LOOKUP_KEYS_CACHE_SIZE = 10000
+COMPILED_CRITERIA_CACHE_SIZE = 10000
+
+# Parsed JSONPath expressions keyed by the lookup key
+_PARSED_LOOKUP_KEYS = LRUCache(max_size=PARSED_LOOKUP_KEYS_CACHE_SIZE)
+
+# Compiled criteria keyed by rule id. Each value is a tuple of (criteria, compiled criteria,
+# version). Version is unique for every compilation so callers which cache data derived from
+# the compiled criteria (e.g. discrimination trees) can tell if the criteria were re-compiled.
+_COMPILED_CRITERIA = LRUCache(max_size=COMPILED_CRITERIA_CACHE_SIZE)
+_COMPILED_CRITERIA_VERSIONS = itertools.count(1)
+
 
 class RuleFilter(object):
-    def __init__(self, trigger_instance, trigger, rule):
+    def __init__(self, trigger_instance, trigger, rule, kv_lookup=None):
         """
         :param trigger_instance: TriggerInstance DB object.
         :type trigger_instance: :class:`TriggerInstanceDB``
@@ -38,10 +66,14 @@ class RuleFilter(object):
 
         :param rule: Rule DB object.
         :type rule: :class:`RuleDB`
+
+        :param kv_lookup: Datastore lookup shared by everything processing the trigger instance.
+        :type kv_lookup: :class:`KeyValueLookup`
         """
         self.trigger_instance = trigger_instance
         self.trigger = trigger
         self.rule = rule
+        self._kv_lookup = kv_lookup
 
         # Base context used with a logger
         self._base_logger_context = {
@@ -63,21 +95,17 @@ class RuleFilter(object):
             return False
 
         criteria = self.rule.criteria
-        is_rule_applicable = True
 
         if criteria and not self.trigger_instance.payload:
             return False
 
-        payload_lookup = PayloadLookup(self.trigger_instance.payload)
+        payload_lookup = PayloadLookup(self.trigger_instance.payload, kv_lookup=self._kv_lookup)
 
         LOG.debug('Trigger payload: %s', self.trigger_instance.payload,
                   extra=self._base_logger_context)
 
-        for criterion_k in criteria.keys():
-            criterion_v = criteria[criterion_k]
-            is_rule_applicable = self._check_criterion(criterion_k, criterion_v, payload_lookup)
-            if not is_rule_applicable:
-                break
+        is_rule_applicable = self.check_criteria(get_compiled_criteria(self.rule),
+                                                 payload_lookup)
 
         if not is_rule_applicable:
             LOG.debug('Rule %s not applicable for %s.', self.rule.id, self.trigger['name'],
@@ -85,24 +113,47 @@ class RuleFilter(object):
 
         return is_rule_applicable
 
-    def _check_criterion(self, criterion_k, criterion_v, payload_lookup):
-        if 'type' not in criterion_v:
+    def check_criteria(self, compiled_criteria, payload_lookup):
+        """
+        Return true if all the provided criteria match the trigger instance payload.
+
+        :param compiled_criteria: Criteria to check.
+        :type compiled_criteria: ``list`` of :class:`CompiledCriterion`
+
+        :type payload_lookup: :class:`PayloadLookup`
+
+        :rtype: ``bool``
+        """
+        for compiled_criterion in compiled_criteria:
+            if not self._check_criterion(compiled_criterion, payload_lookup):
+                return False
+
+        return True
+
+    def _check_criterion(self, compiled_criterion, payload_lookup):
+        criterion_k = compiled_criterion.key
+
+        if not compiled_criterion.operator:
             # Comparison operator type not specified, can't perform a comparison
             return False
 
-        criteria_operator = criterion_v['type']
-        criteria_pattern = criterion_v.get('pattern', None)
+        if compiled_criterion.compile_error:
+            LOG.error('There is a problem with criterion "%s" in rule %s: %s', criterion_k,
+                      self.rule, compiled_criterion.compile_error,
+                      extra=self._base_logger_context)
+            return False
 
         # Render the pattern (it can contain a jinja expressions)
         try:
-            criteria_pattern = self._render_criteria_pattern(criteria_pattern=criteria_pattern)
+            criteria_pattern = compiled_criterion.get_pattern(kv_lookup=self._kv_lookup)
         except Exception:
             LOG.exception('Failed to render pattern value "%s" for key "%s"' %
-                          (criteria_pattern, criterion_k), extra=self._base_logger_context)
+                          (compiled_criterion.raw_pattern, criterion_k),
+                          extra=self._base_logger_context)
             return False
 
         try:
-            matches = payload_lookup.get_value(criterion_k)
+            matches = compiled_criterion.get_matches(payload_lookup)
             # pick value if only 1 matches else will end up being an array match.
             if matches:
                 payload_value = matches[0] if len(matches) > 0 else matches
@@ -113,10 +164,9 @@ class RuleFilter(object):
                           extra=self._base_logger_context)
             return False
 
-        op_func = criteria_operators.get_operator(criteria_operator)
-
         try:
-            result = op_func(value=payload_value, criteria_pattern=criteria_pattern)
+            result = compiled_criterion.op_func(value=payload_value,
+                                                criteria_pattern=criteria_pattern)
         except:
             LOG.exception('There might be a problem with critera in rule %s.', self.rule,
                           extra=self._base_logger_context)
@@ -124,30 +174,184 @@ class RuleFilter(object):
 
         return result
 
-    def _render_criteria_pattern(self, criteria_pattern):
-        if not criteria_pattern:
-            return None
 
-        if not isinstance(criteria_pattern, six.string_types):
+class CompiledCriterion(object):
+    """
+    Single rule criterion with all the per-rule work (JSONPath parsing, operator lookup, regex
+    compilation and static pattern detection) done upfront so evaluating the criterion against
+    a trigger instance payload only involves cheap calls.
+    """
+
+    def __init__(self, key, criterion):
+        """
+        :param key: Criterion key (JSONPath lookup key, e.g. trigger.foo).
+        :type key: ``str``
+
+        :param criterion: Criterion definition with "type" and optional "pattern" attribute.
+        :type criterion: ``dict``
+        """
+        self.key = key
+        self.operator = criterion.get('type', None)
+        self.raw_pattern = criterion.get('pattern', None)
+        self.op_func = None
+        self.is_static = self._is_static_pattern(self.raw_pattern)
+        self.pattern = None
+        self.expression = None
+        self.expression_error = None
+        self.compile_error = None
+
+        # Errors (invalid operator or regular expression) are reported when the criterion is
+        # evaluated so a single invalid criterion only affects the rule it belongs to
+        try:
+            self._compile_operator_and_pattern()
+        except Exception as e:
+            self.compile_error = e
+
+        try:
+            self.expression = _parse_lookup_key(key)
+        except Exception as e:
+            # Error is reported when the criterion is evaluated
+            self.expression_error = e
+
+    def _compile_operator_and_pattern(self):
+        if self.operator:
+            self.op_func = criteria_operators.get_operator(self.operator)
+
+        if self.is_static:
+            self.pattern = self.raw_pattern or None
+
+            if self.operator and self.operator.lower() == criteria_operators.MATCH_REGEX and \
+               isinstance(self.pattern, six.string_types):
+                self.pattern = re.compile(self.pattern)
+
+    def get_pattern(self, kv_lookup=None):
+        """
+        Return pattern for this criterion, rendering it if it contains a jinja expression.
+
+        :param kv_lookup: Datastore lookup used to render the pattern.
+        :type kv_lookup: :class:`KeyValueLookup`
+        """
+        if self.is_static:
+            return self.pattern
+
+        return render_template_with_system_context(value=self.raw_pattern, kv_lookup=kv_lookup)
+
+    def get_matches(self, payload_lookup):
+        """
+        Return values in the payload which match the criterion key.
+
+        :type payload_lookup: :class:`PayloadLookup`
+
+        :rtype: ``list`` or ``None``
+        """
+        if self.expression_error:
+            raise self.expression_error
+
+        return payload_lookup.find(self.expression)
+
+    @staticmethod
+    def _is_static_pattern(pattern):
+        if not pattern or not isinstance(pattern, six.string_types):
             # We only perform rendering if value is a string - rendering a non-string value
             # makes no sense
-            return criteria_pattern
+            return True
+
+        # Jinja strips a single trailing new line so such patterns are always rendered
+        if pattern.endswith('\n'):
+            return False
+
+        return not any(marker in pattern for marker in JINJA_MARKERS)
+
+
+def compile_criteria(criteria):
+    """
+    Compile rule criteria.
+
+    :param criteria: Rule criteria.
+    :type criteria: ``dict``
+
+    :rtype: ``list`` of :class:`CompiledCriterion`
+    """
+    criteria = criteria or {}
+    return [CompiledCriterion(key=criterion_k, criterion=criterion_v)
+            for criterion_k, criterion_v in six.iteritems(criteria)]
+
+
+def get_compiled_criteria(rule):
+    """
+    Return compiled criteria for the provided rule. Compiled criteria are cached per rule and
+    re-compiled if rule criteria change.
+
+    :type rule: :class:`RuleDB`
+
+    :rtype: ``list`` of :class:`CompiledCriterion`
+    """
+    return get_versioned_compiled_criteria(rule)[1]
 
-        criteria_pattern = render_template_with_system_context(value=criteria_pattern)
-        return criteria_pattern
+
+def get_versioned_compiled_criteria(rule):
+    """
+    Return compiled criteria for the provided rule together with the version of the compiled
+    criteria. Version changes every time the criteria are compiled again.
+
+    :type rule: :class:`RuleDB`
+
+    :rtype: ``tuple`` of (``int``, ``list`` of :class:`CompiledCriterion`)
+    """
+    criteria = rule.criteria or {}
+
+    if not rule.id:
+        # Rule hasn't been persisted (e.g. rule tester), nothing to cache it under
+        return (None, compile_criteria(criteria))
+
+    rule_id = str(rule.id)
+    cached = _COMPILED_CRITERIA.get(rule_id, None)
+
+    if cached and cached[0] == criteria:
+        return (cached[2], cached[1])
+
+    compiled_criteria = compile_criteria(criteria)
+    version = next(_COMPILED_CRITERIA_VERSIONS)
+    _COMPILED_CRITERIA.set(rule_id, (copy.deepcopy(dict(criteria)), compiled_criteria, version))
+    return (version, compiled_criteria)
+
+
+def invalidate_compiled_criteria(rule):
+    """
+    Remove compiled criteria for the provided rule from the cache.
+
+    :type rule: :class:`RuleDB`
+    """
+    if rule.id:
+        _COMPILED_CRITERIA.pop(str(rule.id), None)
+
+
+def _parse_lookup_key(lookup_key):
+    expression = _PARSED_LOOKUP_KEYS.get(lookup_key, None)
+
+    if not expression:
+        expression = parse(lookup_key)
+        _PARSED_LOOKUP_KEYS.set(lookup_key, expression)
+
+    return expression
 
 
 class PayloadLookup():
 
-    def __init__(self, payload):
+    def __init__(self, payload, kv_lookup=None):
         self._context = {
-            SYSTEM_KV_PREFIX: KeyValueLookup(),
+            SYSTEM_KV_PREFIX: kv_lookup if kv_lookup is not None else KeyValueLookup(),
             TRIGGER_PAYLOAD_PREFIX: payload
         }
 
     def get_value(self, lookup_key):
-        expr = parse(lookup_key)
-        matches = [match.value for match in expr.find(self._context)]
+        return self.find(_parse_lookup_key(lookup_key))
+
+    def find(self, expression):
+        """
+        Return values in the payload which match the parsed JSONPath expression.
+        """
+        matches = [match.value for match in expression.find(self._context)]
         if not matches:
             return None
         return matches
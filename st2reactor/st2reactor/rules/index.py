@@ -0,0 +1,211 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+
+from st2common import log as logging
+from st2common.persistence.reactor import Rule
+from st2common.services.rule_watcher import RuleWatcher
+from st2common.services.triggers import get_trigger_db_by_ref
+from st2common.services.triggerwatcher import TriggerWatcher
+from st2reactor.rules.filter import get_compiled_criteria, invalidate_compiled_criteria
+
+__all__ = [
+    'RulesIndex'
+]
+
+LOG = logging.getLogger('st2reactor.rules.RulesIndex')
+
+# Versions are unique across index instances so they can be used as a cache key by consumers
+_RULES_VERSIONS = itertools.count(1)
+
+
+class RulesIndex(object):
+    """
+    In-memory index of the enabled rules and the triggers they reference keyed by trigger
+    reference.
+
+    The index is populated from the database on start and is afterwards kept current from the
+    rule and trigger CUD events so looking up the rules for a trigger instance doesn't require a
+    database round trip. Rule events received while the initial snapshot is being loaded are
+    applied after the snapshot so they are not overwritten by it.
+    """
+
+    def __init__(self):
+        # trigger ref -> {rule id -> RuleDB}
+        self._rules = {}
+        # rule id -> trigger ref, used to locate a rule when it is updated or deleted
+        self._rule_triggers = {}
+        # trigger ref -> TriggerDB
+        self._triggers = {}
+        # trigger ref -> version of the rules, changes every time a rule for the trigger changes
+        self._rules_versions = {}
+
+        # Rule events received while the initial snapshot is loaded
+        self._loading = False
+        self._pending_events = []
+
+        self._rule_watcher = RuleWatcher(create_handler=self._handle_create_rule,
+                                         update_handler=self._handle_update_rule,
+                                         delete_handler=self._handle_delete_rule,
+                                         load_from_db=False)
+        self._trigger_watcher = TriggerWatcher(create_handler=self._handle_create_trigger,
+                                               update_handler=self._handle_update_trigger,
+                                               delete_handler=self._handle_delete_trigger)
+
+    def start(self):
+        """
+        Start watching for the rule and trigger changes and load the enabled rules. Returns once
+        all the rules have been loaded.
+        """
+        self._loading = True
+        self._trigger_watcher.start()
+        self._rule_watcher.start()
+
+        try:
+            self.load_rules(Rule.get_all())
+        finally:
+            self._apply_pending_events()
+
+    def load_rules(self, rule_dbs):
+        for rule_db in rule_dbs:
+            self.add_rule(rule_db)
+
+        LOG.info('Loaded %s rule(s) into the index.', len(self._rule_triggers))
+
+    def stop(self):
+        self._rule_watcher.stop()
+        self._trigger_watcher.stop()
+
+    def get_rules(self, trigger_ref):
+        """
+        Retrieve all the enabled rules for the provided trigger.
+
+        :param trigger_ref: Reference of the trigger.
+        :type trigger_ref: ``str``
+
+        :rtype: ``list`` of :class:`RuleDB`
+        """
+        return list(self._rules.get(trigger_ref, {}).values())
+
+    def get_rules_version(self, trigger_ref):
+        """
+        Retrieve version of the rules for the provided trigger. Version changes every time a
+        rule for the trigger is added, updated or removed so it can be used to tell if data
+        derived from the rules is still valid.
+
+        :param trigger_ref: Reference of the trigger.
+        :type trigger_ref: ``str``
+
+        :return: Version or None if there are no rules for the trigger.
+        :rtype: ``int``
+        """
+        return self._rules_versions.get(trigger_ref, None)
+
+    def get_trigger_db(self, trigger_ref):
+        """
+        Retrieve trigger for the provided reference. Triggers which are not in the index yet
+        (e.g. the create event hasn't been processed yet) are retrieved from the database.
+
+        :param trigger_ref: Reference of the trigger.
+        :type trigger_ref: ``str``
+
+        :rtype: :class:`TriggerDB`
+        """
+        trigger_db = self._triggers.get(trigger_ref, None)
+
+        if not trigger_db:
+            trigger_db = get_trigger_db_by_ref(trigger_ref)
+
+            if trigger_db:
+                self._triggers[trigger_ref] = trigger_db
+
+        return trigger_db
+
+    def add_rule(self, rule_db):
+        self.remove_rule(rule_db)
+
+        if not rule_db.enabled:
+            return
+
+        rule_id = str(rule_db.id)
+        self._rules.setdefault(rule_db.trigger, {})[rule_id] = rule_db
+        self._rule_triggers[rule_id] = rule_db.trigger
+        self._rules_versions[rule_db.trigger] = next(_RULES_VERSIONS)
+
+        # Compile criteria upfront so it doesn't need to happen for the first trigger instance
+        try:
+            get_compiled_criteria(rule_db)
+        except Exception:
+            LOG.exception('Failed to compile criteria for rule %s.', rule_db.name)
+
+    def remove_rule(self, rule_db):
+        invalidate_compiled_criteria(rule_db)
+
+        rule_id = str(rule_db.id)
+        trigger_ref = self._rule_triggers.pop(rule_id, None)
+
+        if trigger_ref is None:
+            return
+
+        rules = self._rules.get(trigger_ref, {})
+        rules.pop(rule_id, None)
+
+        if rules:
+            self._rules_versions[trigger_ref] = next(_RULES_VERSIONS)
+        else:
+            self._rules.pop(trigger_ref, None)
+            self._rules_versions.pop(trigger_ref, None)
+
+    def _apply_pending_events(self):
+        # Handlers don't yield so no event can be queued after the last one is applied.
+        pending_events, self._pending_events = self._pending_events, []
+        self._loading = False
+
+        for handler, rule_db in pending_events:
+            handler(rule_db)
+
+    def _handle_create_rule(self, rule_db):
+        if self._loading:
+            self._pending_events.append((self._handle_create_rule, rule_db))
+            return
+
+        LOG.debug('Adding rule %s to the index.', rule_db.name)
+        self.add_rule(rule_db)
+
+    def _handle_update_rule(self, rule_db):
+        if self._loading:
+            self._pending_events.append((self._handle_update_rule, rule_db))
+            return
+
+        LOG.debug('Updating rule %s in the index.', rule_db.name)
+        self.add_rule(rule_db)
+
+    def _handle_delete_rule(self, rule_db):
+        if self._loading:
+            self._pending_events.append((self._handle_delete_rule, rule_db))
+            return
+
+        LOG.debug('Removing rule %s from the index.', rule_db.name)
+        self.remove_rule(rule_db)
+
+    def _handle_create_trigger(self, trigger_db):
+        self._triggers[trigger_db.get_reference().ref] = trigger_db
+
+    def _handle_update_trigger(self, trigger_db):
+        self._triggers[trigger_db.get_reference().ref] = trigger_db
+
+    def _handle_delete_trigger(self, trigger_db):
+        self._triggers.pop(trigger_db.get_reference().ref, None)
@@ -13,22 +13,322 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import six
+
 from st2common import log as logging
-from st2reactor.rules.filter import RuleFilter
+import st2common.operators as criteria_operators
+from st2common.util.cache import LRUCache
+from st2reactor.rules.filter import RuleFilter, PayloadLookup, get_versioned_compiled_criteria
+
+__all__ = [
+    'RulesMatcher',
+    'DiscriminationTreeRulesMatcher',
+
+    'get_rules_matcher_cls'
+]
 
 LOG = logging.getLogger('st2reactor.rules.RulesMatcher')
 
+EQUALS_OPERATORS = [criteria_operators.EQUALS_SHORT, criteria_operators.EQUALS_LONG]
+STARTSWITH_OPERATORS = [criteria_operators.STARTSWITH_LONG]
+EXISTS_OPERATORS = [criteria_operators.KEY_EXISTS]
+
+TREES_CACHE_SIZE = 1000
+
+# Discrimination trees keyed by trigger reference. Each value is a tuple of (key, tree) where
+# key identifies the rules and criteria the tree has been built for.
+_TREES = LRUCache(max_size=TREES_CACHE_SIZE)
+
 
 class RulesMatcher(object):
-    def __init__(self, trigger_instance, trigger, rules):
+    def __init__(self, trigger_instance, trigger, rules, kv_lookup=None, rules_version=None):
+        """
+        :param rules_version: Version of the provided rules as reported by the rules index. The
+                              version changes every time the rules for the trigger change.
+        :type rules_version: ``int``
+        """
         self.trigger_instance = trigger_instance
         self.trigger = trigger
         self.rules = rules
+        self.kv_lookup = kv_lookup
+        self.rules_version = rules_version
 
     def get_matching_rules(self):
-        rule_filters = [RuleFilter(self.trigger_instance, self.trigger, rule)
+        rule_filters = [RuleFilter(self.trigger_instance, self.trigger, rule,
+                                   kv_lookup=self.kv_lookup)
                         for rule in self.rules]
         matched_rules = [rule_filter.rule for rule_filter in rule_filters if rule_filter.filter()]
         LOG.info('%d rule(s) found to enforce for %s.', len(matched_rules),
                  self.trigger['name'])
         return matched_rules
+
+
+class DiscriminationTreeRulesMatcher(RulesMatcher):
+    """
+    Rules matcher which evaluates criteria shared by multiple rules (same key with "equals",
+    "startswith" or "exists" operator and a static pattern) only once per trigger instance.
+
+    Rules which satisfy all the shared criteria are then checked against the rest of their
+    criteria the same way as RulesMatcher does it. RulesMatcher remains the reference
+    implementation and both matchers return the same rules.
+    """
+
+    def get_matching_rules(self):
+        payload = self.trigger_instance.payload
+        tree = self._get_tree()
+
+        if payload:
+            payload_lookup = PayloadLookup(payload, kv_lookup=self.kv_lookup)
+            candidate_ids = tree.get_candidate_rule_ids(payload_lookup)
+        else:
+            # Rules with criteria can't match an empty payload
+            payload_lookup = None
+            candidate_ids = tree.get_rule_ids_without_criteria()
+
+        if self.rules_version is not None:
+            # Tree has been built for exactly these rules so only the candidates are looked at
+            candidate_rules = tree.get_rules(candidate_ids)
+        else:
+            candidate_rules = [rule for rule in self.rules
+                               if not rule.id or str(rule.id) in candidate_ids]
+
+        matched_rules = []
+        for rule in candidate_rules:
+            if not rule.id:
+                # Rules which haven't been persisted are not part of the tree
+                if RuleFilter(self.trigger_instance, self.trigger, rule,
+                              kv_lookup=self.kv_lookup).filter():
+                    matched_rules.append(rule)
+                continue
+
+            rule_id = str(rule.id)
+            residual_criteria = tree.get_residual_criteria(rule_id)
+            if residual_criteria:
+                rule_filter = RuleFilter(self.trigger_instance, self.trigger, rule,
+                                         kv_lookup=self.kv_lookup)
+                if not rule_filter.check_criteria(residual_criteria, payload_lookup):
+                    continue
+
+            matched_rules.append(rule)
+
+        LOG.info('%d rule(s) found to enforce for %s.', len(matched_rules),
+                 self.trigger['name'])
+        return matched_rules
+
+    def _get_tree(self):
+        trigger_ref = self.trigger_instance.trigger
+        cached = _TREES.get(trigger_ref, None)
+
+        # Rules index bumps the version every time a rule for the trigger changes so the cached
+        # tree can be validated without looking at the rules
+        if self.rules_version is not None:
+            tree_key = ('rules', self.rules_version)
+
+            if cached and cached[0] == tree_key:
+                return cached[1]
+
+        rules = [rule for rule in self.rules if rule.enabled and rule.id]
+        versioned_criteria = [(str(rule.id), get_versioned_compiled_criteria(rule))
+                              for rule in rules]
+        rules_criteria = [(rule_id, compiled_criteria)
+                          for rule_id, (_, compiled_criteria) in versioned_criteria]
+
+        if self.rules_version is None:
+            # Rules don't come from the index (e.g. they have been retrieved from the database).
+            # Criteria get a new version every time they are compiled so the versions tell us
+            # if the cached tree is still valid.
+            tree_key = ('criteria', sorted([(rule_id, version)
+                                            for rule_id, (version, _) in versioned_criteria]))
+
+            if cached and cached[0] == tree_key:
+                return cached[1]
+
+        tree = DiscriminationTree(rules_criteria=rules_criteria, rules=rules)
+        _TREES.set(trigger_ref, (tree_key, tree))
+        return tree
+
+
+class DiscriminationTree(object):
+    """
+    Criteria of a set of rules grouped by the payload key they are evaluated against.
+    """
+
+    def __init__(self, rules_criteria, rules=None):
+        """
+        :param rules_criteria: List of (rule id, compiled criteria) tuples.
+        :type rules_criteria: ``list``
+
+        :param rules: Rules the tree is built for.
+        :type rules: ``list`` of :class:`RuleDB`
+        """
+        # rule id -> (position, rule)
+        self._rules = dict([(str(rule.id), (position, rule))
+                            for position, rule in enumerate(rules or [])])
+        # rule id -> number of shared criteria the rule needs to satisfy
+        self._shared_counts = {}
+        # rule id -> criteria which are evaluated for each rule on its own
+        self._residual_criteria = {}
+        # key -> KeyNode
+        self._nodes = {}
+        self._rule_ids = set()
+
+        for rule_id, compiled_criteria in rules_criteria:
+            self._add_rule(rule_id, compiled_criteria)
+
+        self._rule_ids_without_shared_criteria = set([rule_id for rule_id in self._rule_ids
+                                                      if not self._shared_counts[rule_id]])
+
+    def get_candidate_rule_ids(self, payload_lookup):
+        """
+        Return ids of the rules which satisfy all of their shared criteria.
+
+        :rtype: ``set``
+        """
+        satisfied_counts = {}
+
+        for node in six.itervalues(self._nodes):
+            for rule_id in node.get_satisfied_rule_ids(payload_lookup):
+                satisfied_counts[rule_id] = satisfied_counts.get(rule_id, 0) + 1
+
+        candidate_ids = set(self._rule_ids_without_shared_criteria)
+        candidate_ids.update([rule_id for rule_id, count in six.iteritems(satisfied_counts)
+                              if count == self._shared_counts[rule_id]])
+        return candidate_ids
+
+    def get_rules(self, rule_ids):
+        """
+        Return rules for the provided ids in the order in which they were passed to the tree.
+
+        :rtype: ``list`` of :class:`RuleDB`
+        """
+        rules = [self._rules[rule_id] for rule_id in rule_ids if rule_id in self._rules]
+        return [rule for _, rule in sorted(rules, key=lambda item: item[0])]
+
+    def get_rule_ids_without_criteria(self):
+        return set([rule_id for rule_id in self._rule_ids
+                    if not self._shared_counts[rule_id] and
+                    not self._residual_criteria[rule_id]])
+
+    def get_residual_criteria(self, rule_id):
+        return self._residual_criteria.get(rule_id, [])
+
+    def _add_rule(self, rule_id, compiled_criteria):
+        self._rule_ids.add(rule_id)
+        self._shared_counts[rule_id] = 0
+        self._residual_criteria[rule_id] = []
+
+        for compiled_criterion in compiled_criteria:
+            if KeyNode.is_shareable(compiled_criterion):
+                node = self._nodes.get(compiled_criterion.key, None)
+                if not node:
+                    node = KeyNode(compiled_criterion)
+                    self._nodes[compiled_criterion.key] = node
+
+                node.add_criterion(rule_id, compiled_criterion)
+                self._shared_counts[rule_id] += 1
+            else:
+                self._residual_criteria[rule_id].append(compiled_criterion)
+
+
+class KeyNode(object):
+    """
+    Shared criteria for a single payload key. The payload value is looked up once and each
+    distinct predicate is evaluated once, equality criteria are resolved with a hash lookup.
+    """
+
+    def __init__(self, compiled_criterion):
+        self._criterion = compiled_criterion
+        # pattern -> set of rule ids
+        self._equals = {}
+        self._startswith = {}
+        # set of rule ids
+        self._exists = set()
+
+    @staticmethod
+    def is_shareable(compiled_criterion):
+        """
+        Return true if the criterion can be evaluated once for all the rules which share it.
+
+        :type compiled_criterion: :class:`CompiledCriterion`
+
+        :rtype: ``bool``
+        """
+        if not compiled_criterion.is_static or not compiled_criterion.operator:
+            return False
+
+        if compiled_criterion.expression_error or compiled_criterion.compile_error:
+            return False
+
+        operator = compiled_criterion.operator.lower()
+        pattern = compiled_criterion.pattern
+
+        if operator in EXISTS_OPERATORS:
+            return True
+
+        if operator in STARTSWITH_OPERATORS:
+            return isinstance(pattern, six.string_types)
+
+        if operator in EQUALS_OPERATORS:
+            if pattern is None:
+                return False
+
+            try:
+                hash(pattern)
+            except TypeError:
+                return False
+
+            return True
+
+        return False
+
+    def add_criterion(self, rule_id, compiled_criterion):
+        operator = compiled_criterion.operator.lower()
+        pattern = compiled_criterion.pattern
+
+        if operator in EXISTS_OPERATORS:
+            self._exists.add(rule_id)
+        elif operator in STARTSWITH_OPERATORS:
+            self._startswith.setdefault(pattern, set()).add(rule_id)
+        elif operator in EQUALS_OPERATORS:
+            self._equals.setdefault(pattern, set()).add(rule_id)
+
+    def get_satisfied_rule_ids(self, payload_lookup):
+        try:
+            matches = self._criterion.get_matches(payload_lookup)
+        except:
+            LOG.exception('Failed transforming criteria key %s', self._criterion.key)
+            return []
+
+        value = matches[0] if matches else None
+
+        if value is None:
+            # None never satisfies any of the shared operators
+            return []
+
+        satisfied = list(self._exists)
+
+        try:
+            satisfied.extend(self._equals.get(value, []))
+        except TypeError:
+            # Unhashable value (e.g. list or dict) can't equal a hashable pattern
+            pass
+
+        if self._startswith and isinstance(value, six.string_types):
+            for pattern, rule_ids in six.iteritems(self._startswith):
+                if value.startswith(pattern):
+                    satisfied.extend(rule_ids)
+
+        return satisfied
+
+
+def get_rules_matcher_cls(name):
+    """
+    Return rules matcher class for the provided name.
+
+    :param name: Matcher name ("linear" or "tree").
+    :type name: ``str``
+    """
+    if name == 'tree':
+        return DiscriminationTreeRulesMatcher
+
+    return RulesMatcher
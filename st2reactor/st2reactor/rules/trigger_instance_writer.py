@@ -0,0 +1,125 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+import eventlet
+
+from st2common import log as logging
+from st2common.persistence.reactor import TriggerInstance
+
+__all__ = [
+    'TriggerInstanceWriter'
+]
+
+LOG = logging.getLogger('st2reactor.rules.TriggerInstanceWriter')
+
+
+class TriggerInstanceWriter(object):
+    """
+    Write-behind persistence for trigger instances processed by the rules engine.
+
+    Trigger instances which matched a rule are saved right away since the executions created
+    for them reference the trigger instance. Trigger instances which didn't match any rule are
+    buffered and inserted in bulk from a background green thread. Those can also be sampled or
+    dropped altogether.
+    """
+
+    def __init__(self, batch_size=100, flush_interval=1, unmatched_sample_rate=1.0):
+        """
+        :param batch_size: Number of buffered trigger instances which triggers a flush.
+        :type batch_size: ``int``
+
+        :param flush_interval: How often (in seconds) buffered trigger instances are flushed.
+        :type flush_interval: ``float``
+
+        :param unmatched_sample_rate: Fraction of the trigger instances which didn't match any
+                                      rule to persist (1.0 - all, 0.0 - none).
+        :type unmatched_sample_rate: ``float``
+        """
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._unmatched_sample_rate = unmatched_sample_rate
+
+        self._buffer = []
+        self._flush_thread = None
+
+    def start(self):
+        self._flush_thread = eventlet.spawn(self._flush_periodically)
+
+    def stop(self):
+        if self._flush_thread:
+            self._flush_thread = eventlet.kill(self._flush_thread)
+
+        # Don't lose buffered trigger instances on shutdown
+        self.flush()
+
+    def write(self, trigger_instance, matched):
+        """
+        Persist the trigger instance.
+
+        :param trigger_instance: Trigger instance with an id already assigned.
+        :type trigger_instance: :class:`TriggerInstanceDB`
+
+        :param matched: True if the trigger instance matched at least one rule.
+        :type matched: ``bool``
+        """
+        if matched:
+            return TriggerInstance.add_or_update(trigger_instance)
+
+        if not self._should_persist_unmatched():
+            LOG.debug('Dropping trigger instance %s which matched no rules.', trigger_instance.id)
+            return trigger_instance
+
+        self._buffer.append(trigger_instance)
+
+        if len(self._buffer) >= self._batch_size:
+            eventlet.spawn_n(self.flush)
+
+        return trigger_instance
+
+    def flush(self):
+        """
+        Insert all the buffered trigger instances using a single bulk insert.
+        """
+        if not self._buffer:
+            return
+
+        trigger_instances, self._buffer = self._buffer, []
+
+        try:
+            TriggerInstance.insert_many(trigger_instances)
+        except Exception:
+            LOG.exception('Failed to persist %s trigger instance(s).', len(trigger_instances))
+        else:
+            LOG.debug('Persisted %s trigger instance(s).', len(trigger_instances))
+
+    def _flush_periodically(self):
+        while True:
+            eventlet.sleep(self._flush_interval)
+
+            try:
+                self.flush()
+            except Exception:
+                LOG.exception('Flushing trigger instances failed.')
+
+    def _should_persist_unmatched(self):
+        if self._unmatched_sample_rate >= 1.0:
+            return True
+
+        if self._unmatched_sample_rate <= 0.0:
+            return False
+
+        return random.random() < self._unmatched_sample_rate
@@ -1,4 +1,8 @@
 import datetime
+import time
+from collections import deque
+from collections import OrderedDict
+
 import st2reactor.container.utils as container_utils
 
 from kombu import Connection
@@ -6,9 +10,18 @@ from kombu.mixins import ConsumerMixin
 from oslo.config import cfg
 
 from st2common import log as logging
+from st2common.services import keyvalues
+from st2common.services.action_metadata_watcher import (setup_metadata_cache,
+                                                        teardown_metadata_cache)
+from st2common.services.datastore_watcher import KeyValuePairWatcher
+from st2common.transport import serialization
 from st2common.transport.reactor import get_trigger_instances_queue
 from st2common.util.greenpooldispatch import BufferedDispatcher
+from st2common.util.templating import setup_template_cache, teardown_template_cache
 from st2reactor.rules.engine import RulesEngine
+from st2reactor.rules.index import RulesIndex
+from st2reactor.rules.matcher import get_rules_matcher_cls
+from st2reactor.rules.trigger_instance_writer import TriggerInstanceWriter
 
 LOG = logging.getLogger(__name__)
 
@@ -20,19 +33,70 @@ class Worker(ConsumerMixin):
 
     def __init__(self, connection):
         self.connection = connection
-        self.rules_engine = RulesEngine()
+        self._rules_index = RulesIndex() if cfg.CONF.rulesengine.use_rules_index else None
+        self._trigger_instance_writer = self._get_trigger_instance_writer()
+        self._kvp_watcher = self._get_kvp_watcher()
+        self._metadata_cache_watcher = None
+        self._template_cache_stats_thread = None
+        rules_matcher_cls = get_rules_matcher_cls(cfg.CONF.rulesengine.matcher)
+        self.rules_engine = RulesEngine(
+            rules_index=self._rules_index,
+            rules_matcher_cls=rules_matcher_cls,
+            enforcement_pool_size=cfg.CONF.rulesengine.enforcement_pool_size,
+            trigger_instance_writer=self._trigger_instance_writer)
         self._dispatcher = BufferedDispatcher()
 
+        self._prefetch_count = cfg.CONF.rulesengine.prefetch_count
+        self._batch_size = cfg.CONF.rulesengine.batch_size
+        self._batch_max_wait = cfg.CONF.rulesengine.batch_max_wait
+        self._batch = []
+        self._batch_started_at = None
+        # Messages which have been processed and are waiting to be acked by the consumer
+        self._processed_messages = deque()
+
+    def start(self):
+        self._metadata_cache_watcher = setup_metadata_cache()
+        self._template_cache_stats_thread = setup_template_cache()
+        if self._kvp_watcher:
+            keyvalues.enable_cache(max_size=cfg.CONF.rulesengine.datastore_cache_size,
+                                   ttl=cfg.CONF.rulesengine.datastore_cache_ttl)
+            self._kvp_watcher.start()
+        if self._rules_index:
+            self._rules_index.start()
+        if self._trigger_instance_writer:
+            self._trigger_instance_writer.start()
+        if self._batch_size > 1 and self._prefetch_count < self._batch_size:
+            LOG.warning('prefetch_count (%s) is lower than batch_size (%s), batches will '
+                        'only be flushed after batch_max_wait.', self._prefetch_count,
+                        self._batch_size)
+        self.run()
+
     def shutdown(self):
+        # Process and ack the buffered messages instead of leaving them for redelivery. The
+        # consumer is not running anymore so the messages can be acked from here.
+        batch, self._batch = self._batch, []
+        if batch:
+            self._do_process_messages(batch)
         self._dispatcher.shutdown()
+        self._ack_processed_messages()
+        if self._rules_index:
+            self._rules_index.stop()
+        if self._trigger_instance_writer:
+            self._trigger_instance_writer.stop()
+        if self._kvp_watcher:
+            self._kvp_watcher.stop()
+            keyvalues.disable_cache()
+        teardown_metadata_cache(self._metadata_cache_watcher)
+        teardown_template_cache(self._template_cache_stats_thread)
 
     def get_consumers(self, Consumer, channel):
         consumer = Consumer(queues=[RULESENGINE_WORK_Q],
-                            accept=['pickle'],
+                            accept=serialization.ACCEPT_CONTENT,
                             callbacks=[self.process_task])
-        # use prefetch_count=1 for fair dispatch. This way workers that finish an item get the next
-        # task and the work does not get queued behind any single large item.
-        consumer.qos(prefetch_count=1)
+        # by default use prefetch_count=1 for fair dispatch. This way workers that finish an item
+        # get the next task and the work does not get queued behind any single large item. A
+        # larger prefetch window is used together with batch consumption.
+        consumer.qos(prefetch_count=self._prefetch_count)
         return [consumer]
 
     def process_task(self, body, message):
@@ -40,26 +104,117 @@ class Worker(ConsumerMixin):
         # LOG.debug('     body: %s', body)
         # LOG.debug('     message.properties: %s', message.properties)
         # LOG.debug('     message.delivery_info: %s', message.delivery_info)
+        if self._batch_size > 1:
+            # Messages are acked once the batch they belong to has been processed.
+            if not self._batch:
+                self._batch_started_at = time.time()
+            self._batch.append((body, message))
+            if len(self._batch) >= self._batch_size:
+                self._flush_batch()
+            return
+
         try:
             self._dispatcher.dispatch(self._do_process_task, body['trigger'], body['payload'])
         finally:
             message.ack()
 
+    def consume(self, *args, **kwargs):
+        if self._batch_size > 1:
+            # Partial batches and processed messages are handled in on_iteration which runs
+            # at least once per safety interval
+            kwargs['safety_interval'] = self._batch_max_wait
+        return super(Worker, self).consume(*args, **kwargs)
+
+    def on_iteration(self):
+        super(Worker, self).on_iteration()
+        # Channel can't be used concurrently from multiple green threads so the messages are
+        # acked from the consumer green thread instead of the ones which processed them
+        self._ack_processed_messages()
+
+        if self._batch and time.time() - self._batch_started_at >= self._batch_max_wait:
+            self._flush_batch()
+
+    def _flush_batch(self):
+        batch, self._batch = self._batch, []
+        # Messages for the same trigger are processed together so the trigger and its rules
+        # are only looked up once per batch. Different triggers are processed concurrently by
+        # the dispatcher pool.
+        groups = OrderedDict()
+        for body, message in batch:
+            groups.setdefault(body['trigger'], []).append((body, message))
+
+        for messages in groups.values():
+            self._dispatcher.dispatch(self._do_process_messages, messages)
+
+    def _do_process_messages(self, messages):
+        try:
+            trigger_instances = []
+            for body, _ in messages:
+                try:
+                    trigger_instance = self._create_trigger_instance(body['trigger'],
+                                                                     body['payload'])
+                except Exception:
+                    LOG.exception('Failed to create trigger instance %s.', body)
+                    continue
+
+                if trigger_instance:
+                    trigger_instances.append(trigger_instance)
+
+            if trigger_instances:
+                self.rules_engine.handle_trigger_instances(trigger_instances)
+        except Exception:
+            LOG.exception('Failed to process trigger instances.')
+        finally:
+            self._processed_messages.extend([message for _, message in messages])
+
+    def _ack_processed_messages(self):
+        while self._processed_messages:
+            self._processed_messages.popleft().ack()
+
     def _do_process_task(self, trigger, payload):
-        trigger_instance = container_utils.create_trigger_instance(
-            trigger,
-            payload or {},
-            datetime.datetime.utcnow())
+        trigger_instance = self._create_trigger_instance(trigger, payload)
 
         if trigger_instance:
             self.rules_engine.handle_trigger_instance(trigger_instance)
 
+    def _create_trigger_instance(self, trigger, payload):
+        # In write-behind mode the rules engine persists the trigger instance after matching.
+        return container_utils.create_trigger_instance(
+            trigger,
+            payload or {},
+            datetime.datetime.utcnow(),
+            persist=self._trigger_instance_writer is None)
+
+    @staticmethod
+    def _get_trigger_instance_writer():
+        if not cfg.CONF.rulesengine.trigger_instance_write_behind:
+            return None
+
+        return TriggerInstanceWriter(
+            batch_size=cfg.CONF.rulesengine.trigger_instance_batch_size,
+            flush_interval=cfg.CONF.rulesengine.trigger_instance_flush_interval,
+            unmatched_sample_rate=cfg.CONF.rulesengine.unmatched_trigger_instance_sample_rate)
+
+    def _get_kvp_watcher(self):
+        if cfg.CONF.rulesengine.datastore_cache_ttl <= 0:
+            return None
+
+        # Cached datastore values are invalidated as soon as the key changes. A newly created
+        # key also needs to be invalidated since missing keys are cached too.
+        return KeyValuePairWatcher(create_handler=self._handle_kvp_change,
+                                   update_handler=self._handle_kvp_change,
+                                   delete_handler=self._handle_kvp_change)
+
+    @staticmethod
+    def _handle_kvp_change(kvp_db):
+        keyvalues.invalidate_cache(kvp_db.name)
+
 
 def work():
     with Connection(cfg.CONF.messaging.url) as conn:
         worker = Worker(conn)
         try:
-            worker.run()
+            worker.start()
         except:
             worker.shutdown()
             raise
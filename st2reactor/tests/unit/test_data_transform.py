@@ -15,9 +15,13 @@
 
 import copy
 
+import mock
+
 from st2tests import DbTestCase
 from st2common.models.db.datastore import KeyValuePairDB
 from st2common.persistence.datastore import KeyValuePair
+from st2common.services.keyvalues import KeyValueLookup
+from st2common.transport.publishers import PoolPublisher
 from st2reactor.rules import datatransform
 
 
@@ -27,6 +31,7 @@ PAYLOAD_WITH_KVP = copy.copy(PAYLOAD)
 PAYLOAD_WITH_KVP.update({'k5': '{{system.k5}}'})
 
 
+@mock.patch.object(PoolPublisher, 'publish', mock.MagicMock())
 class DataTransformTest(DbTestCase):
 
     def test_payload_transform(self):
@@ -84,3 +89,42 @@ class DataTransformTest(DbTestCase):
             KeyValuePair.delete(k5)
             KeyValuePair.delete(k6)
             KeyValuePair.delete(k7)
+
+    def test_system_transform_shared_kv_lookup(self):
+        k5 = KeyValuePair.add_or_update(KeyValuePairDB(name='k5', value='v5'))
+        try:
+            with mock.patch.object(KeyValuePair, 'get_by_name',
+                                   mock.MagicMock(wraps=KeyValuePair.get_by_name)) as mock_get:
+                kv_lookup = KeyValueLookup()
+                transformer = datatransform.get_transformer(PAYLOAD_WITH_KVP,
+                                                            kv_lookup=kv_lookup)
+                result = transformer({'ip5': '{{trigger.k5}}-{{system.k5}}'})
+                self.assertEqual(result, {'ip5': 'v5-v5'})
+                # Value referenced by the payload and the mapping is only retrieved once
+                self.assertEqual(mock_get.call_count, 1)
+        finally:
+            KeyValuePair.delete(k5)
+
+    def test_template_free_payload_is_not_rendered(self):
+        with mock.patch.object(datatransform._PAYLOAD_ENV, 'from_string') as mock_from_string:
+            transformer = datatransform.get_transformer(PAYLOAD)
+            result = transformer({'ip5': '{{trigger.k5.foo}}'})
+            self.assertEqual(result, {'ip5': 'bar'})
+            self.assertFalse(mock_from_string.called)
+
+    def test_only_template_leaves_are_rendered(self):
+        k5 = KeyValuePair.add_or_update(KeyValuePairDB(name='k5', value='v5'))
+        payload = {'k1': {'nested': '{{system.k5}}', 'json': '{"a": 1}'},
+                   'k2': ['{{system.k5}}\n', 3, 'x'],
+                   'k3': 'a "quoted" {{ system.k5 }}'}
+        original_payload = copy.deepcopy(payload)
+        try:
+            transformer = datatransform.get_transformer(payload)
+            result = transformer({'k1': '{{trigger.k1.nested}}', 'k2': '{{trigger.k2[0]}}',
+                                  'k3': '{{trigger.k3}}', 'k4': '{{trigger.k1.json}}'})
+            self.assertEqual(result, {'k1': 'v5', 'k2': 'v5\n', 'k3': 'a "quoted" v5',
+                                      'k4': '{"a": 1}'})
+            # Payload of the trigger instance is left intact
+            self.assertEqual(payload, original_payload)
+        finally:
+            KeyValuePair.delete(k5)
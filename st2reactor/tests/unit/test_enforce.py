@@ -18,7 +18,9 @@ import mock
 
 from st2common.models.db.reactor import TriggerInstanceDB
 from st2common.models.db.action import LiveActionDB
+from st2common.persistence.action import Action
 from st2common.services import action as action_service
+from st2common.util import action_db as action_db_util
 from st2common.util import reference
 from st2reactor.rules.enforcer import RuleEnforcer
 from st2tests import DbTestCase
@@ -78,3 +80,22 @@ class EnforceTest(DbTestCase):
         self.assertTrue(action_service.schedule.called)
         self.assertTrue(isinstance(action_service.schedule.call_args[0][0].parameters['objtype'],
                                    dict))
+
+    @mock.patch.object(action_service, 'schedule', mock.MagicMock(
+        return_value=(MOCK_LIVEACTION, None)))
+    def test_ruleenforcement_uses_action_metadata_cache(self):
+        action_db_util.enable_metadata_cache()
+        self.addCleanup(action_db_util.disable_metadata_cache)
+        rule = self.models['rules']['rule1.json']
+        action_db_util.get_action_by_ref(rule.action.ref)
+
+        with mock.patch.object(Action, 'get_by_ref') as mock_get_by_ref:
+            for _ in range(2):
+                enforcer = RuleEnforcer(MOCK_TRIGGER_INSTANCE, rule)
+                self.assertTrue(enforcer.enforce() is not None)
+
+            self.assertFalse(mock_get_by_ref.called)
+
+        call_kwargs = action_service.schedule.call_args[1]
+        self.assertEqual(call_kwargs['action_db'].ref, rule.action.ref)
+        self.assertTrue(call_kwargs['runnertype_db'] is not None)
@@ -21,7 +21,7 @@ from st2common.models.db.reactor import TriggerDB, TriggerInstanceDB, \
     RuleDB, ActionExecutionSpecDB
 from st2common.models.db.action import ActionDB
 from st2common.util import reference
-from st2reactor.rules.filter import RuleFilter
+from st2reactor.rules.filter import RuleFilter, CompiledCriterion, get_compiled_criteria
 from st2tests import DbTestCase
 
 
@@ -203,3 +203,35 @@ class FilterTest(DbTestCase):
         }
         f = RuleFilter(MOCK_TRIGGER_INSTANCE, MOCK_TRIGGER, rule)
         self.assertTrue(f.filter())
+
+    @mock.patch('st2reactor.rules.filter.render_template_with_system_context')
+    def test_static_pattern_is_not_rendered(self, mock_render):
+        rule = MOCK_RULE_1
+        rule.criteria = {'trigger.p1': {'type': 'matchregex', 'pattern': 'v1$'}}
+        f = RuleFilter(MOCK_TRIGGER_INSTANCE, MOCK_TRIGGER, rule)
+        self.assertTrue(f.filter())
+        self.assertFalse(mock_render.called)
+
+    def test_compiled_criteria_are_cached_and_recompiled_on_change(self):
+        rule = MOCK_RULE_1
+        rule.criteria = {'trigger.p1': {'type': 'equals', 'pattern': 'v1'}}
+        compiled_criteria = get_compiled_criteria(rule)
+        self.assertTrue(compiled_criteria is get_compiled_criteria(rule))
+
+        rule.criteria = {'trigger.p1': {'type': 'equals', 'pattern': 'v'}}
+        self.assertFalse(compiled_criteria is get_compiled_criteria(rule))
+        f = RuleFilter(MOCK_TRIGGER_INSTANCE, MOCK_TRIGGER, rule)
+        self.assertFalse(f.filter(), 'equals check should have failed.')
+
+    def test_compiled_criterion(self):
+        criterion = CompiledCriterion('trigger.p1', {'type': 'matchregex', 'pattern': 'v1$'})
+        self.assertTrue(criterion.is_static)
+        self.assertEqual(criterion.get_pattern().pattern, 'v1$')
+
+        criterion = CompiledCriterion('trigger.p1', {'type': 'equals',
+                                                     'pattern': '{{ system.foo }}'})
+        self.assertFalse(criterion.is_static)
+
+        criterion = CompiledCriterion('trigger.p1', {'type': 'equals', 'pattern': 1})
+        self.assertTrue(criterion.is_static)
+        self.assertEqual(criterion.get_pattern(), 1)
@@ -80,6 +80,24 @@ class RuleEngineTest(DbTestCase):
         for rule in matching_rules:
             self.assertTrue(rule.name in expected_rules)
 
+    def test_enforce_rules_runs_all_enforcers(self):
+        enforced = []
+
+        class MockEnforcer(object):
+            def __init__(self, rule, fail=False):
+                self.rule = rule
+                self.fail = fail
+
+            def enforce(self):
+                if self.fail:
+                    raise Exception('enforcement failed')
+                enforced.append(self.rule)
+
+        enforcers = [MockEnforcer('rule%s' % (index), fail=(index == 2)) for index in range(5)]
+        rules_engine = RulesEngine(enforcement_pool_size=2)
+        rules_engine.enforce_rules(enforcers)
+        self.assertEqual(sorted(enforced), ['rule0', 'rule1', 'rule3', 'rule4'])
+
     def test_handle_trigger_instance_no_rules(self):
         trigger_instance = container_utils.create_trigger_instance(
             'dummy_pack_1.st2.test.trigger3',
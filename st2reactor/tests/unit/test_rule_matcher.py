@@ -15,12 +15,19 @@
 
 import datetime
 
+import bson
+import mock
+import unittest2
+
 from st2common.models.db.reactor import (TriggerDB, TriggerTypeDB)
+from st2common.models.db.reactor import (ActionExecutionSpecDB, RuleDB, TriggerInstanceDB)
 from st2common.models.api.rule import RuleAPI
 from st2common.persistence.reactor import (TriggerType, Trigger, Rule)
 from st2common.services.triggers import get_trigger_db_by_ref
 import st2reactor.container.utils as container_utils
-from st2reactor.rules.matcher import RulesMatcher
+from st2reactor.rules.filter import get_versioned_compiled_criteria
+from st2reactor.rules.index import RulesIndex
+from st2reactor.rules.matcher import RulesMatcher, DiscriminationTreeRulesMatcher
 from st2tests.base import DbTestCase
 
 
@@ -142,3 +149,126 @@ class RuleMatcherTest(DbTestCase):
         rules.append(rule_db)
 
         return rules
+
+
+TREE_TRIGGER_REF = 'dummy_pack_1.st2.test.tree_trigger'
+TREE_TRIGGER = TriggerDB(name='st2.test.tree_trigger', pack='dummy_pack_1')
+
+
+def _get_rule(name, criteria, enabled=True):
+    return RuleDB(id=bson.ObjectId(), name=name, trigger=TREE_TRIGGER_REF, criteria=criteria,
+                  enabled=enabled, action=ActionExecutionSpecDB(ref='core.local'))
+
+
+class DiscriminationTreeRulesMatcherTest(unittest2.TestCase):
+
+    def setUp(self):
+        super(DiscriminationTreeRulesMatcherTest, self).setUp()
+        self.rules = [
+            _get_rule('no_criteria', {}),
+            _get_rule('eq_a', {'trigger.k1': {'type': 'equals', 'pattern': 'a'}}),
+            _get_rule('eq_b', {'trigger.k1': {'type': 'eq', 'pattern': 'b'}}),
+            _get_rule('eq_a_disabled', {'trigger.k1': {'type': 'equals', 'pattern': 'a'}},
+                      enabled=False),
+            _get_rule('eq_int', {'trigger.k3': {'type': 'equals', 'pattern': 1}}),
+            _get_rule('startswith', {'trigger.k2': {'type': 'startswith', 'pattern': 'pre'}}),
+            _get_rule('exists', {'trigger.k2': {'type': 'exists'}}),
+            _get_rule('eq_a_and_contains', {
+                'trigger.k1': {'type': 'equals', 'pattern': 'a'},
+                'trigger.k2': {'type': 'contains', 'pattern': 'mid'}
+            }),
+            _get_rule('eq_a_and_regex', {
+                'trigger.k1': {'type': 'equals', 'pattern': 'a'},
+                'trigger.k2': {'type': 'matchregex', 'pattern': '^pre.*post$'}
+            }),
+            _get_rule('nexists', {'trigger.k4': {'type': 'nexists'}})
+        ]
+
+    def test_tree_matcher_matches_linear_matcher(self):
+        payloads = [
+            {'k1': 'a', 'k2': 'premidpost', 'k3': 1},
+            {'k1': 'b', 'k2': 'other', 'k3': 2, 'k4': 'x'},
+            {'k1': ['a'], 'k2': {'foo': 'bar'}, 'k3': True},
+            {'k5': 'nothing matches on this key'},
+            {},
+            None
+        ]
+
+        for payload in payloads:
+            trigger_instance = TriggerInstanceDB(trigger=TREE_TRIGGER_REF, payload=payload)
+            linear = RulesMatcher(trigger_instance, TREE_TRIGGER, self.rules)
+            tree = DiscriminationTreeRulesMatcher(trigger_instance, TREE_TRIGGER, self.rules)
+
+            expected = [rule.name for rule in linear.get_matching_rules()]
+            actual = [rule.name for rule in tree.get_matching_rules()]
+            self.assertEqual(actual, expected, 'Mismatch for payload %s' % (payload))
+
+    def test_tree_is_rebuilt_when_criteria_change(self):
+        trigger_instance = TriggerInstanceDB(trigger=TREE_TRIGGER_REF, payload={'k1': 'c'})
+        rules = [_get_rule('eq', {'trigger.k1': {'type': 'equals', 'pattern': 'a'}})]
+
+        matcher = DiscriminationTreeRulesMatcher(trigger_instance, TREE_TRIGGER, rules)
+        self.assertEqual(matcher.get_matching_rules(), [])
+
+        rules[0].criteria = {'trigger.k1': {'type': 'equals', 'pattern': 'c'}}
+        matcher = DiscriminationTreeRulesMatcher(trigger_instance, TREE_TRIGGER, rules)
+        self.assertEqual(matcher.get_matching_rules(), rules)
+
+    def test_tree_is_rebuilt_when_rule_is_updated_through_the_index(self):
+        trigger_instance = TriggerInstanceDB(trigger=TREE_TRIGGER_REF, payload={'k1': 'c'})
+        rule = _get_rule('eq', {'trigger.k1': {'type': 'equals', 'pattern': 'a'}})
+        index = RulesIndex()
+        index.add_rule(rule)
+
+        matcher = DiscriminationTreeRulesMatcher(
+            trigger_instance, TREE_TRIGGER, index.get_rules(TREE_TRIGGER_REF),
+            rules_version=index.get_rules_version(TREE_TRIGGER_REF))
+        self.assertEqual(matcher.get_matching_rules(), [])
+
+        # Update frees the old compiled criteria and compiles the new ones, the new objects can
+        # end up at the same address
+        updated_rule = _get_rule('eq', {'trigger.k1': {'type': 'equals', 'pattern': 'c'}})
+        updated_rule.id = rule.id
+        index.add_rule(updated_rule)
+
+        matcher = DiscriminationTreeRulesMatcher(
+            trigger_instance, TREE_TRIGGER, index.get_rules(TREE_TRIGGER_REF),
+            rules_version=index.get_rules_version(TREE_TRIGGER_REF))
+        self.assertEqual(matcher.get_matching_rules(), [updated_rule])
+
+    @mock.patch('st2reactor.rules.matcher.get_versioned_compiled_criteria')
+    def test_cached_tree_is_used_without_looking_at_the_criteria(self, mock_get_criteria):
+        index = RulesIndex()
+        for rule in self.rules:
+            index.add_rule(rule)
+
+        rules = index.get_rules(TREE_TRIGGER_REF)
+        rules_version = index.get_rules_version(TREE_TRIGGER_REF)
+        mock_get_criteria.side_effect = get_versioned_compiled_criteria
+
+        for payload in [{'k1': 'a', 'k2': 'premidpost', 'k3': 1}, {'k1': 'b'}]:
+            trigger_instance = TriggerInstanceDB(trigger=TREE_TRIGGER_REF, payload=payload)
+            linear = RulesMatcher(trigger_instance, TREE_TRIGGER, rules)
+            tree = DiscriminationTreeRulesMatcher(trigger_instance, TREE_TRIGGER, rules,
+                                                  rules_version=rules_version)
+
+            expected = [rule.name for rule in linear.get_matching_rules()]
+            actual = [rule.name for rule in tree.get_matching_rules()]
+            self.assertEqual(actual, expected, 'Mismatch for payload %s' % (payload))
+
+        # Tree is built once for the rules version
+        self.assertEqual(mock_get_criteria.call_count, len(rules))
+
+    def test_invalid_criteria_only_fail_their_rule(self):
+        trigger_instance = TriggerInstanceDB(trigger=TREE_TRIGGER_REF, payload={'k1': 'a'})
+        rules = [
+            _get_rule('invalid_regex', {'trigger.k1': {'type': 'matchregex', 'pattern': '('}}),
+            _get_rule('invalid_operator', {'trigger.k1': {'type': 'invalid', 'pattern': 'a'}}),
+            _get_rule('valid_regex', {'trigger.k1': {'type': 'matchregex', 'pattern': '^a$'}}),
+            _get_rule('valid_equals', {'trigger.k1': {'type': 'equals', 'pattern': 'a'}})
+        ]
+
+        for matcher_cls in [RulesMatcher, DiscriminationTreeRulesMatcher]:
+            matcher = matcher_cls(trigger_instance, TREE_TRIGGER, rules)
+            self.assertEqual([rule.name for rule in matcher.get_matching_rules()],
+                             ['valid_regex', 'valid_equals'])
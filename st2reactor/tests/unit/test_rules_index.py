@@ -0,0 +1,177 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bson
+import mock
+import unittest2
+
+from st2common.models.db.reactor import ActionExecutionSpecDB
+from st2common.models.db.reactor import RuleDB, TriggerDB, TriggerInstanceDB
+from st2reactor.rules.engine import RulesEngine
+from st2reactor.rules.index import RulesIndex
+
+TRIGGER_REF = 'dummy_pack_1.st2.test.trigger1'
+
+
+def _get_rule_db(name, trigger=TRIGGER_REF, enabled=True):
+    return RuleDB(id=bson.ObjectId(), name=name, trigger=trigger, enabled=enabled,
+                  criteria={}, action=ActionExecutionSpecDB(ref='core.local', parameters={}))
+
+
+class RulesIndexTest(unittest2.TestCase):
+
+    def test_create_update_delete_rule(self):
+        index = RulesIndex()
+        rule_db = _get_rule_db('rule1')
+
+        index._handle_create_rule(rule_db)
+        self.assertEqual(index.get_rules(TRIGGER_REF), [rule_db])
+
+        # Rule moved to a different trigger
+        rule_db.trigger = 'dummy_pack_1.st2.test.trigger2'
+        index._handle_update_rule(rule_db)
+        self.assertEqual(index.get_rules(TRIGGER_REF), [])
+        self.assertEqual(index.get_rules('dummy_pack_1.st2.test.trigger2'), [rule_db])
+
+        index._handle_delete_rule(rule_db)
+        self.assertEqual(index.get_rules('dummy_pack_1.st2.test.trigger2'), [])
+
+    def test_disabled_rules_are_not_indexed(self):
+        index = RulesIndex()
+        rule_db = _get_rule_db('rule1')
+        index._handle_create_rule(rule_db)
+
+        rule_db.enabled = False
+        index._handle_update_rule(rule_db)
+        self.assertEqual(index.get_rules(TRIGGER_REF), [])
+
+        index._handle_create_rule(_get_rule_db('rule2', enabled=False))
+        self.assertEqual(index.get_rules(TRIGGER_REF), [])
+
+    def test_rules_version_changes_when_rules_change(self):
+        index = RulesIndex()
+        self.assertEqual(index.get_rules_version(TRIGGER_REF), None)
+
+        rule_db = _get_rule_db('rule1')
+        index._handle_create_rule(rule_db)
+        version = index.get_rules_version(TRIGGER_REF)
+        self.assertTrue(version is not None)
+
+        index._handle_create_rule(_get_rule_db('rule2'))
+        self.assertNotEqual(index.get_rules_version(TRIGGER_REF), version)
+        version = index.get_rules_version(TRIGGER_REF)
+
+        index._handle_update_rule(rule_db)
+        self.assertNotEqual(index.get_rules_version(TRIGGER_REF), version)
+        version = index.get_rules_version(TRIGGER_REF)
+
+        index._handle_delete_rule(rule_db)
+        self.assertNotEqual(index.get_rules_version(TRIGGER_REF), version)
+
+    @mock.patch('st2reactor.rules.index.get_trigger_db_by_ref')
+    def test_get_trigger_db_falls_back_to_db_once(self, mock_get_trigger_db_by_ref):
+        trigger_db = TriggerDB(name='st2.test.trigger1', pack='dummy_pack_1')
+        mock_get_trigger_db_by_ref.return_value = trigger_db
+        index = RulesIndex()
+
+        self.assertEqual(index.get_trigger_db(TRIGGER_REF), trigger_db)
+        self.assertEqual(index.get_trigger_db(TRIGGER_REF), trigger_db)
+        self.assertEqual(mock_get_trigger_db_by_ref.call_count, 1)
+
+        index._handle_delete_trigger(trigger_db)
+        index.get_trigger_db(TRIGGER_REF)
+        self.assertEqual(mock_get_trigger_db_by_ref.call_count, 2)
+
+    @mock.patch('st2reactor.rules.engine.Rule.query')
+    @mock.patch('st2reactor.rules.engine.get_trigger_db_by_ref')
+    def test_rules_engine_uses_index(self, mock_get_trigger_db_by_ref, mock_rule_query):
+        index = RulesIndex()
+        index._handle_create_trigger(TriggerDB(name='st2.test.trigger1', pack='dummy_pack_1',
+                                               type='dummy_pack_1.st2.test.trigger1'))
+        index._handle_create_rule(_get_rule_db('rule1'))
+
+        trigger_instance = TriggerInstanceDB(trigger=TRIGGER_REF, payload={'k1': 'v1'})
+        rules_engine = RulesEngine(rules_index=index)
+        matching_rules = rules_engine.get_matching_rules_for_trigger(trigger_instance)
+
+        self.assertEqual([rule.name for rule in matching_rules], ['rule1'])
+        self.assertFalse(mock_get_trigger_db_by_ref.called)
+        self.assertFalse(mock_rule_query.called)
+
+    def test_rules_engine_looks_up_rules_once_per_trigger_in_batch(self):
+        index = RulesIndex()
+        for trigger_name in ['st2.test.trigger1', 'st2.test.trigger2']:
+            index._handle_create_trigger(TriggerDB(name=trigger_name, pack='dummy_pack_1',
+                                                   type='dummy_pack_1.' + trigger_name))
+        index._handle_create_rule(_get_rule_db('rule1'))
+        index._handle_create_rule(_get_rule_db('rule2',
+                                               trigger='dummy_pack_1.st2.test.trigger2'))
+
+        trigger_instances = [
+            TriggerInstanceDB(trigger=TRIGGER_REF, payload={'k1': 'v1'}),
+            TriggerInstanceDB(trigger='dummy_pack_1.st2.test.trigger2', payload={'k1': 'v2'}),
+            TriggerInstanceDB(trigger=TRIGGER_REF, payload={'k1': 'v3'})
+        ]
+        rules_engine = RulesEngine(rules_index=index)
+
+        with mock.patch.object(index, 'get_rules', wraps=index.get_rules) as mock_get_rules, \
+                mock.patch.object(rules_engine, 'enforce_rules') as mock_enforce_rules:
+            rules_engine.handle_trigger_instances(trigger_instances)
+
+        self.assertEqual(mock_get_rules.call_count, 2)
+        enforced = [[(enforcer.rule.name, enforcer.trigger_instance.payload['k1'])
+                     for enforcer in call[0][0]]
+                    for call in mock_enforce_rules.call_args_list]
+        self.assertEqual(enforced, [[('rule1', 'v1'), ('rule1', 'v3')], [('rule2', 'v2')]])
+
+    @mock.patch('st2reactor.rules.index.RuleWatcher.start', mock.Mock())
+    @mock.patch('st2reactor.rules.index.TriggerWatcher.start', mock.Mock())
+    @mock.patch('st2reactor.rules.index.Rule.get_all')
+    def test_start_loads_rules_synchronously(self, mock_get_all):
+        mock_get_all.return_value = [_get_rule_db('rule1'), _get_rule_db('rule2')]
+        index = RulesIndex()
+
+        index.start()
+
+        self.assertEqual(sorted([rule.name for rule in index.get_rules(TRIGGER_REF)]),
+                         ['rule1', 'rule2'])
+
+    @mock.patch('st2reactor.rules.index.RuleWatcher.start', mock.Mock())
+    @mock.patch('st2reactor.rules.index.TriggerWatcher.start', mock.Mock())
+    @mock.patch('st2reactor.rules.index.Rule.get_all')
+    def test_events_received_while_loading_applied_after_snapshot(self, mock_get_all):
+        index = RulesIndex()
+        stale_rule_db = _get_rule_db('rule1')
+        updated_rule_db = _get_rule_db('rule1')
+        updated_rule_db.id = stale_rule_db.id
+        updated_rule_db.enabled = False
+        deleted_rule_db = _get_rule_db('rule2')
+
+        def get_all():
+            # Events arrive while the snapshot is being read
+            index._handle_update_rule(updated_rule_db)
+            index._handle_delete_rule(deleted_rule_db)
+            return [stale_rule_db, deleted_rule_db]
+
+        mock_get_all.side_effect = get_all
+
+        index.start()
+
+        self.assertEqual(index.get_rules(TRIGGER_REF), [])
+        self.assertFalse(index._pending_events)
+
+        # Events received after the snapshot are applied right away
+        index._handle_create_rule(_get_rule_db('rule3'))
+        self.assertEqual([rule.name for rule in index.get_rules(TRIGGER_REF)], ['rule3'])
@@ -0,0 +1,144 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import eventlet
+import mock
+from oslo.config import cfg
+import unittest2
+
+# XXX: Registers the rules engine options. Needs to happen before the config is parsed.
+from st2reactor.rules import config  # noqa
+import st2tests.config as tests_config
+tests_config.parse_args()
+
+from st2common.models.db.reactor import TriggerInstanceDB
+from st2reactor.rules.worker import Worker
+
+OVERRIDES = {
+    'use_rules_index': False,
+    'trigger_instance_write_behind': False,
+    'datastore_cache_ttl': 0,
+    'prefetch_count': 10,
+    'batch_size': 3,
+    'batch_max_wait': 0.01
+}
+
+TRIGGER_REF_1 = 'dummy_pack_1.st2.test.trigger1'
+TRIGGER_REF_2 = 'dummy_pack_1.st2.test.trigger2'
+
+
+def _get_message(index, trigger=TRIGGER_REF_1):
+    body = {'trigger': trigger, 'payload': {'index': index}}
+    return body, mock.Mock()
+
+
+def _create_trigger_instance(trigger, payload):
+    return TriggerInstanceDB(trigger=trigger, payload=payload)
+
+
+@mock.patch.object(Worker, '_create_trigger_instance',
+                   mock.Mock(side_effect=_create_trigger_instance))
+class RulesWorkerBatchTest(unittest2.TestCase):
+
+    def setUp(self):
+        super(RulesWorkerBatchTest, self).setUp()
+        for name, value in OVERRIDES.items():
+            cfg.CONF.set_override(name, value, group='rulesengine')
+
+    def tearDown(self):
+        for name in OVERRIDES.keys():
+            cfg.CONF.clear_override(name, group='rulesengine')
+        super(RulesWorkerBatchTest, self).tearDown()
+
+    def _get_worker(self):
+        worker = Worker(None)
+        worker.rules_engine = mock.Mock()
+        return worker
+
+    def _wait_for_processing(self, worker, count):
+        with eventlet.Timeout(5):
+            while len(worker._processed_messages) < count:
+                eventlet.sleep(0.01)
+
+    def _get_handled_payloads(self, worker):
+        return sorted([[trigger_instance.payload['index'] for trigger_instance in call[0][0]]
+                       for call in worker.rules_engine.handle_trigger_instances.call_args_list])
+
+    def test_full_batch_is_processed_by_trigger(self):
+        worker = self._get_worker()
+        messages = [_get_message(0), _get_message(1, trigger=TRIGGER_REF_2), _get_message(2)]
+
+        for body, message in messages[:2]:
+            worker.process_task(body, message)
+
+        eventlet.sleep(0.05)
+        self.assertFalse(worker.rules_engine.handle_trigger_instances.called)
+
+        worker.process_task(*messages[2])
+        self._wait_for_processing(worker, 3)
+
+        # Trigger instances for the same trigger are handled together
+        self.assertEqual(self._get_handled_payloads(worker), [[0, 2], [1]])
+
+        # Messages are only acked from the consumer green thread
+        self.assertFalse(any(message.ack.called for _, message in messages))
+        worker.on_iteration()
+        for _, message in messages:
+            self.assertEqual(message.ack.call_count, 1)
+
+    def test_partial_batch_is_flushed_after_max_wait(self):
+        worker = self._get_worker()
+        body, message = _get_message(1)
+
+        worker.process_task(body, message)
+        worker.on_iteration()
+        eventlet.sleep(0.05)
+        self.assertFalse(worker.rules_engine.handle_trigger_instances.called)
+
+        eventlet.sleep(OVERRIDES['batch_max_wait'])
+        worker.on_iteration()
+        self._wait_for_processing(worker, 1)
+        self.assertEqual(self._get_handled_payloads(worker), [[1]])
+
+        worker.on_iteration()
+        self.assertEqual(message.ack.call_count, 1)
+
+    def test_failed_messages_are_acked(self):
+        worker = self._get_worker()
+        worker.rules_engine.handle_trigger_instances.side_effect = Exception('Failed')
+        messages = [_get_message(index) for index in range(3)]
+
+        for body, message in messages:
+            worker.process_task(body, message)
+
+        self._wait_for_processing(worker, 3)
+        worker.on_iteration()
+
+        for _, message in messages:
+            self.assertEqual(message.ack.call_count, 1)
+
+    @mock.patch('st2reactor.rules.worker.teardown_metadata_cache', mock.Mock())
+    def test_buffered_messages_are_processed_on_shutdown(self):
+        worker = self._get_worker()
+        messages = [_get_message(index) for index in range(2)]
+
+        for body, message in messages:
+            worker.process_task(body, message)
+
+        worker.shutdown()
+
+        self.assertEqual(self._get_handled_payloads(worker), [[0, 1]])
+        for _, message in messages:
+            self.assertEqual(message.ack.call_count, 1)
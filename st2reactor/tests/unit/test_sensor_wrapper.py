@@ -87,6 +87,16 @@ class SensorServiceTestCase(unittest2.TestCase):
         self._sensor_service = SensorService(sensor_wrapper=wrapper)
         self._sensor_service._get_api_client = mock.Mock()
 
+    def test_dispatch_batch(self):
+        self._sensor_service._dispatcher = mock.Mock()
+        payloads = [{'line': 'a'}, {'line': 'b'}]
+
+        self._sensor_service.dispatch_batch(trigger='core.st2.sensor.test', payloads=payloads)
+
+        self._sensor_service._dispatcher.dispatch_batch.assert_called_once_with(
+            'core.st2.sensor.test', payloads=payloads)
+        self.assertFalse(self._sensor_service._dispatcher.dispatch.called)
+
     def test_datastore_operations_list_values(self):
         # Verify prefix filtering
         mock_api_client = mock.Mock()
@@ -0,0 +1,77 @@
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bson
+import mock
+import unittest2
+
+from st2common.models.db.reactor import TriggerInstanceDB
+from st2common.persistence.reactor import TriggerInstance
+from st2reactor.rules.trigger_instance_writer import TriggerInstanceWriter
+
+
+def _get_trigger_instance():
+    return TriggerInstanceDB(id=bson.ObjectId(), trigger='dummy_pack_1.st2.test.trigger1',
+                             payload={'k1': 'v1'})
+
+
+class TriggerInstanceWriterTest(unittest2.TestCase):
+
+    def setUp(self):
+        super(TriggerInstanceWriterTest, self).setUp()
+
+        for method_name in ['insert_many', 'add_or_update']:
+            patcher = mock.patch.object(TriggerInstance, method_name, mock.MagicMock())
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_matched_trigger_instance_is_persisted_right_away(self):
+        writer = TriggerInstanceWriter()
+        trigger_instance = _get_trigger_instance()
+        writer.write(trigger_instance, matched=True)
+
+        TriggerInstance.add_or_update.assert_called_once_with(trigger_instance)
+        self.assertFalse(TriggerInstance.insert_many.called)
+
+    def test_unmatched_trigger_instances_are_inserted_in_bulk(self):
+        writer = TriggerInstanceWriter(batch_size=10)
+        trigger_instances = [_get_trigger_instance() for _ in range(3)]
+        for trigger_instance in trigger_instances:
+            writer.write(trigger_instance, matched=False)
+
+        self.assertFalse(TriggerInstance.add_or_update.called)
+        self.assertFalse(TriggerInstance.insert_many.called)
+
+        writer.flush()
+        TriggerInstance.insert_many.assert_called_once_with(trigger_instances)
+
+        # Nothing left to flush
+        writer.flush()
+        self.assertEqual(TriggerInstance.insert_many.call_count, 1)
+
+    def test_unmatched_trigger_instances_are_dropped(self):
+        writer = TriggerInstanceWriter(unmatched_sample_rate=0.0)
+        writer.write(_get_trigger_instance(), matched=False)
+        writer.flush()
+
+        self.assertFalse(TriggerInstance.insert_many.called)
+
+    def test_stop_flushes_buffered_trigger_instances(self):
+        writer = TriggerInstanceWriter()
+        trigger_instance = _get_trigger_instance()
+        writer.write(trigger_instance, matched=False)
+        writer.stop()
+
+        TriggerInstance.insert_many.assert_called_once_with([trigger_instance])
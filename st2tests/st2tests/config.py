@@ -148,7 +148,12 @@ def _register_mistral_opts():
         cfg.StrOpt('v2_base_url', default='http://localhost:8989/v2',
                    help='Mistral v2 API server root endpoint.'),
         cfg.IntOpt('max_attempts', default=2),
-        cfg.IntOpt('retry_wait', default=1)
+        cfg.IntOpt('retry_wait', default=1),
+        cfg.FloatOpt('query_interval', default=1),
+        cfg.FloatOpt('max_query_interval', default=20),
+        cfg.FloatOpt('query_backoff_factor', default=1.5),
+        cfg.IntOpt('query_thread_pool_size', default=10),
+        cfg.BoolOpt('query_batch', default=False)
     ]
     _register_opts(mistral_opts, group='mistral')
 
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# Licensed to the StackStorm, Inc ('StackStorm') under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A utility script which measures PoolPublisher publish throughput and the size and the encode /
+decode cost of the messages for each of the available serializers.
+
+By default the in-memory kombu transport is used so the numbers reflect the publisher overhead
+(connection and channel handling, serialization) and not the broker.
+"""
+
+import argparse
+import datetime
+import time
+
+import bson
+from kombu import Connection, Exchange, Queue
+from kombu import serialization as kombu_serialization
+
+from st2common import config
+from st2common.models.db.action import LiveActionDB
+from st2common.transport import serialization
+from st2common.transport.publishers import PoolPublisher
+
+EXCHANGE = Exchange('st2.benchmark', type='topic')
+QUEUE = Queue('st2.benchmark.work', EXCHANGE, routing_key='#')
+
+
+def _get_payload():
+    return LiveActionDB(id=bson.ObjectId(), action='core.local', status='succeeded',
+                        parameters={'cmd': 'uname -a', 'hosts': 'localhost'},
+                        result={'stdout': 'Linux ' * 50, 'stderr': '', 'return_code': 0},
+                        context={'user': 'stanley'},
+                        start_timestamp=datetime.datetime.utcnow(),
+                        end_timestamp=datetime.datetime.utcnow())
+
+
+def _purge(url):
+    with Connection(url) as connection:
+        queue = QUEUE(connection.default_channel)
+        queue.declare()
+        queue.purge()
+
+
+def _run(name, count, func):
+    start = time.time()
+    func()
+    elapsed = time.time() - start
+    print('%-30s %8d messages in %6.3fs (%10.1f msg/s)' % (name, count, elapsed,
+                                                          count / elapsed))
+
+
+def benchmark_serializer(serializer, count):
+    payload = _get_payload()
+    content_type, content_encoding, data = kombu_serialization.dumps(payload, serializer)
+    print('%-30s %8d bytes' % ('%s message size' % (serializer), len(data)))
+
+    def encode():
+        for _ in range(count):
+            kombu_serialization.dumps(payload, serializer)
+
+    # Consumers convert the serializer names to content types the same way
+    accept = kombu_serialization.prepare_accept_content(serialization.ACCEPT_CONTENT)
+
+    def decode():
+        for _ in range(count):
+            kombu_serialization.loads(data, content_type, content_encoding, accept=accept)
+
+    _run('%s encode' % (serializer), count, encode)
+    _run('%s decode' % (serializer), count, decode)
+
+
+def benchmark_publisher(url, serializer, count, batch_size):
+    publisher = PoolPublisher(url, serializer=serializer)
+    payload = _get_payload()
+
+    _purge(url)
+
+    def publish():
+        for _ in range(count):
+            publisher.publish(payload, EXCHANGE, routing_key='create')
+
+    _run('%s publish' % (serializer), count, publish)
+    _purge(url)
+
+    def publish_batch():
+        payloads = [payload] * batch_size
+        for _ in range(count // batch_size):
+            publisher.publish_batch(payloads, EXCHANGE, routing_key='create')
+
+    _run('%s publish_batch' % (serializer), (count // batch_size) * batch_size, publish_batch)
+    _purge(url)
+
+
+def main(url, serializers, count, batch_size):
+    for serializer in serializers:
+        benchmark_serializer(serializer, count)
+        benchmark_publisher(url, serializer, count, batch_size)
+
+
+if __name__ == '__main__':
+    config.parse_args(args={})
+    parser = argparse.ArgumentParser(description='PoolPublisher benchmark')
+    parser.add_argument('--url', default='memory://',
+                        help='Messaging server URL')
+    parser.add_argument('--serializers', default=','.join(serialization.ACCEPT_CONTENT),
+                        help='Comma delimited list of the serializers to benchmark')
+    parser.add_argument('--count', type=int, default=10000,
+                        help='Number of messages to publish')
+    parser.add_argument('--batch-size', type=int, default=100,
+                        help='Number of messages per publish_batch call')
+    args = parser.parse_args()
+
+    main(url=args.url, serializers=args.serializers.split(','), count=args.count,
+         batch_size=args.batch_size)